@@ -3,6 +3,12 @@ ASGI config for incident_management project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve the project through this module (e.g. ``uvicorn
+incident_management.asgi:application``) to stream incident change events
+from /api/incidents/events/. Under WSGI the endpoint's long-poll mode still
+works, but every waiting request holds a worker thread and server-sent
+event streams are buffered until they end.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -0,0 +1,111 @@
+import json
+import logging
+import os
+import sys
+from django.conf import settings
+
+logger = logging.getLogger('incident_management.diagnostics')
+
+
+class QueryDiagnostics:
+    """
+    Collect the slow and repeated queries of one request, each with the
+    application frames (QUERY_DIAGNOSTICS_APPS) that ran it.
+
+    A query is slow when it takes at least QUERY_DIAGNOSTICS_SLOW_MS. It is
+    repeated when the same SQL runs QUERY_DIAGNOSTICS_REPEAT_THRESHOLD or
+    more times, with any parameters, which is how N+1 loads show up. Stacks
+    are captured once per distinct SQL (and for every slow query), so the
+    cost stays proportional to the number of distinct statements.
+    """
+    MAX_FRAMES = 5
+    MAX_SQL_LENGTH = 2000
+
+    def __init__(self, slow_ms=None, repeat_threshold=None, apps=None):
+        if slow_ms is None:
+            slow_ms = getattr(settings, 'QUERY_DIAGNOSTICS_SLOW_MS', 100)
+        self.slow = slow_ms / 1000
+        self.repeat_threshold = repeat_threshold or getattr(settings, 'QUERY_DIAGNOSTICS_REPEAT_THRESHOLD', 3)
+        apps = apps or getattr(settings, 'QUERY_DIAGNOSTICS_APPS', ['incidents', 'users'])
+        self.roots = tuple(os.path.join(str(settings.BASE_DIR), app) + os.sep for app in apps)
+        self.slow_queries = []
+        self.statements = {}
+
+    def record(self, sql, params, duration):
+        """
+        Record one executed query (called from the database execute wrapper)
+        """
+        statement = self.statements.get(sql)
+        if statement is None:
+            statement = self.statements[sql] = {'count': 0, 'time': 0.0, 'stack': self.app_stack()}
+        statement['count'] += 1
+        statement['time'] += duration
+        if duration >= self.slow:
+            stack = statement['stack'] if statement['count'] == 1 else self.app_stack()
+            self.slow_queries.append({
+                'kind': 'slow', 'sql': sql[:self.MAX_SQL_LENGTH], 'params': repr(params)[:self.MAX_SQL_LENGTH],
+                'duration_ms': round(duration * 1000, 3), **self.attribution(stack),
+            })
+
+    def app_stack(self):
+        """
+        Return the innermost application frames of the current call stack
+        """
+        stack = []
+        frame = sys._getframe(1)
+        while frame is not None and len(stack) < self.MAX_FRAMES:
+            filename = frame.f_code.co_filename
+            if filename.startswith(self.roots):
+                stack.append({
+                    'file': os.path.relpath(filename, settings.BASE_DIR),
+                    'line': frame.f_lineno,
+                    'function': frame.f_code.co_name,
+                })
+            frame = frame.f_back
+        return stack
+
+    def attribution(self, stack):
+        return {'frame': stack[0] if stack else None, 'stack': stack}
+
+    def findings(self):
+        """
+        Return the slow queries followed by the repeated statements
+        """
+        repeated = [
+            {
+                'kind': 'repeated', 'sql': sql[:self.MAX_SQL_LENGTH], 'count': statement['count'],
+                'total_ms': round(statement['time'] * 1000, 3), **self.attribution(statement['stack']),
+            }
+            for sql, statement in self.statements.items()
+            if statement['count'] >= self.repeat_threshold
+        ]
+        return self.slow_queries + repeated
+
+    def report(self, **context):
+        """
+        Log every finding with the given context (e.g. view and path) and return them
+        """
+        findings = self.findings()
+        for finding in findings:
+            frame = finding['frame']
+            location = f"{frame['file']}:{frame['line']}" if frame else 'outside the application'
+            logger.warning(
+                '%s query at %s: %s', finding['kind'], location, finding['sql'][:200],
+                extra={'finding': {**context, **finding}},
+            )
+        return findings
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Format records as one JSON object per line, merging in record.finding
+    """
+    def format(self, record):
+        data = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        data.update(getattr(record, 'finding', {}))
+        return json.dumps(data, default=str)
@@ -0,0 +1,162 @@
+import threading
+from bisect import bisect_left
+from hmac import compare_digest
+from django.conf import settings
+from django.http import Http404, HttpResponse
+
+# Upper bounds of the histogram buckets (a +Inf bucket is always added)
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200)
+
+# Metric name -> (help text, buckets)
+HISTOGRAMS = {
+    'http_request_duration_seconds': ('Wall time of requests by view', DURATION_BUCKETS),
+    'http_request_db_duration_seconds': ('Time spent in database queries per request by view', DURATION_BUCKETS),
+    'http_request_db_queries': ('Database queries per request by view', QUERY_BUCKETS),
+    'http_request_db_duplicate_queries': (
+        'Queries per request repeating an earlier query (same SQL and parameters) by view', QUERY_BUCKETS
+    ),
+}
+
+
+class Histogram:
+    """
+    Cumulative histogram with fixed buckets, in the Prometheus sense
+    """
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """
+        Return (upper bound label, cumulative count) pairs including +Inf
+        """
+        total = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            total += count
+            yield str(bound), total
+
+
+class RequestMetrics:
+    """
+    Process-wide registry of per-view request histograms and counters.
+
+    Every worker process keeps its own numbers; scrape each process (or run a
+    single worker per metrics port) to see them all.
+    """
+    def __init__(self):
+        self._histograms = {}
+        self._requests = {}
+        self._lock = threading.Lock()
+
+    def record(self, view, method, status, duration, db_duration, queries, duplicates):
+        """
+        Record one finished request
+        """
+        labels = (view, method)
+        observations = {
+            'http_request_duration_seconds': duration,
+            'http_request_db_duration_seconds': db_duration,
+            'http_request_db_queries': queries,
+            'http_request_db_duplicate_queries': duplicates,
+        }
+        with self._lock:
+            for name, value in observations.items():
+                histogram = self._histograms.get((name, labels))
+                if histogram is None:
+                    histogram = self._histograms[(name, labels)] = Histogram(HISTOGRAMS[name][1])
+                histogram.observe(value)
+            key = (view, method, str(status))
+            self._requests[key] = self._requests.get(key, 0) + 1
+
+    def render(self):
+        """
+        Return the metrics in the Prometheus text exposition format
+        """
+        with self._lock:
+            histograms = sorted(
+                (name, labels, list(histogram.cumulative()), histogram.sum, histogram.count)
+                for (name, labels), histogram in self._histograms.items()
+            )
+            requests = sorted(self._requests.items())
+
+        lines = [
+            '# HELP http_requests_total Requests by view, method and status code',
+            '# TYPE http_requests_total counter',
+        ]
+        for (view, method, status), count in requests:
+            lines.append(f'http_requests_total{{{format_labels(view=view, method=method, status=status)}}} {count}')
+        for name, (help_text, _) in HISTOGRAMS.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} histogram')
+            for metric, (view, method), buckets, total, count in histograms:
+                if metric != name:
+                    continue
+                labels = format_labels(view=view, method=method)
+                for bound, cumulative in buckets:
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_sum{{{labels}}} {total:g}')
+                lines.append(f'{name}_count{{{labels}}} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+def format_labels(**labels):
+    escaped = (
+        (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in labels.items()
+    )
+    return ','.join(f'{name}="{value}"' for name, value in escaped)
+
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def get_request_metrics():
+    """
+    Return the process-wide RequestMetrics registry
+    """
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = RequestMetrics()
+    return _metrics
+
+
+def reset_request_metrics():
+    """
+    Drop the process-wide registry and everything recorded in it
+    """
+    global _metrics
+    _metrics = None
+
+
+def metrics_allowed(request):
+    """
+    Return whether the request may read the metrics: it must carry
+    `Authorization: Bearer <METRICS_TOKEN>` or come from METRICS_ALLOWED_IPS.
+    Both are empty by default, which keeps /metrics/ closed.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token and compare_digest(request.META.get('HTTP_AUTHORIZATION', '').encode(), f'Bearer {token}'.encode()):
+        return True
+    return request.META.get('REMOTE_ADDR') in getattr(settings, 'METRICS_ALLOWED_IPS', [])
+
+
+def metrics_view(request):
+    """
+    Serve the request metrics to Prometheus (see metrics_allowed)
+    """
+    if not metrics_allowed(request):
+        raise Http404
+    return HttpResponse(
+        get_request_metrics().render(), content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
@@ -0,0 +1,100 @@
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from .diagnostics import QueryDiagnostics
+from .metrics import get_request_metrics
+
+
+class RequestProfile:
+    """
+    Timings of one request, collected through a database execute wrapper.
+    Queries are also passed on to `diagnostics` (a QueryDiagnostics) if given.
+    """
+    def __init__(self, diagnostics=None):
+        self.diagnostics = diagnostics
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.duplicates = 0
+        self.db_time = 0.0
+        self._seen = set()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.db_time += duration
+            self.queries += 1
+            if self.diagnostics is not None:
+                self.diagnostics.record(sql, params, duration)
+            key = hash((sql, repr(params)))
+            if key in self._seen:
+                self.duplicates += 1
+            else:
+                self._seen.add(key)
+
+    @property
+    def duration(self):
+        return time.perf_counter() - self.started
+
+
+class RequestProfilingMiddleware:
+    """
+    Record wall time, database time, query count and duplicate query count
+    of every request under its resolved view name.
+
+    The numbers feed the histograms served at /metrics/. With
+    REQUEST_PROFILING_SERVER_TIMING they are also sent to the client in a
+    Server-Timing header. With QUERY_DIAGNOSTICS, slow and repeated queries
+    are also logged with the code that ran them (see QueryDiagnostics). Set
+    REQUEST_PROFILING=False to remove the middleware entirely.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_PROFILING', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        profile = self.start()
+        with connection.execute_wrapper(profile):
+            response = self.get_response(request)
+        return self.finish(request, response, profile)
+
+    async def __acall__(self, request):
+        profile = self.start()
+        with connection.execute_wrapper(profile):
+            response = await self.get_response(request)
+        return self.finish(request, response, profile)
+
+    def start(self):
+        diagnostics = QueryDiagnostics() if getattr(settings, 'QUERY_DIAGNOSTICS', False) else None
+        return RequestProfile(diagnostics)
+
+    def finish(self, request, response, profile):
+        # The body of a streaming response is sent later and is not included
+        duration = profile.duration
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+        get_request_metrics().record(
+            view, request.method, response.status_code,
+            duration, profile.db_time, profile.queries, profile.duplicates,
+        )
+        if profile.diagnostics is not None:
+            profile.diagnostics.report(view=view, method=request.method, path=request.path)
+        if getattr(settings, 'REQUEST_PROFILING_SERVER_TIMING', False):
+            response['Server-Timing'] = (
+                f'total;dur={duration * 1000:.1f}, '
+                f'db;dur={profile.db_time * 1000:.1f};desc="{profile.queries} queries, '
+                f'{profile.duplicates} duplicates"'
+            )
+        return response
@@ -11,7 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 from pathlib import Path
-from decouple import config
+from decouple import Csv, config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -46,6 +46,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'incident_management.middleware.RequestProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -79,27 +80,42 @@ WSGI_APPLICATION = 'incident_management.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-# DATABASES = {
-#     'default': {
-#         'ENGINE': 'django.db.backends.sqlite3',
-#         'NAME': BASE_DIR / 'db.sqlite3',
-#     }
-# }
-
-# Uncomment below for MySQL configuration
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.mysql',
-        'NAME': "python",
-        'USER': 'root',
-        'PASSWORD': "Sagar#123",
-        'HOST': 'localhost',
-        'PORT':'3306',
-        'OPTIONS': {
-            'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
+# Set DB_ENGINE=django.db.backends.sqlite3 (and optionally DB_NAME) to run on
+# SQLite, e.g. for local load testing; MySQL is used otherwise.
+DB_ENGINE = config('DB_ENGINE', default='django.db.backends.mysql')
+
+if DB_ENGINE == 'django.db.backends.sqlite3':
+    DATABASES = {
+        'default': {
+            'ENGINE': DB_ENGINE,
+            'NAME': BASE_DIR / config('DB_NAME', default='db.sqlite3'),
+            'OPTIONS': {
+                # Wait for the write lock instead of failing under concurrent requests
+                'timeout': 20,
+                'transaction_mode': 'IMMEDIATE',
+                'init_command': 'PRAGMA journal_mode=WAL;',
+            },
+            # A file-backed test database honours the timeout above; the default
+            # in-memory one fails concurrent writers with "table is locked"
+            'TEST': {
+                'NAME': BASE_DIR / config('DB_TEST_NAME', default='test_db.sqlite3'),
+            },
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': DB_ENGINE,
+            'NAME': config('DB_NAME', default="python"),
+            'USER': config('DB_USER', default='root'),
+            'PASSWORD': config('DB_PASSWORD', default="Sagar#123"),
+            'HOST': config('DB_HOST', default='localhost'),
+            'PORT': config('DB_PORT', default='3306'),
+            'OPTIONS': {
+                'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
+            }
         }
     }
-}
 
 
 # Password validation
@@ -149,7 +165,7 @@ AUTH_USER_MODEL = 'users.User'
 # Django REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'users.authentication.CachedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
@@ -172,3 +188,129 @@ CORS_ALLOW_ALL_ORIGINS = True  # Only for development
 # Additional settings
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+
+# Cache configuration
+# Use a shared backend (e.g. Redis or Memcached) when running multiple workers so
+# that cache invalidation is visible to every process.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='incident-management'),
+    }
+}
+
+# Incident statistics cache lifetime in seconds
+INCIDENT_STATS_CACHE_TIMEOUT = config('INCIDENT_STATS_CACHE_TIMEOUT', default=300, cast=int)
+
+# Incident ID typeahead (search mode=prefix): server-side cache lifetime,
+# browser Cache-Control max-age and the maximum number of suggestions
+INCIDENT_PREFIX_CACHE_TIMEOUT = config('INCIDENT_PREFIX_CACHE_TIMEOUT', default=300, cast=int)
+INCIDENT_PREFIX_MAX_AGE = config('INCIDENT_PREFIX_MAX_AGE', default=10, cast=int)
+INCIDENT_PREFIX_MAX_RESULTS = config('INCIDENT_PREFIX_MAX_RESULTS', default=20, cast=int)
+
+# Longest date range (in days) served by the daily analytics endpoint
+INCIDENT_ANALYTICS_MAX_DAYS = config('INCIDENT_ANALYTICS_MAX_DAYS', default=366, cast=int)
+
+# Incident ID allocation
+# Available allocators live in incidents.allocators:
+#   FeistelIncidentIdAllocator  - sequence-backed, random-looking IDs (default)
+#   SequenceIncidentIdAllocator - sequence-backed, sequential IDs
+#   RandomIncidentIdAllocator   - legacy random digits with a uniqueness query per attempt
+INCIDENT_ID_ALLOCATOR = config('INCIDENT_ID_ALLOCATOR', default='incidents.allocators.FeistelIncidentIdAllocator')
+INCIDENT_ID_BLOCK_SIZE = config('INCIDENT_ID_BLOCK_SIZE', default=50, cast=int)
+
+# Maximum number of items accepted by the bulk create/close endpoints
+INCIDENT_BULK_MAX_ITEMS = config('INCIDENT_BULK_MAX_ITEMS', default=500, cast=int)
+
+# Incident change events (/api/incidents/events/, served over SSE or long-poll)
+# Brokers live in incidents.events:
+#   InMemoryEventBroker - per-process channels, for tests and single-process servers (default)
+#   CacheEventBroker    - channels in the Django cache; use with a shared cache across workers
+INCIDENT_EVENT_BROKER = config('INCIDENT_EVENT_BROKER', default='incidents.events.InMemoryEventBroker')
+INCIDENT_EVENTS_BUFFER_SIZE = config('INCIDENT_EVENTS_BUFFER_SIZE', default=100, cast=int)
+INCIDENT_EVENTS_LONG_POLL_TIMEOUT = config('INCIDENT_EVENTS_LONG_POLL_TIMEOUT', default=25, cast=int)
+INCIDENT_EVENTS_STREAM_TIMEOUT = config('INCIDENT_EVENTS_STREAM_TIMEOUT', default=300, cast=int)
+INCIDENT_EVENTS_HEARTBEAT = config('INCIDENT_EVENTS_HEARTBEAT', default=15, cast=int)
+INCIDENT_EVENTS_POLL_INTERVAL = config('INCIDENT_EVENTS_POLL_INTERVAL', default=0.5, cast=float)
+
+# Per-view request profiling (incident_management.middleware), served at /metrics/
+# REQUEST_PROFILING_SERVER_TIMING adds a Server-Timing header to every response;
+# it reveals timings to clients, so keep it off on public deployments.
+REQUEST_PROFILING = config('REQUEST_PROFILING', default=True, cast=bool)
+REQUEST_PROFILING_SERVER_TIMING = config('REQUEST_PROFILING_SERVER_TIMING', default=False, cast=bool)
+# /metrics/ is closed unless METRICS_TOKEN is set (send it as a Bearer token)
+# or the client address is in METRICS_ALLOWED_IPS. Behind a reverse proxy on
+# the same host every client arrives from 127.0.0.1, so only list loopback
+# addresses when nothing is proxied; prefer METRICS_TOKEN otherwise.
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+METRICS_ALLOWED_IPS = config('METRICS_ALLOWED_IPS', default='', cast=Csv())
+
+# Query diagnostics: log slow queries and SQL repeated within one request,
+# with the incidents/users code that ran them, as JSON lines to a rotating file
+QUERY_DIAGNOSTICS = config('QUERY_DIAGNOSTICS', default=False, cast=bool)
+QUERY_DIAGNOSTICS_SLOW_MS = config('QUERY_DIAGNOSTICS_SLOW_MS', default=100, cast=float)
+QUERY_DIAGNOSTICS_REPEAT_THRESHOLD = config('QUERY_DIAGNOSTICS_REPEAT_THRESHOLD', default=3, cast=int)
+QUERY_DIAGNOSTICS_APPS = ['incidents', 'users']
+QUERY_DIAGNOSTICS_LOG = config('QUERY_DIAGNOSTICS_LOG', default=str(BASE_DIR / 'query_diagnostics.log'))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'json': {'()': 'incident_management.diagnostics.JsonFormatter'},
+    },
+    'handlers': {
+        'query_diagnostics': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': QUERY_DIAGNOSTICS_LOG,
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'delay': True,
+            'formatter': 'json',
+        },
+    },
+    'loggers': {
+        'incident_management.diagnostics': {
+            'handlers': ['query_diagnostics'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
+# Pincode lookup caching
+# PINCODE_CACHE_ALIAS names a Django cache (e.g. 'default') used as a shared
+# second tier behind the in-process LRU; leave empty to disable it. Cached
+# results are keyed by the pincode data version (see PINCODE_PRELOAD_INDEX).
+PINCODE_CACHE_SIZE = config('PINCODE_CACHE_SIZE', default=10000, cast=int)
+PINCODE_CACHE_TIMEOUT = config('PINCODE_CACHE_TIMEOUT', default=86400, cast=int)
+PINCODE_NEGATIVE_CACHE_TIMEOUT = config('PINCODE_NEGATIVE_CACHE_TIMEOUT', default=60, cast=int)
+PINCODE_CACHE_ALIAS = config('PINCODE_CACHE_ALIAS', default='')
+
+# Serve pincode lookups from an in-memory copy of the pincode_data table,
+# loaded on the first request of each process. Changes are picked up through
+# a version number stored in the default cache, checked at most every
+# PINCODE_INDEX_CHECK_INTERVAL seconds. With more than one worker process
+# CACHES must be shared, otherwise other workers keep their old copy.
+PINCODE_PRELOAD_INDEX = config('PINCODE_PRELOAD_INDEX', default=False, cast=bool)
+PINCODE_INDEX_CHECK_INTERVAL = config('PINCODE_INDEX_CHECK_INTERVAL', default=5, cast=int)
+
+# External pincode providers, queried concurrently (first valid answer wins)
+PINCODE_EXTERNAL_APIS = [
+    'https://api.postalpincode.in/pincode/',
+]
+PINCODE_EXTERNAL_API_TIMEOUT = config('PINCODE_EXTERNAL_API_TIMEOUT', default=5, cast=int)
+
+# Token authentication cache (users.authentication.CachedTokenAuthentication).
+# Logout and user changes are published through the default cache and checked
+# on every hit, so revocations reach other worker processes only when CACHES
+# is shared between them.
+TOKEN_AUTH_CACHE_SIZE = config('TOKEN_AUTH_CACHE_SIZE', default=10000, cast=int)
+TOKEN_AUTH_CACHE_TIMEOUT = config('TOKEN_AUTH_CACHE_TIMEOUT', default=60, cast=int)
+
+# Login activity tracking (users.activity): last_login/last_seen are recorded at
+# most once per user per LOGIN_ACTIVITY_WRITE_INTERVAL seconds and flushed in
+# batches every LOGIN_ACTIVITY_FLUSH_INTERVAL seconds.
+LOGIN_ACTIVITY_WRITE_INTERVAL = config('LOGIN_ACTIVITY_WRITE_INTERVAL', default=300, cast=int)
+LOGIN_ACTIVITY_FLUSH_INTERVAL = config('LOGIN_ACTIVITY_FLUSH_INTERVAL', default=60, cast=int)
+LOGIN_ACTIVITY_BATCH_SIZE = config('LOGIN_ACTIVITY_BATCH_SIZE', default=500, cast=int)
@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Incident
+from .models import Incident, IncidentDailyRollup, IncidentIdSequence
+from .search import IncidentSearchIndex
 
 
 @admin.register(Incident)
@@ -9,7 +10,8 @@ class IncidentAdmin(admin.ModelAdmin):
     """
     list_display = ['incident_id', 'reporter', 'reporter_type', 'priority', 'status', 'reported_date']
     list_filter = ['reporter_type', 'priority', 'status', 'reported_date']
-    search_fields = ['incident_id', 'reporter__username', 'reporter__email', 'incident_details']
+    # incident_details is searched through the token index, see get_search_results()
+    search_fields = ['incident_id', 'reporter__username', 'reporter__email']
     ordering = ['-reported_date']
     readonly_fields = ['incident_id', 'reported_date', 'updated_date']
     
@@ -25,6 +27,16 @@ class IncidentAdmin(admin.ModelAdmin):
         }),
     )
     
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Also match incidents whose details contain every search word
+        """
+        results, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        matches = IncidentSearchIndex().matching_incidents(search_term)
+        if matches is not None:
+            results |= queryset.filter(pk__in=matches)
+        return results, may_have_duplicates
+    
     def get_readonly_fields(self, request, obj=None):
         """
         Make incident non-editable if it's closed
@@ -33,3 +45,29 @@ class IncidentAdmin(admin.ModelAdmin):
         if obj and obj.status == 'CLOSED':
             readonly_fields.extend(['incident_details', 'priority', 'status'])
         return readonly_fields
+
+
+@admin.register(IncidentIdSequence)
+class IncidentIdSequenceAdmin(admin.ModelAdmin):
+    """
+    Admin configuration for IncidentIdSequence model
+    """
+    list_display = ['year', 'next_value']
+    ordering = ['-year']
+    readonly_fields = ['year', 'next_value']
+
+
+@admin.register(IncidentDailyRollup)
+class IncidentDailyRollupAdmin(admin.ModelAdmin):
+    """
+    Admin configuration for IncidentDailyRollup model (read-only, rebuilt by rebuild_incident_rollups)
+    """
+    list_display = ['date', 'reporter', 'reporter_type', 'priority', 'reported_count', 'closed_count']
+    list_filter = ['reporter_type', 'priority', 'date']
+    ordering = ['-date']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,264 @@
+import hashlib
+import random
+import threading
+from functools import partial
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+
+class IncidentIdSpaceExhausted(Exception):
+    """
+    Raised when every incident ID for a year has been handed out
+    """
+    pass
+
+
+class BaseIncidentIdAllocator:
+    """
+    Base class for incident ID allocators.
+
+    Incident IDs have the format RMG + 5 digits + year, so every year has
+    room for CAPACITY IDs.
+    """
+    PREFIX = 'RMG'
+    DIGITS = 5
+    CAPACITY = 10 ** DIGITS
+
+    def allocate(self, year=None):
+        """
+        Return a single unused incident ID
+        """
+        return self.allocate_many(1, year)[0]
+
+    def allocate_many(self, count, year=None):
+        """
+        Return `count` unused incident IDs
+        """
+        raise NotImplementedError
+
+    def remaining(self, year=None):
+        """
+        Return how many IDs of the yearly space are still available
+        """
+        raise NotImplementedError
+
+    def format_id(self, number, year):
+        return f"{self.PREFIX}{number:0{self.DIGITS}d}{year}"
+
+    def current_year(self):
+        return timezone.now().year
+
+
+class RandomIncidentIdAllocator(BaseIncidentIdAllocator):
+    """
+    Legacy allocator: pick random digits and retry until unused.
+
+    Costs one query per attempt and is not safe against concurrent inserts.
+    """
+    def allocate_many(self, count, year=None):
+        from .models import Incident
+
+        year = year or self.current_year()
+        allocated = set()
+        while len(allocated) < count:
+            incident_id = self.format_id(random.randrange(self.CAPACITY), year)
+            if incident_id in allocated:
+                continue
+            if not Incident.objects.filter(incident_id=incident_id).exists():
+                allocated.add(incident_id)
+        return list(allocated)
+
+    def remaining(self, year=None):
+        from .models import Incident
+
+        year = year or self.current_year()
+        used = Incident.objects.filter(
+            incident_id__startswith=self.PREFIX, incident_id__endswith=str(year)
+        ).count()
+        return self.CAPACITY - used
+
+
+class SequenceIncidentIdAllocator(BaseIncidentIdAllocator):
+    """
+    Allocator backed by a per-year sequence table.
+
+    Each process leases a block of sequence numbers in one short transaction
+    and then hands out IDs from memory, so no query is needed per ID. IDs that
+    already exist (e.g. from the legacy random allocator) are skipped with one
+    lookup per block.
+
+    A lease inside an atomic block joins the caller's transaction on every
+    database, so a rollback also returns the leased numbers. Until it commits
+    the block is only reused by that transaction, and on MySQL the year's
+    sequence row stays locked for other leases.
+    """
+    def __init__(self, block_size=None):
+        self.block_size = block_size or getattr(settings, 'INCIDENT_ID_BLOCK_SIZE', 50)
+        self._blocks = {}
+        self._pending = threading.local()
+        self._lock = threading.Lock()
+
+    def allocate_many(self, count, year=None):
+        year = year or self.current_year()
+        allocated = []
+        with self._lock:
+            while len(allocated) < count:
+                block = self._blocks.get(year) or self._pending_block(year)
+                if not block:
+                    block = self._lease_block(year, max(self.block_size, count - len(allocated)))
+                    self._store(year, block)
+                take = count - len(allocated)
+                allocated.extend(block[:take])
+                del block[:take]
+        return allocated
+
+    def _store(self, year, block):
+        if not connection.in_atomic_block:
+            self._blocks[year] = block
+            return
+        # Share the rest of the block only once the lease is committed
+        keep = partial(self._keep, year, block)
+        transaction.on_commit(keep)
+        self._pending_blocks()[year] = (keep, block)
+
+    def _keep(self, year, block):
+        pending = self._pending_blocks()
+        if year in pending and pending[year][1] is block:
+            del pending[year]
+        with self._lock:
+            self._blocks.setdefault(year, []).extend(block)
+
+    def _pending_blocks(self):
+        if not hasattr(self._pending, 'blocks'):
+            self._pending.blocks = {}
+        return self._pending.blocks
+
+    def _pending_block(self, year):
+        """
+        Return the block leased by this thread's open transaction, if that
+        lease has not been rolled back
+        """
+        pending = self._pending_blocks().get(year)
+        if pending is None:
+            return None
+        keep, block = pending
+        # A rollback drops the lease's on_commit callback together with it
+        if not any(callback is keep for _, callback, _ in connection.run_on_commit):
+            del self._pending_blocks()[year]
+            return None
+        return block
+
+    def lease(self, year, size):
+        """
+        Reserve `size` sequence numbers for the year and return the range
+        """
+        from .models import IncidentIdSequence
+
+        with transaction.atomic():
+            sequence, _ = IncidentIdSequence.objects.select_for_update().get_or_create(year=year)
+            start = sequence.next_value
+            if start >= self.CAPACITY:
+                raise IncidentIdSpaceExhausted(f"No incident IDs left for {year}")
+            end = min(start + size, self.CAPACITY)
+            sequence.next_value = end
+            sequence.save(update_fields=['next_value'])
+        return range(start, end)
+
+    def _lease_block(self, year, size):
+        from .models import Incident
+
+        while True:
+            candidates = [
+                self.format_id(self.permute(number, year), year)
+                for number in self.lease(year, size)
+            ]
+            taken = set(
+                Incident.objects.filter(incident_id__in=candidates)
+                .values_list('incident_id', flat=True)
+            )
+            block = [incident_id for incident_id in candidates if incident_id not in taken]
+            if block:
+                return block
+
+    def permute(self, number, year):
+        """
+        Map a sequence number to the 5-digit part of the ID
+        """
+        return number
+
+    def remaining(self, year=None):
+        from .models import IncidentIdSequence
+
+        year = year or self.current_year()
+        sequence = IncidentIdSequence.objects.filter(year=year).first()
+        used = sequence.next_value if sequence else 0
+        # Numbers leased by this process but not handed out yet are still free
+        with self._lock:
+            unused = len(self._blocks.get(year, ())) + len(self._pending_block(year) or ())
+        return self.CAPACITY - used + unused
+
+
+class FeistelIncidentIdAllocator(SequenceIncidentIdAllocator):
+    """
+    Sequence allocator whose IDs look random.
+
+    The sequence number is passed through a keyed Feistel network over the
+    smallest even-width bit domain covering CAPACITY and cycle-walked back
+    into range. The mapping is a bijection, so IDs never collide.
+    """
+    ROUNDS = 4
+
+    def __init__(self, block_size=None, key=None):
+        super().__init__(block_size)
+        self.key = (key or settings.SECRET_KEY).encode()
+        bits = (self.CAPACITY - 1).bit_length()
+        self.half_bits = (bits + 1) // 2
+        self.half_mask = (1 << self.half_bits) - 1
+
+    def _round(self, value, round_index, year):
+        digest = hashlib.blake2b(
+            f"{year}:{round_index}:{value}".encode(), key=self.key[:64], digest_size=8
+        ).digest()
+        return int.from_bytes(digest, 'big') & self.half_mask
+
+    def _encrypt(self, value, year):
+        left, right = value >> self.half_bits, value & self.half_mask
+        for round_index in range(self.ROUNDS):
+            left, right = right, left ^ self._round(right, round_index, year)
+        return (left << self.half_bits) | right
+
+    def permute(self, number, year):
+        value = self._encrypt(number, year)
+        while value >= self.CAPACITY:
+            value = self._encrypt(value, year)
+        return value
+
+
+_allocator = None
+_allocator_lock = threading.Lock()
+
+
+def get_incident_id_allocator():
+    """
+    Return the process-wide allocator configured by INCIDENT_ID_ALLOCATOR
+    """
+    global _allocator
+    if _allocator is None:
+        with _allocator_lock:
+            if _allocator is None:
+                path = getattr(
+                    settings, 'INCIDENT_ID_ALLOCATOR',
+                    'incidents.allocators.FeistelIncidentIdAllocator'
+                )
+                _allocator = import_string(path)()
+    return _allocator
+
+
+def reset_incident_id_allocator():
+    """
+    Drop the process-wide allocator so that it is rebuilt from settings
+    """
+    global _allocator
+    _allocator = None
@@ -0,0 +1,258 @@
+import gc
+import json
+import statistics
+import time
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.urls import reverse
+from rest_framework.test import APIClient
+from users.models import PincodeData
+from users.services import PincodeService
+from .allocators import (
+    FeistelIncidentIdAllocator, RandomIncidentIdAllocator, get_incident_id_allocator
+)
+from .models import Incident, IncidentIdSequence
+from .serializers import IncidentSerializer, IncidentDetailSerializer
+
+User = get_user_model()
+
+# Year used for allocator benchmarks so that real IDs are never touched
+BENCHMARK_YEAR = 2099
+
+
+def create_reporter(username='benchmark_reporter'):
+    return User.objects.create_user(
+        username=username, email=f'{username}@example.com',
+        first_name='Bench', last_name='Reporter'
+    )
+
+
+def create_incidents(reporter, count, incident_ids=None):
+    """
+    Bulk insert `count` incidents for the reporter with pre-assigned IDs
+    """
+    if incident_ids is None:
+        incident_ids = get_incident_id_allocator().allocate_many(count)
+    Incident.objects.bulk_create([
+        Incident(
+            incident_id=incident_id,
+            reporter=reporter,
+            reporter_type=('ENTERPRISE', 'GOVERNMENT')[number % 2],
+            incident_details=f'Benchmark incident {number}',
+            priority=('HIGH', 'MEDIUM', 'LOW')[number % 3],
+            status=('OPEN', 'IN_PROGRESS', 'CLOSED')[number % 3],
+        )
+        for number, incident_id in enumerate(incident_ids)
+    ], batch_size=1000)
+
+
+def delete_allocator_fixtures(reporter):
+    """
+    Remove the committed incidents, sequence and reporter of the allocator benchmark
+    """
+    # The incidents were bulk inserted without signals, so delete them the same way
+    Incident.objects.filter(reporter=reporter)._raw_delete(Incident.objects.db)
+    IncidentIdSequence.objects.filter(year=BENCHMARK_YEAR).delete()
+    reporter.delete()
+
+
+class BenchmarkSuite:
+    """
+    Micro-benchmarks for the hot units of the backend.
+
+    Every benchmark reports the median and best time per operation together
+    with the number of queries one operation runs. Allocator leases must
+    commit like they do in production, so that group runs in autocommit and
+    deletes its own fixtures; every other group runs in a transaction that is
+    rolled back.
+    """
+
+    def __init__(self, repeat=7, operations=20, page_sizes=(20, 200), fill_levels=(0.0, 0.5, 0.9)):
+        self.repeat = repeat
+        self.operations = operations
+        self.page_sizes = page_sizes
+        self.fill_levels = fill_levels
+        self.results = {}
+
+    def run(self, only=None):
+        benchmarks = {
+            'incident_id': self.bench_incident_id,
+            'serializers': self.bench_serializers,
+            'pincode': self.bench_pincode,
+            'views': self.bench_views,
+        }
+        selected = [name for name in benchmarks if not only or name in only]
+        if 'incident_id' in selected:
+            selected.remove('incident_id')
+            self.bench_incident_id()
+
+        with transaction.atomic():
+            for name in selected:
+                benchmarks[name]()
+            transaction.set_rollback(True)
+        return self.results
+
+    def measure(self, name, func, setup=None):
+        """
+        Time `func` over `operations` calls per run and count its queries per
+        call. `setup` runs untimed before every call.
+        """
+        def run_once():
+            if setup:
+                setup()
+            start = time.perf_counter()
+            func()
+            return time.perf_counter() - start
+
+        run_once()
+
+        # Count through a wrapper: test client requests clear the query log
+        executed = []
+
+        def count(execute, *args):
+            executed.append(1)
+            return execute(*args)
+
+        for _ in range(self.operations):
+            if setup:
+                setup()
+            with connection.execute_wrapper(count):
+                func()
+        queries = round(len(executed) / self.operations, 2)
+
+        timings = []
+        for _ in range(self.repeat):
+            gc.collect()
+            gc.disable()
+            try:
+                timings.append(sum(run_once() for _ in range(self.operations)) / self.operations)
+            finally:
+                gc.enable()
+
+        self.results[name] = {
+            'median_ms': round(statistics.median(timings) * 1000, 4),
+            'min_ms': round(min(timings) * 1000, 4),
+            'queries': queries,
+        }
+
+    def bench_incident_id(self):
+        """
+        generate_incident_id cost at different fill levels of the yearly space
+        """
+        capacity = RandomIncidentIdAllocator.CAPACITY
+        reporter = create_reporter('benchmark_allocator')
+        try:
+            random_allocator = RandomIncidentIdAllocator()
+            filled = 0
+            for fill in sorted(self.fill_levels):
+                target = int(capacity * fill)
+                if target > filled:
+                    # Spread legacy IDs evenly over the space like random allocation would
+                    # skipping IDs the previous level's measurements allocated
+                    step = capacity / target
+                    existing = set(Incident.objects.filter(
+                        incident_id__endswith=str(BENCHMARK_YEAR)
+                    ).values_list('incident_id', flat=True))
+                    incident_ids = sorted({
+                        random_allocator.format_id(int(index * step), BENCHMARK_YEAR)
+                        for index in range(target)
+                    } - existing)
+                    create_incidents(reporter, len(incident_ids), incident_ids)
+                    filled = target
+
+                self.measure(
+                    f'incident_id.random.fill_{int(fill * 100)}',
+                    lambda: random_allocator.allocate(year=BENCHMARK_YEAR)
+                )
+
+                IncidentIdSequence.objects.update_or_create(
+                    year=BENCHMARK_YEAR, defaults={'next_value': target}
+                )
+                feistel_allocator = FeistelIncidentIdAllocator()
+                self.measure(
+                    f'incident_id.feistel.fill_{int(fill * 100)}',
+                    lambda: feistel_allocator.allocate(year=BENCHMARK_YEAR)
+                )
+        finally:
+            delete_allocator_fixtures(reporter)
+
+    def bench_serializers(self):
+        reporter = create_reporter('benchmark_serializers')
+        create_incidents(reporter, max(self.page_sizes))
+        queryset = Incident.objects.for_reporter(reporter).select_related('reporter')
+        for size in self.page_sizes:
+            instances = list(queryset[:size])
+            self.measure(
+                f'serializer.list.{size}',
+                lambda: IncidentSerializer(instances, many=True).data
+            )
+            self.measure(
+                f'serializer.detail.{size}',
+                lambda: IncidentDetailSerializer(instances, many=True).data
+            )
+
+    def bench_pincode(self):
+        PincodeData.objects.update_or_create(
+            pincode='110001', defaults={'city': 'New Delhi', 'state': 'Delhi', 'country': 'India'}
+        )
+        state = {}
+        fetcher = PincodeService(shared_cache_alias='').fetcher
+
+        def reset_service():
+            state['service'] = PincodeService(shared_cache_alias='', fetcher=fetcher)
+
+        self.measure('pincode.cold', lambda: state['service'].lookup_pincode('110001'), setup=reset_service)
+        reset_service()
+        self.measure('pincode.warm', lambda: state['service'].lookup_pincode('110001'))
+
+    def bench_views(self):
+        reporter = create_reporter('benchmark_views')
+        create_incidents(reporter, 100)
+        incident = Incident.objects.for_reporter(reporter).first()
+        client = APIClient(SERVER_NAME='localhost')
+        client.force_authenticate(user=reporter)
+
+        endpoints = {
+            'incident-list-create': (reverse('incident-list-create'), {}),
+            'incident-list-create.cursor': (reverse('incident-list-create'), {'pagination': 'cursor'}),
+            'incident-detail': (reverse('incident-detail', args=[incident.pk]), {}),
+            'incident-search': (reverse('incident-search'), {'incident_id': incident.incident_id}),
+            'incident-stats.warm': (reverse('incident-stats'), {}),
+            'pincode-lookup': (reverse('pincode-lookup', args=['110001']), {}),
+        }
+        for name, (url, params) in endpoints.items():
+            self.measure(f'view.{name}', lambda: client.get(url, params))
+
+        stats_url = reverse('incident-stats')
+        self.measure('view.incident-stats.cold', lambda: client.get(stats_url), setup=cache.clear)
+
+
+def compare_results(results, baseline, threshold):
+    """
+    Return regressions: benchmarks that got slower or run more queries per
+    operation than the baseline by more than `threshold` (a fraction)
+    """
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if result['queries'] > previous['queries'] * (1 + threshold):
+            regressions.append(f"{name}: {previous['queries']} -> {result['queries']} queries")
+        if previous['median_ms'] and result['median_ms'] > previous['median_ms'] * (1 + threshold):
+            change = result['median_ms'] / previous['median_ms'] - 1
+            regressions.append(
+                f"{name}: {previous['median_ms']:.4f} -> {result['median_ms']:.4f} ms (+{change:.0%})"
+            )
+    return regressions
+
+
+def load_baseline(path):
+    with open(path) as handle:
+        return json.load(handle)['results']
+
+
+def save_baseline(path, results):
+    with open(path, 'w') as handle:
+        json.dump({'results': results}, handle, indent=2, sort_keys=True)
@@ -0,0 +1,107 @@
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers
+from .allocators import get_incident_id_allocator
+from .models import Incident
+from .rollups import ROLLUP_FIELDS
+from .serializers import IncidentCreateSerializer
+from .signals import incidents_written
+
+
+class IncidentBulkService:
+    """
+    Service to create and close many incidents of one reporter at once.
+
+    Items are validated in a single pass, incident IDs are allocated in one
+    block and rows are written in one transaction. Every item gets its own
+    result so that callers can retry only the failed ones.
+    """
+
+    def __init__(self):
+        self.max_items = getattr(settings, 'INCIDENT_BULK_MAX_ITEMS', 500)
+
+    def check_items(self, items, name):
+        """
+        Return an error message if the payload is not a usable list
+        """
+        if not isinstance(items, list) or not items:
+            return f'{name} must be a non-empty list'
+        if len(items) > self.max_items:
+            return f'At most {self.max_items} {name} can be sent at once'
+        return None
+
+    def create(self, reporter, items, context=None):
+        """
+        Create the valid items and return one result per item in input order
+        """
+        child = IncidentCreateSerializer(context=context)
+        results = []
+        valid = []
+        for index, item in enumerate(items):
+            try:
+                valid.append((index, child.run_validation(item)))
+            except serializers.ValidationError as exc:
+                results.append({'index': index, 'status': 'invalid', 'errors': exc.detail})
+
+        incidents = []
+        if valid:
+            incident_ids = get_incident_id_allocator().allocate_many(len(valid))
+            incidents = [
+                Incident(incident_id=incident_id, reporter=reporter, **data)
+                for incident_id, (_, data) in zip(incident_ids, valid)
+            ]
+            with transaction.atomic():
+                Incident.objects.bulk_create(incidents)
+                if incidents[0].pk is None:
+                    # Backends without RETURNING (MySQL) do not set primary keys
+                    pks = dict(
+                        Incident.objects.filter(incident_id__in=incident_ids)
+                        .values_list('incident_id', 'pk')
+                    )
+                    for incident in incidents:
+                        incident.pk = pks[incident.incident_id]
+            incidents_written.send(sender=Incident, incidents=incidents, created=True)
+
+        for (index, _), incident in zip(valid, incidents):
+            results.append({
+                'index': index, 'status': 'created', 'id': incident.pk, 'incident_id': incident.incident_id
+            })
+        results.sort(key=lambda result: result['index'])
+        return results
+
+    def close(self, reporter, pks):
+        """
+        Close the reporter's incidents and return one result per distinct id
+        """
+        pks = list(dict.fromkeys(pks))
+        with transaction.atomic():
+            # Lock the rows so that concurrent closes report consistently
+            found = {
+                incident.pk: incident
+                for incident in Incident.objects.for_reporter(reporter).select_for_update()
+                .filter(pk__in=pks).only(*ROLLUP_FIELDS, 'id', 'incident_id')
+            }
+            to_close = [incident for incident in found.values() if incident.status != 'CLOSED']
+            if to_close:
+                now = timezone.now()
+                Incident.objects.filter(pk__in=[incident.pk for incident in to_close]).close(now)
+                for incident in to_close:
+                    incident.status, incident.updated_date = 'CLOSED', now
+
+        if to_close:
+            incidents_written.send(
+                sender=Incident, incidents=to_close, created=False, update_fields=['status', 'updated_date']
+            )
+
+        closing = {incident.pk for incident in to_close}
+        results = []
+        for pk in pks:
+            if pk in closing:
+                outcome = 'closed'
+            elif pk in found:
+                outcome = 'already_closed'
+            else:
+                outcome = 'not_found'
+            results.append({'id': pk, 'incident_id': getattr(found.get(pk), 'incident_id', None), 'status': outcome})
+        return results
@@ -0,0 +1,60 @@
+import hashlib
+from functools import wraps
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from rest_framework.request import Request
+from users.serializers import UserSerializer
+from .services import IncidentVersionService
+
+
+def incident_validators(request):
+    """
+    Return (ETag, Last-Modified timestamp) of the current user's incident data
+    as rendered for this request, without touching the incidents themselves.
+
+    The ETag covers the reporter's incident version (bumped by every incident
+    write or delete), the reporter fields embedded in responses, the full path
+    and the negotiated media type.
+    """
+    user = request.user
+    fingerprint = IncidentVersionService().get_fingerprint(user)
+    last_modified = fingerprint['last_modified']
+    parts = [
+        fingerprint['version'], last_modified.isoformat() if last_modified else '',
+        *(getattr(user, field) for field in UserSerializer.Meta.fields),
+        request.get_full_path(), request.accepted_renderer.media_type,
+    ]
+    etag = quote_etag(hashlib.md5('\x1f'.join(map(str, parts)).encode(), usedforsecurity=False).hexdigest())
+    return etag, int(last_modified.timestamp()) if last_modified else None
+
+
+def conditional_incident_get(view):
+    """
+    Answer GET/HEAD requests with 304 Not Modified when the client's
+    If-None-Match / If-Modified-Since still match, before the view runs.
+
+    Works on DRF function views (below @api_view) and on view methods.
+    Other methods are passed through unchanged.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        request = next(arg for arg in args if isinstance(arg, Request))
+        if request.method not in ('GET', 'HEAD'):
+            return view(*args, **kwargs)
+
+        etag, last_modified = incident_validators(request)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = view(*args, **kwargs)
+            if response.status_code != 200:
+                return response
+
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        if not response.has_header('Cache-Control'):
+            # Cache privately, but revalidate on every use
+            patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ('Authorization', 'Cookie'))
+        return response
+    return wrapper
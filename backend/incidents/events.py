@@ -0,0 +1,218 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from operator import itemgetter
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+from rest_framework import serializers
+
+# Fields sent for every event type; created events carry all EVENT_FIELDS
+EVENT_KEY_FIELDS = ('id', 'incident_id')
+EVENT_FIELDS = (
+    'id', 'incident_id', 'reporter_type', 'incident_details', 'priority', 'status',
+    'reported_date', 'updated_date',
+)
+
+_datetime_field = serializers.DateTimeField()
+
+
+def incident_event(event_type, incident, fields=None):
+    """
+    Return the (type, data) delta of an incident change.
+
+    Only the key fields and the given changed fields are included for
+    updates, so deferred fields are never loaded.
+    """
+    if event_type == 'created':
+        fields = EVENT_FIELDS
+    elif event_type == 'deleted':
+        fields = EVENT_KEY_FIELDS
+    else:
+        fields = EVENT_KEY_FIELDS + tuple(field for field in EVENT_FIELDS if field in (fields or ()))
+
+    data = {}
+    for field in fields:
+        value = getattr(incident, field)
+        if field.endswith('_date') and value is not None:
+            value = _datetime_field.to_representation(value)
+        data[field] = value
+    if 'status' in data:
+        data['is_editable'] = data['status'] != 'CLOSED'
+    return event_type, data
+
+
+class BaseEventBroker:
+    """
+    Base class for incident change event brokers.
+
+    Events are published to one channel per reporter. Every channel numbers
+    its events and keeps the most recent `buffer_size` of them, so a client
+    can resume from the last event id it saw. A client that fell further
+    behind is told to reset (reload its data).
+    """
+    def __init__(self, buffer_size=None):
+        self.buffer_size = buffer_size or getattr(settings, 'INCIDENT_EVENTS_BUFFER_SIZE', 100)
+
+    def publish(self, reporter_id, event_type, data):
+        raise NotImplementedError
+
+    def snapshot(self, reporter_id):
+        """
+        Return (last event id, buffered events) of the reporter's channel
+        """
+        raise NotImplementedError
+
+    async def asnapshot(self, reporter_id):
+        return self.snapshot(reporter_id)
+
+    def read(self, reporter_id, after_id):
+        """
+        Return (events after after_id, last event id, reset)
+        """
+        return self.select(*self.snapshot(reporter_id), after_id)
+
+    def select(self, last_id, events, after_id):
+        if after_id is None:
+            return [], last_id, False
+        if after_id > last_id:
+            # The channel was restarted
+            return [], last_id, True
+        events = sorted((event for event in events if event['id'] > after_id), key=itemgetter('id'))
+        if [event['id'] for event in events] != list(range(after_id + 1, last_id + 1)):
+            # The client missed events: they fell out of the buffer or were lost
+            return [], last_id, True
+        return events, last_id, False
+
+    async def wait(self, reporter_id, after_id, timeout):
+        """
+        Wait up to `timeout` seconds for events after after_id and return read()'s result
+        """
+        raise NotImplementedError
+
+
+class InMemoryEventBroker(BaseEventBroker):
+    """
+    Event broker that keeps channels in process memory.
+
+    Waiters are woken as soon as an event is published, from any thread.
+    Only clients connected to the same process see the events, so use it
+    for tests, development and single-process deployments.
+    """
+    def __init__(self, buffer_size=None):
+        super().__init__(buffer_size)
+        self._channels = {}
+        self._lock = threading.Lock()
+
+    def _channel(self, reporter_id):
+        channel = self._channels.get(reporter_id)
+        if channel is None:
+            channel = self._channels[reporter_id] = {
+                'last_id': 0, 'events': deque(maxlen=self.buffer_size), 'waiters': set(),
+            }
+        return channel
+
+    def publish(self, reporter_id, event_type, data):
+        with self._lock:
+            channel = self._channel(reporter_id)
+            channel['last_id'] += 1
+            event = {'id': channel['last_id'], 'type': event_type, 'data': data}
+            channel['events'].append(event)
+            waiters = list(channel['waiters'])
+        for loop, wakeup in waiters:
+            loop.call_soon_threadsafe(wakeup.set)
+        return event
+
+    def snapshot(self, reporter_id):
+        with self._lock:
+            channel = self._channel(reporter_id)
+            return channel['last_id'], list(channel['events'])
+
+    async def wait(self, reporter_id, after_id, timeout):
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            self._channel(reporter_id)['waiters'].add(waiter)
+        try:
+            # Registered before reading, so no publish can slip in between
+            events, last_id, reset = self.read(reporter_id, after_id)
+            if events or reset:
+                return events, last_id, reset
+            try:
+                await asyncio.wait_for(waiter[1].wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            return self.read(reporter_id, after_id)
+        finally:
+            with self._lock:
+                self._channel(reporter_id)['waiters'].discard(waiter)
+
+
+class CacheEventBroker(BaseEventBroker):
+    """
+    Event broker that keeps channels in the Django cache.
+
+    With a shared cache (e.g. Redis) every worker process sees every event.
+    Waiters poll the cache every INCIDENT_EVENTS_POLL_INTERVAL seconds.
+    Concurrent publishes for the same reporter from different processes
+    can overwrite each other's buffer entry. Event ids stay unique, so a lost
+    event leaves a gap and clients that have not seen it are told to reset.
+    """
+    KEY = 'incident_events:{reporter_id}'
+    SEQUENCE_KEY = 'incident_events_seq:{reporter_id}'
+
+    def __init__(self, buffer_size=None, poll_interval=None):
+        super().__init__(buffer_size)
+        self.poll_interval = poll_interval or getattr(settings, 'INCIDENT_EVENTS_POLL_INTERVAL', 0.5)
+
+    def publish(self, reporter_id, event_type, data):
+        sequence_key = self.SEQUENCE_KEY.format(reporter_id=reporter_id)
+        cache.add(sequence_key, 0, None)
+        event = {'id': cache.incr(sequence_key), 'type': event_type, 'data': data}
+        key = self.KEY.format(reporter_id=reporter_id)
+        events = cache.get(key) or []
+        events.append(event)
+        cache.set(key, events[-self.buffer_size:], None)
+        return event
+
+    def snapshot(self, reporter_id):
+        last_id = cache.get(self.SEQUENCE_KEY.format(reporter_id=reporter_id), 0)
+        return last_id, cache.get(self.KEY.format(reporter_id=reporter_id)) or []
+
+    async def asnapshot(self, reporter_id):
+        last_id = await cache.aget(self.SEQUENCE_KEY.format(reporter_id=reporter_id), 0)
+        return last_id, await cache.aget(self.KEY.format(reporter_id=reporter_id)) or []
+
+    async def wait(self, reporter_id, after_id, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            events, last_id, reset = self.select(*await self.asnapshot(reporter_id), after_id)
+            remaining = deadline - time.monotonic()
+            if events or reset or remaining <= 0:
+                return events, last_id, reset
+            await asyncio.sleep(min(self.poll_interval, remaining))
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_event_broker():
+    """
+    Return the process-wide broker configured by INCIDENT_EVENT_BROKER
+    """
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                path = getattr(settings, 'INCIDENT_EVENT_BROKER', 'incidents.events.InMemoryEventBroker')
+                _broker = import_string(path)()
+    return _broker
+
+
+def reset_event_broker():
+    """
+    Drop the process-wide broker so that it is rebuilt from settings
+    """
+    global _broker
+    _broker = None
@@ -0,0 +1,56 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from incidents.benchmarks import create_incidents, create_reporter
+from incidents.models import Incident
+from incidents.serializers import IncidentSerializer, IncidentFastSerializer
+
+
+class Command(BaseCommand):
+    help = 'Compare IncidentSerializer and IncidentFastSerializer throughput (rows/sec)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[20, 200, 2000],
+                            help='Page sizes to benchmark')
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='Timed runs per page size; the best run is reported')
+
+    def handle(self, *args, **options):
+        sizes = options['sizes']
+
+        # Work inside a transaction that is always rolled back
+        with transaction.atomic():
+            reporter = self.create_fixtures(max(sizes))
+            results = [self.benchmark(reporter, size, options['repeat']) for size in sizes]
+            transaction.set_rollback(True)
+
+        self.stdout.write(f'{"rows":>6} {"drf rows/s":>12} {"fast rows/s":>12} {"speedup":>8}')
+        for size, drf_rate, fast_rate in results:
+            self.stdout.write(
+                f'{size:>6} {drf_rate:>12,.0f} {fast_rate:>12,.0f} {fast_rate / drf_rate:>7.1f}x'
+            )
+
+    def create_fixtures(self, count):
+        reporter = create_reporter()
+        create_incidents(reporter, count)
+        return reporter
+
+    def benchmark(self, reporter, size, repeat):
+        """
+        Time serialization of already-fetched rows and return rows/sec for both paths
+        """
+        queryset = Incident.objects.for_reporter(reporter).select_related('reporter')[:size]
+        instances = list(queryset)
+        rows = list(queryset.values(*IncidentFastSerializer.values_fields))
+
+        drf_time = self.best_time(lambda: IncidentSerializer(instances, many=True).data, repeat)
+        fast_time = self.best_time(lambda: IncidentFastSerializer(rows).data, repeat)
+        return size, len(instances) / drf_time, len(rows) / fast_time
+
+    def best_time(self, func, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
@@ -0,0 +1,122 @@
+import re
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory
+from django.utils import timezone
+from rest_framework.settings import api_settings
+from incidents.pagination import IncidentCursorPagination
+from incidents.services import IncidentPrefixSearchService, IncidentStatsService
+from incidents.views import IncidentDetailView, IncidentListCreateView
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Run EXPLAIN for every incident view queryset and fail on full scans or filesorts'
+
+    # Plan fragments that indicate a full table scan or an extra sort step
+    PROBLEM_PATTERNS = {
+        'sqlite': [
+            (re.compile(r'\bSCAN\b'), 'full scan'),
+            (re.compile(r'USE TEMP B-TREE'), 'filesort'),
+        ],
+        'mysql': [
+            (re.compile(r'"access_type":\s*"ALL"'), 'full scan'),
+            (re.compile(r'"using_filesort":\s*true'), 'filesort'),
+        ],
+        'postgresql': [
+            (re.compile(r'Seq Scan'), 'full scan'),
+            (re.compile(r'Sort Key'), 'filesort'),
+        ],
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reporter', type=int, help='Reporter ID to build the querysets for')
+        parser.add_argument('--verbose-plans', action='store_true', help='Print every query plan')
+
+    def get_querysets(self, reporter_id):
+        """
+        Return the querysets issued by each incident view, built by the views,
+        the paginators and the services themselves
+        """
+        reporter = User.objects.filter(pk=reporter_id).first() or User(pk=reporter_id)
+        request = RequestFactory().get('/')
+        request.user = reporter
+        incidents = IncidentListCreateView(request=request).get_queryset()
+        detail = IncidentDetailView(request=request).get_queryset()
+        cursor = IncidentCursorPagination()
+        position = (timezone.now(), 0)
+        prefix_search = IncidentPrefixSearchService()
+        return {
+            'incident-list-create': incidents[:api_settings.PAGE_SIZE],
+            'incident-list-create.cursor': cursor.get_page_queryset(incidents, position)[:cursor.page_size + 1],
+            'incident-list-create.cursor-previous': cursor.get_page_queryset(
+                incidents, position, reverse=True
+            )[:cursor.page_size + 1],
+            # get() drops the default ordering, in the detail, search and close views
+            'incident-detail': detail.filter(pk=1).order_by(),
+            'incident-search': detail.filter(incident_id='RMG000002025').order_by(),
+            'incident-search-prefix': prefix_search.get_queryset(reporter, 'RMG12')
+            .values(*IncidentPrefixSearchService.FIELDS)[:prefix_search.max_results],
+            'incident-stats': self.capture(lambda: IncidentStatsService().compute_stats(reporter)),
+            'incident-status-filter': incidents.order_by().filter(status='OPEN'),
+            'incident-priority-filter': incidents.order_by().filter(priority='HIGH'),
+            'incident-close': detail.filter(pk=1).order_by(),
+        }
+
+    def capture(self, func):
+        """
+        Return the (sql, params) of the single query func runs, for code
+        paths that execute their query instead of returning a queryset
+        (e.g. aggregate())
+        """
+        statements = []
+
+        def record(execute, sql, params, many, context):
+            statements.append((sql, params))
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(record):
+            func()
+        return statements[-1]
+
+    def explain(self, queryset):
+        if connection.vendor == 'mysql':
+            if isinstance(queryset, tuple):
+                return self.explain_sql(*queryset, format='json')
+            return queryset.explain(format='json')
+        if isinstance(queryset, tuple):
+            return self.explain_sql(*queryset)
+        return queryset.explain()
+
+    def explain_sql(self, sql, params, format=None):
+        with connection.cursor() as cursor:
+            cursor.execute(f'{connection.ops.explain_query_prefix(format)} {sql}', params)
+            return '\n'.join(' '.join(str(column) for column in row) for row in cursor.fetchall())
+
+    def handle(self, *args, **options):
+        patterns = self.PROBLEM_PATTERNS.get(connection.vendor)
+        if patterns is None:
+            raise CommandError(f'Unsupported database vendor: {connection.vendor}')
+        
+        reporter_id = options['reporter']
+        if reporter_id is None:
+            reporter_id = User.objects.order_by('pk').values_list('pk', flat=True).first() or 1
+        
+        failures = []
+        for name, queryset in self.get_querysets(reporter_id).items():
+            plan = self.explain(queryset)
+            problems = sorted({label for pattern, label in patterns if pattern.search(plan)})
+            
+            if options['verbose_plans']:
+                self.stdout.write(f'{name}:\n{plan}\n')
+            
+            if problems:
+                failures.append(name)
+                self.stdout.write(self.style.ERROR(f'FAIL {name}: {", ".join(problems)}'))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'OK   {name}'))
+        
+        if failures:
+            raise CommandError(f'Query plan regressions in: {", ".join(failures)}')
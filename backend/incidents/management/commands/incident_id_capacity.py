@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from incidents.allocators import get_incident_id_allocator
+
+
+class Command(BaseCommand):
+    help = 'Report how much of the yearly incident ID space is left'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int, help='Year to report on (defaults to the current year)')
+
+    def handle(self, *args, **options):
+        allocator = get_incident_id_allocator()
+        year = options['year'] or allocator.current_year()
+        remaining = allocator.remaining(year)
+        used = allocator.CAPACITY - remaining
+        
+        self.stdout.write(f'Allocator: {allocator.__class__.__name__}')
+        self.stdout.write(f'Year: {year}')
+        self.stdout.write(f'Used: {used} / {allocator.CAPACITY} ({used / allocator.CAPACITY:.1%})')
+        
+        style = self.style.SUCCESS if remaining > allocator.CAPACITY // 10 else self.style.WARNING
+        self.stdout.write(style(f'Remaining: {remaining}'))
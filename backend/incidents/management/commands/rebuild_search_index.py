@@ -0,0 +1,39 @@
+import time
+from django.core.management.base import BaseCommand
+from incidents.models import Incident, IncidentSearchToken
+from incidents.search import IncidentSearchIndex
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the incident full-text search index from incident details'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000,
+                            help='Incidents indexed per batch')
+        parser.add_argument('--clear', action='store_true',
+                            help='Delete the whole index first (drops entries of deleted incidents)')
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            IncidentSearchToken.objects.all().delete()
+
+        index = IncidentSearchIndex()
+        started = time.perf_counter()
+        last_pk = 0
+        incidents = tokens = 0
+        while True:
+            # Walk the table in primary key order instead of using OFFSET
+            batch = list(
+                Incident.objects.filter(pk__gt=last_pk).order_by('pk')
+                .only('pk', 'reporter_id', 'incident_details')[:options['batch_size']]
+            )
+            if not batch:
+                break
+            tokens += index.index_many(batch)
+            incidents += len(batch)
+            last_pk = batch[-1].pk
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Indexed {incidents} incidents ({tokens} tokens) in {elapsed:.1f}s'
+        ))
@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand, CommandError
+from incidents.benchmarks import BenchmarkSuite, compare_results, load_baseline, save_baseline
+
+
+class Command(BaseCommand):
+    help = 'Run the micro-benchmark suite and compare it against a stored baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--only', nargs='+', choices=['incident_id', 'serializers', 'pincode', 'views'],
+                            help='Run only these benchmark groups')
+        parser.add_argument('--repeat', type=int, default=7,
+                            help='Timed runs per benchmark; the median is compared')
+        parser.add_argument('--operations', type=int, default=20,
+                            help='Operations per timed run')
+        parser.add_argument('--page-sizes', type=int, nargs='+', default=[20, 200],
+                            help='Page sizes for the serializer benchmarks')
+        parser.add_argument('--fill-levels', type=float, nargs='+', default=[0.0, 0.5, 0.9],
+                            help='Fractions of the yearly incident ID space filled before allocating')
+        parser.add_argument('--baseline', help='Baseline JSON file to compare against')
+        parser.add_argument('--save-baseline', help='Write the results to this JSON file')
+        parser.add_argument('--threshold', type=float, default=0.25,
+                            help='Allowed slowdown against the baseline, as a fraction')
+
+    def handle(self, *args, **options):
+        suite = BenchmarkSuite(
+            repeat=options['repeat'],
+            operations=options['operations'],
+            page_sizes=options['page_sizes'],
+            fill_levels=options['fill_levels'],
+        )
+
+        results = suite.run(only=options['only'])
+
+        baseline = load_baseline(options['baseline']) if options['baseline'] else {}
+
+        self.stdout.write(f'{"benchmark":<36} {"median ms":>10} {"min ms":>10} {"queries":>8} {"baseline":>10}')
+        for name, result in results.items():
+            previous = baseline.get(name)
+            reference = f"{previous['median_ms']:>10.4f}" if previous else f'{"-":>10}'
+            self.stdout.write(
+                f"{name:<36} {result['median_ms']:>10.4f} {result['min_ms']:>10.4f} "
+                f"{result['queries']:>8g} {reference}"
+            )
+
+        if options['save_baseline']:
+            save_baseline(options['save_baseline'], results)
+            self.stdout.write(f"Baseline written to {options['save_baseline']}")
+
+        regressions = compare_results(results, baseline, options['threshold'])
+        if regressions:
+            raise CommandError('Performance regressions:\n' + '\n'.join(regressions))
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.4 on 2026-10-18 13:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('incidents', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IncidentIdSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveIntegerField(unique=True)),
+                ('next_value', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Incident ID Sequence',
+                'verbose_name_plural': 'Incident ID Sequences',
+                'db_table': 'incident_id_sequences',
+            },
+        ),
+    ]
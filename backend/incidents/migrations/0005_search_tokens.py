@@ -0,0 +1,33 @@
+# Generated by Django 5.2.4 on 2026-10-18 13:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('incidents', '0004_reporter_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IncidentSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=64)),
+                ('frequency', models.PositiveSmallIntegerField(default=1)),
+                ('incident', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='incidents.incident')),
+                ('reporter', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Incident Search Token',
+                'verbose_name_plural': 'Incident Search Tokens',
+                'db_table': 'incident_search_tokens',
+                'indexes': [models.Index(fields=['reporter', 'token', 'incident', 'frequency'], name='search_reporter_token_idx'), models.Index(fields=['token'], name='search_token_idx')],
+                'constraints': [models.UniqueConstraint(fields=('incident', 'token'), name='incident_search_token_unique')],
+            },
+        ),
+    ]
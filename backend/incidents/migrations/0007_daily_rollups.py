@@ -0,0 +1,34 @@
+# Generated by Django 5.2.4 on 2026-10-18 13:59
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('incidents', '0006_reporter_incident_id_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IncidentDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('reporter_type', models.CharField(choices=[('ENTERPRISE', 'Enterprise'), ('GOVERNMENT', 'Government')], max_length=20)),
+                ('priority', models.CharField(choices=[('HIGH', 'High'), ('MEDIUM', 'Medium'), ('LOW', 'Low')], max_length=10)),
+                ('reported_count', models.IntegerField(default=0)),
+                ('closed_count', models.IntegerField(default=0)),
+                ('reporter', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Incident Daily Rollup',
+                'verbose_name_plural': 'Incident Daily Rollups',
+                'db_table': 'incident_daily_rollups',
+                'constraints': [models.UniqueConstraint(fields=('reporter', 'date', 'reporter_type', 'priority'), name='incident_rollup_unique')],
+            },
+        ),
+    ]
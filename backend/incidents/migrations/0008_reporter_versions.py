@@ -0,0 +1,44 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def backfill_versions(apps, schema_editor):
+    """
+    Start every reporter with incidents at version 1, changed at its latest update
+    """
+    Incident = apps.get_model('incidents', 'Incident')
+    IncidentReporterVersion = apps.get_model('incidents', 'IncidentReporterVersion')
+    rows = Incident.objects.values('reporter_id').annotate(changed_at=Max('updated_date')).order_by()
+    IncidentReporterVersion.objects.bulk_create(
+        [IncidentReporterVersion(reporter_id=row['reporter_id'], version=1, changed_at=row['changed_at']) for row in rows],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('incidents', '0007_daily_rollups'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IncidentReporterVersion',
+            fields=[
+                ('reporter', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('changed_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Incident Reporter Version',
+                'verbose_name_plural': 'Incident Reporter Versions',
+                'db_table': 'incident_reporter_versions',
+            },
+        ),
+        migrations.RunPython(backfill_versions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('incidents', '0008_reporter_versions'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='incident',
+            name='incidents_reporter_date_idx',
+        ),
+        migrations.AddIndex(
+            model_name='incident',
+            index=models.Index(fields=['reporter', '-reported_date', '-id'], name='incidents_reporter_date_idx'),
+        ),
+    ]
@@ -1,11 +1,29 @@
 from django.db import models
 from django.contrib.auth import get_user_model
-from datetime import datetime
-import random
+from django.utils import timezone
+from .allocators import get_incident_id_allocator
 
 User = get_user_model()
 
 
+class IncidentQuerySet(models.QuerySet):
+    """
+    QuerySet with the access paths used by the incident views
+    """
+    def for_reporter(self, reporter):
+        """
+        Return incidents created by the given reporter
+        """
+        return self.filter(reporter=reporter)
+    
+    def close(self, when=None):
+        """
+        Close every incident in the queryset that is not closed yet and
+        return the number of incidents closed
+        """
+        return self.exclude(status='CLOSED').update(status='CLOSED', updated_date=when or timezone.now())
+
+
 class Incident(models.Model):
     """
     Model to represent incident reports
@@ -30,7 +48,7 @@ class Incident(models.Model):
         ('GOVERNMENT', 'Government'),
     ]
     
-    # Auto-generated incident ID format: RMG + 5 random digits + current year
+    # Auto-generated incident ID format: RMG + 5 digits + current year
     incident_id = models.CharField(max_length=12, unique=True, editable=False)
     
     # Reporter information
@@ -46,6 +64,17 @@ class Incident(models.Model):
     reported_date = models.DateTimeField(auto_now_add=True)
     updated_date = models.DateTimeField(auto_now=True)
     
+    objects = IncidentQuerySet.as_manager()
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Remember the loaded values so that signal handlers can tell what a save changed
+        """
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+    
     def save(self, *args, **kwargs):
         """
         Override save method to auto-generate incident ID
@@ -56,18 +85,9 @@ class Incident(models.Model):
     
     def generate_incident_id(self):
         """
-        Generate unique incident ID in format: RMG + 5 random digits + current year
+        Generate unique incident ID in format: RMG + 5 digits + current year
         """
-        current_year = datetime.now().year
-        
-        while True:
-            # Generate 5 random digits
-            random_digits = ''.join([str(random.randint(0, 9)) for _ in range(5)])
-            incident_id = f"RMG{random_digits}{current_year}"
-            
-            # Check if this ID already exists
-            if not Incident.objects.filter(incident_id=incident_id).exists():
-                return incident_id
+        return get_incident_id_allocator().allocate()
     
     def is_editable(self):
         """
@@ -83,3 +103,99 @@ class Incident(models.Model):
         verbose_name = 'Incident'
         verbose_name_plural = 'Incidents'
         ordering = ['-reported_date']
+        indexes = [
+            models.Index(fields=['reporter', '-reported_date', '-id'], name='incidents_reporter_date_idx'),
+            models.Index(fields=['reporter', 'status'], name='incidents_reporter_status_idx'),
+            models.Index(fields=['reporter', 'priority'], name='incidents_reporter_prio_idx'),
+            models.Index(fields=['reporter', 'incident_id'], name='incidents_reporter_iid_idx'),
+        ]
+
+
+class IncidentIdSequence(models.Model):
+    """
+    Model to track the next unallocated incident ID sequence number per year
+    """
+    year = models.PositiveIntegerField(unique=True)
+    next_value = models.PositiveIntegerField(default=0)
+    
+    def __str__(self):
+        return f"{self.year}: {self.next_value}"
+    
+    class Meta:
+        db_table = 'incident_id_sequences'
+        verbose_name = 'Incident ID Sequence'
+        verbose_name_plural = 'Incident ID Sequences'
+
+
+class IncidentSearchToken(models.Model):
+    """
+    Inverted index entry: one token of an incident's details and how often it occurs
+    """
+    incident = models.ForeignKey(Incident, on_delete=models.CASCADE, related_name='search_tokens')
+    # Denormalized from the incident so that searches stay within one reporter's postings
+    reporter = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    token = models.CharField(max_length=64)
+    frequency = models.PositiveSmallIntegerField(default=1)
+    
+    def __str__(self):
+        return f"{self.token} ({self.incident_id})"
+    
+    class Meta:
+        db_table = 'incident_search_tokens'
+        verbose_name = 'Incident Search Token'
+        verbose_name_plural = 'Incident Search Tokens'
+        constraints = [
+            models.UniqueConstraint(fields=['incident', 'token'], name='incident_search_token_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['reporter', 'token', 'incident', 'frequency'], name='search_reporter_token_idx'),
+            models.Index(fields=['token'], name='search_token_idx'),
+        ]
+
+
+class IncidentReporterVersion(models.Model):
+    """
+    Per-reporter change counter and time of the last incident write or
+    delete, used for HTTP validators. Maintained by incidents.signals.
+    """
+    reporter = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='+')
+    version = models.PositiveBigIntegerField(default=0)
+    changed_at = models.DateTimeField()
+    
+    def __str__(self):
+        return f"{self.reporter_id}: v{self.version} at {self.changed_at}"
+    
+    class Meta:
+        db_table = 'incident_reporter_versions'
+        verbose_name = 'Incident Reporter Version'
+        verbose_name_plural = 'Incident Reporter Versions'
+
+
+class IncidentDailyRollup(models.Model):
+    """
+    Daily incident counts per reporter, reporter type and priority.
+
+    reported_count counts incidents reported on the date (by their current
+    reporter type and priority); closed_count counts incidents closed on the
+    date. Maintained incrementally by incidents.rollups.
+    """
+    date = models.DateField()
+    reporter = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    reporter_type = models.CharField(max_length=20, choices=Incident.REPORTER_TYPE_CHOICES)
+    priority = models.CharField(max_length=10, choices=Incident.PRIORITY_CHOICES)
+    reported_count = models.IntegerField(default=0)
+    closed_count = models.IntegerField(default=0)
+    
+    def __str__(self):
+        return f"{self.date} {self.reporter_type}/{self.priority}: {self.reported_count} reported, {self.closed_count} closed"
+    
+    class Meta:
+        db_table = 'incident_daily_rollups'
+        verbose_name = 'Incident Daily Rollup'
+        verbose_name_plural = 'Incident Daily Rollups'
+        constraints = [
+            # Also the index for per-reporter date range reads
+            models.UniqueConstraint(
+                fields=['reporter', 'date', 'reporter_type', 'priority'], name='incident_rollup_unique'
+            ),
+        ]
@@ -0,0 +1,144 @@
+import base64
+import json
+from datetime import datetime
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param, remove_query_param
+
+
+class IncidentCursorPagination(BasePagination):
+    """
+    Keyset pagination over (reported_date, id) for the incident list.
+
+    Pages are fetched with a range condition on the composite ordering key
+    instead of OFFSET, no total count is computed, and rows inserted while a
+    client is paging never shift the pages it has not read yet.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    mode_query_param = 'pagination'
+    page_size = 20
+    max_page_size = 100
+    invalid_cursor_message = 'Invalid cursor'
+
+    @classmethod
+    def is_requested(cls, request):
+        """
+        Check if the client asked for cursor pagination
+        """
+        return (
+            request.query_params.get(cls.mode_query_param) == 'cursor'
+            or cls.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request)
+
+        queryset = self.get_page_queryset(queryset, position, reverse)
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+
+        if reverse:
+            rows.reverse()
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+
+        self.page = rows
+        return rows
+
+    def get_page_queryset(self, queryset, position=None, reverse=False):
+        """
+        Order the queryset by the cursor key and start it after the given position
+        """
+        if reverse:
+            queryset = queryset.order_by('reported_date', 'id')
+            if position:
+                queryset = queryset.filter(
+                    Q(reported_date__gt=position[0]) |
+                    Q(reported_date=position[0], id__gt=position[1])
+                )
+        else:
+            queryset = queryset.order_by('-reported_date', '-id')
+            if position:
+                queryset = queryset.filter(
+                    Q(reported_date__lt=position[0]) |
+                    Q(reported_date=position[0], id__lt=position[1])
+                )
+        return queryset
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_position(self, row):
+        """
+        Return the (reported_date, id) ordering key of a row
+        """
+        if isinstance(row, dict):
+            return row['reported_date'], row['id']
+        return row.reported_date, row.id
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            position = (datetime.fromisoformat(data['d']), int(data['i']))
+            reverse = bool(data.get('r'))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+        return position, reverse
+
+    def encode_cursor(self, position, reverse=False):
+        data = {'d': position[0].isoformat(), 'i': position[1]}
+        if reverse:
+            data['r'] = 1
+        encoded = base64.urlsafe_b64encode(json.dumps(data).encode('ascii')).decode('ascii')
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.get_position(self.page[-1]))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.encode_cursor(self.get_position(self.page[0]), reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
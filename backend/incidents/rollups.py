@@ -0,0 +1,169 @@
+from collections import Counter
+from datetime import datetime, time
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from .models import Incident, IncidentDailyRollup
+
+# Incident attributes (attnames) that decide an incident's rollup rows
+ROLLUP_FIELDS = ('reporter_id', 'reporter_type', 'priority', 'reported_date', 'status', 'updated_date')
+
+
+class IncidentRollupService:
+    """
+    Service to maintain and read the incident_daily_rollups table.
+
+    Every incident adds one to reported_count on the day it was reported and,
+    once closed, one to closed_count on the day it was closed (closed
+    incidents are read-only, so that is their updated_date). A write applies
+    the difference between the incident's rows before and after it, so the
+    table always matches what rebuild() would produce.
+    """
+    GROUP_BY = ('priority', 'reporter_type')
+
+    def state(self, values):
+        """
+        Return the rollup-relevant state of an incident from a {attname: value}
+        mapping, or None if a field is missing
+        """
+        if any(field not in values for field in ROLLUP_FIELDS):
+            return None
+        return {
+            'reporter_id': values['reporter_id'],
+            'reporter_type': values['reporter_type'],
+            'priority': values['priority'],
+            'reported_on': timezone.localdate(values['reported_date']),
+            'closed_on': timezone.localdate(values['updated_date']) if values['status'] == 'CLOSED' else None,
+        }
+
+    def state_of(self, incident):
+        return self.state({field: getattr(incident, field) for field in ROLLUP_FIELDS})
+
+    def contributions(self, state):
+        """
+        Return a Counter of (metric, reporter_id, date, reporter_type, priority) -> count
+        """
+        counts = Counter()
+        if state is None:
+            return counts
+        bucket = (state['reporter_id'], state['reporter_type'], state['priority'])
+        counts[('reported_count', bucket[0], state['reported_on'], *bucket[1:])] += 1
+        if state['closed_on'] is not None:
+            counts[('closed_count', bucket[0], state['closed_on'], *bucket[1:])] += 1
+        return counts
+
+    def remember(self, incident):
+        """
+        Record the incident's current values as its loaded values, so that a
+        later save of the same instance is diffed against them
+        """
+        loaded = getattr(incident, '_loaded_values', None)
+        if loaded is None:
+            loaded = incident._loaded_values = {}
+        loaded.update((field, getattr(incident, field)) for field in ROLLUP_FIELDS)
+
+    def record_saved(self, incident, created):
+        """
+        Apply a create or save() of one incident. Saves of instances whose
+        previous values are unknown (not loaded from the database) are skipped.
+        """
+        delta = self.contributions(self.state_of(incident))
+        if not created:
+            previous = self.state(getattr(incident, '_loaded_values', None) or {})
+            if previous is None:
+                return
+            delta.subtract(self.contributions(previous))
+        self.apply(delta)
+        self.remember(incident)
+
+    def record_written(self, incidents, created, previous=None):
+        """
+        Apply incidents written in bulk. Updated incidents were open before the
+        write (closed ones are never updated); `previous` holds their changed
+        values from before the write, parallel to incidents.
+        """
+        delta = Counter()
+        for index, incident in enumerate(incidents):
+            delta.update(self.contributions(self.state_of(incident)))
+            if not created:
+                before = {field: getattr(incident, field) for field in ROLLUP_FIELDS}
+                before.update(previous[index] if previous else {})
+                before['status'] = 'OPEN'
+                delta.subtract(self.contributions(self.state(before)))
+            self.remember(incident)
+        self.apply(delta)
+
+    def record_deleted(self, incident):
+        delta = Counter()
+        delta.subtract(self.contributions(self.state_of(incident)))
+        self.apply(delta)
+
+    def apply(self, delta):
+        """
+        Add the non-zero counts of a contributions delta to the table
+        """
+        rows = {}
+        for (metric, *key), count in delta.items():
+            if count:
+                rows.setdefault(tuple(key), {})[metric] = count
+
+        for (reporter_id, date, reporter_type, priority), counts in rows.items():
+            key = {'reporter_id': reporter_id, 'date': date, 'reporter_type': reporter_type, 'priority': priority}
+            changes = {metric: F(metric) + count for metric, count in counts.items()}
+            if IncidentDailyRollup.objects.filter(**key).update(**changes):
+                continue
+            try:
+                with transaction.atomic():
+                    IncidentDailyRollup.objects.create(**key, **counts)
+            except IntegrityError:
+                # Another request created the row in the meantime
+                IncidentDailyRollup.objects.filter(**key).update(**changes)
+
+    def rebuild(self, since=None, batch_size=1000):
+        """
+        Recompute the table from the incidents table, only for dates from
+        `since` on if given, and return the number of rows written
+        """
+        reported = Incident.objects.annotate(day=TruncDate('reported_date'))
+        closed = Incident.objects.filter(status='CLOSED').annotate(day=TruncDate('updated_date'))
+        existing = IncidentDailyRollup.objects.all()
+        if since is not None:
+            start = timezone.make_aware(datetime.combine(since, time.min))
+            reported = reported.filter(reported_date__gte=start)
+            closed = closed.filter(updated_date__gte=start)
+            existing = existing.filter(date__gte=since)
+
+        rows = {}
+        for metric, queryset in (('reported_count', reported), ('closed_count', closed)):
+            grouped = queryset.values('reporter_id', 'day', 'reporter_type', 'priority').annotate(count=Count('id'))
+            for row in grouped.order_by():
+                key = (row['reporter_id'], row['day'], row['reporter_type'], row['priority'])
+                rows.setdefault(key, {'reported_count': 0, 'closed_count': 0})[metric] = row['count']
+
+        with transaction.atomic():
+            existing.delete()
+            IncidentDailyRollup.objects.bulk_create(
+                [
+                    IncidentDailyRollup(
+                        reporter_id=reporter_id, date=date, reporter_type=reporter_type, priority=priority, **counts
+                    )
+                    for (reporter_id, date, reporter_type, priority), counts in rows.items()
+                ],
+                batch_size=batch_size,
+            )
+        return len(rows)
+
+    def daily_series(self, reporter, start, end, group_by=None):
+        """
+        Return {'date', [group_by], 'reported', 'closed'} rows of the
+        reporter's rollups between start and end (inclusive), in date order
+        """
+        fields = ['date'] + ([group_by] if group_by else [])
+        return (
+            IncidentDailyRollup.objects.filter(reporter=reporter, date__gte=start, date__lte=end)
+            .exclude(reported_count=0, closed_count=0)
+            .values(*fields)
+            .annotate(reported=Sum('reported_count'), closed=Sum('closed_count'))
+            .order_by(*fields)
+        )
@@ -0,0 +1,108 @@
+import math
+import re
+from collections import Counter
+from django.db import transaction
+from django.db.models import Case, Count, F, FloatField, Sum, Value, When
+from .models import IncidentSearchToken
+from .services import IncidentStatsService
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+STOP_WORDS = frozenset("""
+a an and are as at be but by for from has have in is it its of on or that the
+there this to was were will with
+""".split())
+
+
+def tokenize(text):
+    """
+    Split text into lower-case index terms, dropping stop words and single characters
+    """
+    return [
+        token[:64] for token in TOKEN_PATTERN.findall((text or '').lower())
+        if len(token) > 1 and token not in STOP_WORDS
+    ]
+
+
+class IncidentSearchIndex:
+    """
+    Inverted index over incident details kept in the incident_search_tokens
+    side table.
+
+    Every (incident, token) pair is stored with the token's frequency and the
+    incident's reporter, so a search only reads the reporter's postings for
+    the query terms. Results are ranked by TF-IDF.
+    """
+    MAX_TERMS = 10
+
+    def index(self, incident):
+        """
+        Replace the index entries of one incident
+        """
+        self.index_many([incident])
+
+    def index_many(self, incidents, replace=True):
+        """
+        Replace the index entries of many incidents in bulk; pass
+        replace=False for incidents that have never been indexed
+        """
+        incidents = list(incidents)
+        tokens = [
+            IncidentSearchToken(
+                incident_id=incident.pk, reporter_id=incident.reporter_id,
+                token=token, frequency=min(frequency, 32767)
+            )
+            for incident in incidents
+            for token, frequency in Counter(tokenize(incident.incident_details)).items()
+        ]
+        with transaction.atomic():
+            if replace:
+                IncidentSearchToken.objects.filter(incident_id__in=[incident.pk for incident in incidents]).delete()
+            IncidentSearchToken.objects.bulk_create(tokens, batch_size=1000)
+        return len(tokens)
+
+    def query_terms(self, query):
+        """
+        Return the distinct terms of a search query, capped at MAX_TERMS
+        """
+        return list(dict.fromkeys(tokenize(query)))[:self.MAX_TERMS]
+
+    def search(self, reporter, query, match_all=True):
+        """
+        Return a queryset of {'incident_id', 'matched', 'score'} rows for the
+        reporter's incidents, best match first
+        """
+        terms = self.query_terms(query)
+        postings = IncidentSearchToken.objects.filter(reporter=reporter, token__in=terms)
+        document_frequency = dict(
+            postings.values('token').annotate(df=Count('id')).values_list('token', 'df')
+        )
+        if not terms or (match_all and len(document_frequency) < len(terms)):
+            return IncidentSearchToken.objects.none().values('incident_id')
+
+        total = IncidentStatsService().get_stats(reporter)['total_incidents']
+        weights = [
+            When(token=term, then=F('frequency') * Value(math.log((total + 1) / (df + 1)) + 1))
+            for term, df in document_frequency.items()
+        ]
+        ranked = postings.values('incident_id').annotate(
+            matched=Count('id'),
+            score=Sum(Case(*weights, output_field=FloatField())),
+        )
+        if match_all:
+            return ranked.filter(matched=len(terms)).order_by('-score', '-incident_id')
+        return ranked.order_by('-matched', '-score', '-incident_id')
+
+    def matching_incidents(self, query):
+        """
+        Return incident ids containing every query term across all reporters,
+        or None if the query has no indexable terms
+        """
+        terms = self.query_terms(query)
+        if not terms:
+            return None
+        return (
+            IncidentSearchToken.objects.filter(token__in=terms)
+            .values('incident_id').annotate(matched=Count('id'))
+            .filter(matched=len(terms)).values('incident_id')
+        )
@@ -0,0 +1,185 @@
+import re
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+from .models import Incident, IncidentReporterVersion
+
+
+class IncidentStatsService:
+    """
+    Service to compute and cache per-reporter incident statistics.
+
+    Entries are cached under a per-reporter generation that is read before
+    computing and bumped on every change, so statistics computed while a
+    write lands are stored under a generation that is no longer read.
+    """
+    CACHE_KEY = 'incident_stats:{reporter_id}:{generation}'
+    GENERATION_KEY = 'incident_stats_generation:{reporter_id}'
+
+    # Response key -> (model field, value) for every counted bucket
+    BUCKETS = {
+        'open_incidents': ('status', 'OPEN'),
+        'in_progress_incidents': ('status', 'IN_PROGRESS'),
+        'closed_incidents': ('status', 'CLOSED'),
+        'high_priority': ('priority', 'HIGH'),
+        'medium_priority': ('priority', 'MEDIUM'),
+        'low_priority': ('priority', 'LOW'),
+    }
+
+    def __init__(self):
+        self.timeout = getattr(settings, 'INCIDENT_STATS_CACHE_TIMEOUT', 300)
+
+    def get_stats(self, reporter):
+        """
+        Return cached statistics for the reporter, computing them on a miss
+        """
+        key = self.cache_key(reporter.pk)
+        stats = cache.get(key)
+        if stats is None:
+            stats = self.compute_stats(reporter)
+            cache.set(key, stats, self.timeout)
+        return stats
+
+    def compute_stats(self, reporter):
+        """
+        Compute all status and priority buckets in a single aggregate query
+        """
+        return Incident.objects.for_reporter(reporter).aggregate(**self.aggregates())
+
+    def aggregates(self):
+        """
+        Return the aggregate expressions for every statistics bucket
+        """
+        aggregates = {'total_incidents': Count('id')}
+        for name, (field, value) in self.BUCKETS.items():
+            aggregates[name] = Count('id', filter=Q(**{field: value}))
+        return aggregates
+
+    @classmethod
+    def cache_key(cls, reporter_id):
+        return cls.CACHE_KEY.format(reporter_id=reporter_id, generation=cls.generation(reporter_id))
+
+    @classmethod
+    def generation(cls, reporter_id):
+        # Start from the clock so an evicted generation never repeats an old one
+        return cache.get_or_set(cls.GENERATION_KEY.format(reporter_id=reporter_id), time.time_ns, None)
+
+    @classmethod
+    def invalidate(cls, reporter_id):
+        """
+        Make the cached statistics of a reporter unreachable
+        """
+        key = cls.GENERATION_KEY.format(reporter_id=reporter_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
+
+
+class IncidentVersionService:
+    """
+    Service to read and bump the per-reporter incident version used for
+    HTTP validators.
+
+    Every incident write or delete bumps the reporter's row in
+    incident_reporter_versions, so a validator check is one primary key
+    lookup and is current in every process.
+    """
+
+    def get_fingerprint(self, reporter):
+        """
+        Return the reporter's {'version', 'last_modified'}, where last_modified
+        is the time of the latest incident write or delete (None if none)
+        """
+        row = IncidentReporterVersion.objects.filter(reporter_id=reporter.pk).values('version', 'changed_at').first()
+        if row is None:
+            return {'version': 0, 'last_modified': None}
+        return {'version': row['version'], 'last_modified': row['changed_at']}
+
+    @classmethod
+    def touch(cls, reporter_ids):
+        """
+        Bump the version of every given reporter
+        """
+        now = timezone.now()
+        changes = {'version': F('version') + 1, 'changed_at': now}
+        for reporter_id in reporter_ids:
+            if IncidentReporterVersion.objects.filter(reporter_id=reporter_id).update(**changes):
+                continue
+            try:
+                with transaction.atomic():
+                    IncidentReporterVersion.objects.create(reporter_id=reporter_id, version=1, changed_at=now)
+            except IntegrityError:
+                # Another request created the row in the meantime
+                IncidentReporterVersion.objects.filter(reporter_id=reporter_id).update(**changes)
+
+
+class IncidentPrefixSearchService:
+    """
+    Service to answer incident ID typeahead queries for a reporter.
+
+    A prefix becomes a LIKE with a constant leading part, which the
+    (reporter, incident_id) index range-scans under any collation. Results
+    are cached under a per-reporter generation that is bumped whenever one of
+    the reporter's incidents changes, so stale entries are never read.
+    """
+    CACHE_KEY = 'incident_prefix:{reporter_id}:{generation}:{limit}:{prefix}'
+    GENERATION_KEY = 'incident_prefix_generation:{reporter_id}'
+    FIELDS = ('id', 'incident_id', 'priority', 'status')
+    PREFIX_PATTERN = re.compile(r'^[A-Z0-9]{1,12}$')
+
+    def __init__(self):
+        self.timeout = getattr(settings, 'INCIDENT_PREFIX_CACHE_TIMEOUT', 300)
+        self.max_results = getattr(settings, 'INCIDENT_PREFIX_MAX_RESULTS', 20)
+
+    def normalize(self, prefix):
+        """
+        Return the upper-cased prefix, or None if it cannot start an incident ID
+        """
+        prefix = (prefix or '').strip().upper()
+        return prefix if self.PREFIX_PATTERN.match(prefix) else None
+
+    def get_matches(self, reporter, prefix, limit):
+        """
+        Return up to `limit` of the reporter's incidents whose ID starts with prefix
+        """
+        limit = max(1, min(limit, self.max_results))
+        key = self.CACHE_KEY.format(
+            reporter_id=reporter.pk, generation=self.generation(reporter.pk), limit=limit, prefix=prefix
+        )
+        matches = cache.get(key)
+        if matches is None:
+            matches = list(self.get_queryset(reporter, prefix).values(*self.FIELDS)[:limit])
+            cache.set(key, matches, self.timeout)
+        return matches
+
+    def get_queryset(self, reporter, prefix):
+        """
+        Return the reporter's incidents whose ID starts with prefix, in ID order
+        """
+        # Prefixes are upper-cased, so a case-insensitive LIKE matches exactly;
+        # a computed upper bound would depend on the column's collation order
+        return (
+            Incident.objects.for_reporter(reporter)
+            .filter(incident_id__istartswith=prefix)
+            .order_by('incident_id')
+        )
+
+    @classmethod
+    def generation(cls, reporter_id):
+        # Start from the clock so an evicted generation never repeats an old one
+        return cache.get_or_set(cls.GENERATION_KEY.format(reporter_id=reporter_id), time.time_ns, None)
+
+    @classmethod
+    def invalidate(cls, reporter_id):
+        """
+        Make every cached typeahead result of a reporter unreachable
+        """
+        key = cls.GENERATION_KEY.format(reporter_id=reporter_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
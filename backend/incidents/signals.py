@@ -0,0 +1,133 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import Signal, receiver
+from .events import get_event_broker, incident_event
+from .models import Incident
+from .rollups import IncidentRollupService
+from .search import IncidentSearchIndex
+from .services import IncidentPrefixSearchService, IncidentStatsService, IncidentVersionService
+
+# Sent after incidents are written in bulk, where post_save is not sent.
+# Arguments: incidents (the written instances), created (bool),
+# update_fields (the changed fields for updates, None for creates) and
+# optionally previous (per incident, the changed fields' values before an
+# update).
+incidents_written = Signal()
+
+
+@receiver(post_save, sender=Incident)
+def incident_saved(sender, instance, update_fields=None, **kwargs):
+    """
+    Invalidate the reporter's cached statistics and typeahead results after a
+    create or update, bump its incident version and reindex the incident's
+    details if they may have changed
+    """
+    IncidentStatsService.invalidate(instance.reporter_id)
+    IncidentPrefixSearchService.invalidate(instance.reporter_id)
+    IncidentVersionService.touch([instance.reporter_id])
+    if update_fields is None or {'incident_details', 'reporter'} & set(update_fields):
+        IncidentSearchIndex().index(instance)
+
+
+@receiver(post_delete, sender=Incident)
+def incident_deleted(sender, instance, **kwargs):
+    """
+    Invalidate the reporter's cached statistics and typeahead results and bump
+    its incident version after a delete
+    """
+    IncidentStatsService.invalidate(instance.reporter_id)
+    IncidentPrefixSearchService.invalidate(instance.reporter_id)
+    IncidentVersionService.touch([instance.reporter_id])
+
+
+@receiver(incidents_written, sender=Incident)
+def incidents_bulk_written(sender, incidents, created, update_fields=None, **kwargs):
+    """
+    Invalidate cached statistics and typeahead results of every affected
+    reporter, bump their incident versions and index the details of new incidents
+    """
+    reporter_ids = {incident.reporter_id for incident in incidents}
+    for reporter_id in reporter_ids:
+        IncidentStatsService.invalidate(reporter_id)
+        IncidentPrefixSearchService.invalidate(reporter_id)
+    IncidentVersionService.touch(sorted(reporter_ids))
+    if created or (update_fields and 'incident_details' in update_fields):
+        IncidentSearchIndex().index_many(incidents, replace=not created)
+
+
+@receiver(post_save, sender=Incident)
+def rollup_incident_saved(sender, instance, created, **kwargs):
+    """
+    Apply a saved incident to the daily rollups
+    """
+    IncidentRollupService().record_saved(instance, created)
+
+
+@receiver(post_delete, sender=Incident)
+def rollup_incident_deleted(sender, instance, **kwargs):
+    """
+    Remove a deleted incident from the daily rollups
+    """
+    IncidentRollupService().record_deleted(instance)
+
+
+@receiver(incidents_written, sender=Incident)
+def rollup_incidents_written(sender, incidents, created, previous=None, **kwargs):
+    """
+    Apply incidents written in bulk to the daily rollups
+    """
+    IncidentRollupService().record_written(incidents, created, previous)
+
+
+def publish_after_commit(reporter_id, events):
+    """
+    Publish change events to the reporter's channel once the transaction commits
+    """
+    def publish():
+        broker = get_event_broker()
+        for event_type, data in events:
+            broker.publish(reporter_id, event_type, data)
+    transaction.on_commit(publish)
+
+
+def change_event_type(incident, update_fields):
+    if update_fields and 'status' in update_fields and incident.status == 'CLOSED':
+        return 'closed'
+    return 'updated'
+
+
+@receiver(post_save, sender=Incident)
+def publish_incident_saved(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Publish a created/updated/closed event for a saved incident
+    """
+    if created:
+        event = incident_event('created', instance)
+    else:
+        fields = update_fields or [field.attname for field in instance._meta.concrete_fields]
+        event = incident_event(change_event_type(instance, update_fields), instance, fields)
+    publish_after_commit(instance.reporter_id, [event])
+
+
+@receiver(post_delete, sender=Incident)
+def publish_incident_deleted(sender, instance, **kwargs):
+    """
+    Publish a deleted event for a deleted incident
+    """
+    publish_after_commit(instance.reporter_id, [incident_event('deleted', instance)])
+
+
+@receiver(incidents_written, sender=Incident)
+def publish_incidents_written(sender, incidents, created, update_fields=None, **kwargs):
+    """
+    Publish one event per incident written in bulk
+    """
+    by_reporter = {}
+    for incident in incidents:
+        if created:
+            event = incident_event('created', incident)
+        else:
+            event = incident_event(change_event_type(incident, update_fields), incident, update_fields)
+        by_reporter.setdefault(incident.reporter_id, []).append(event)
+    for reporter_id, events in by_reporter.items():
+        publish_after_commit(reporter_id, events)
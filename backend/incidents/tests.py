@@ -1,3 +1,1098 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone as dt_timezone
+from contextlib import contextmanager
+from io import StringIO
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, transaction
+from django.contrib.admin.sites import site
+from django.test import AsyncClient, RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.http import parse_http_date
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from incident_management.diagnostics import JsonFormatter, QueryDiagnostics
+from incident_management.metrics import reset_request_metrics
+from incident_management.middleware import RequestProfile
+from users.activity import reset_activity_tracker
+from .benchmarks import compare_results
+from .events import CacheEventBroker, InMemoryEventBroker, get_event_broker, reset_event_broker
+from .allocators import (
+    FeistelIncidentIdAllocator, IncidentIdSpaceExhausted,
+    SequenceIncidentIdAllocator, reset_incident_id_allocator
+)
+from .models import Incident, IncidentDailyRollup, IncidentIdSequence, IncidentSearchToken
+from .pagination import IncidentCursorPagination
+from .search import tokenize
+from .services import IncidentPrefixSearchService, IncidentStatsService, IncidentVersionService
+from .serializers import IncidentSerializer, IncidentFastSerializer
 
-# Create your tests here.
+User = get_user_model()
+
+
+class IncidentTestCase(TestCase):
+    """
+    Base test case with an authenticated reporter
+    """
+    def setUp(self):
+        cache.clear()
+        reset_incident_id_allocator()
+        reset_event_broker()
+        self.addCleanup(reset_activity_tracker)
+        self.user = User.objects.create_user(
+            username='reporter', email='reporter@example.com',
+            password='testpass123', first_name='Test', last_name='Reporter'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def create_incident(self, user=None, **kwargs):
+        data = {
+            'reporter': user or self.user,
+            'reporter_type': 'ENTERPRISE',
+            'incident_details': 'Server downtime in production',
+            'priority': 'MEDIUM',
+        }
+        data.update(kwargs)
+        return Incident.objects.create(**data)
+
+    @contextmanager
+    def assertMaxQueries(self, maximum):
+        """
+        Assert that the wrapped block runs at most `maximum` queries
+        """
+        with CaptureQueriesContext(connection) as queries:
+            yield queries
+        executed = len(queries)
+        if executed > maximum:
+            statements = '\n'.join(query['sql'] for query in queries.captured_queries)
+            self.fail(f'{executed} queries executed, at most {maximum} expected:\n{statements}')
+
+
+class IncidentStatsTests(IncidentTestCase):
+    """
+    Tests for the aggregated incident statistics endpoint
+    """
+    def setUp(self):
+        super().setUp()
+        self.create_incident(priority='HIGH')
+        self.create_incident(priority='LOW', status='IN_PROGRESS')
+        self.create_incident(priority='HIGH', status='CLOSED')
+        other = User.objects.create_user(
+            username='other', email='other@example.com', password='testpass123'
+        )
+        self.create_incident(user=other, priority='HIGH')
+
+    def test_stats_shape_and_values(self):
+        response = self.client.get(reverse('incident-stats'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {
+            'total_incidents': 3,
+            'open_incidents': 1,
+            'in_progress_incidents': 1,
+            'closed_incidents': 1,
+            'high_priority': 2,
+            'medium_priority': 0,
+            'low_priority': 1,
+        })
+
+    def test_stats_use_one_query_then_cache(self):
+        with self.assertNumQueries(1):
+            self.client.get(reverse('incident-stats'))
+        with self.assertNumQueries(0):
+            self.client.get(reverse('incident-stats'))
+
+    def test_stats_invalidated_on_save(self):
+        self.client.get(reverse('incident-stats'))
+        self.create_incident(priority='MEDIUM')
+        response = self.client.get(reverse('incident-stats'))
+        self.assertEqual(response.data['total_incidents'], 4)
+        self.assertEqual(response.data['medium_priority'], 1)
+
+    def test_write_during_compute_is_not_hidden_by_the_cache(self):
+        service = IncidentStatsService()
+        compute_stats = service.compute_stats
+
+        def compute_then_write(reporter):
+            stats = compute_stats(reporter)
+            self.create_incident(priority='MEDIUM')
+            return stats
+
+        with mock.patch.object(service, 'compute_stats', side_effect=compute_then_write):
+            self.assertEqual(service.get_stats(self.user)['total_incidents'], 3)
+        self.assertEqual(service.get_stats(self.user)['total_incidents'], 4)
+
+    def test_stats_invalidated_on_close_and_delete(self):
+        incident = Incident.objects.get(reporter=self.user, status='OPEN')
+        self.client.get(reverse('incident-stats'))
+
+        self.client.post(reverse('incident-close', args=[incident.pk]))
+        response = self.client.get(reverse('incident-stats'))
+        self.assertEqual(response.data['open_incidents'], 0)
+        self.assertEqual(response.data['closed_incidents'], 2)
+
+        self.client.delete(reverse('incident-detail', args=[incident.pk]))
+        response = self.client.get(reverse('incident-stats'))
+        self.assertEqual(response.data['total_incidents'], 2)
+        self.assertEqual(response.data['closed_incidents'], 1)
+
+
+class IncidentIdAllocatorTests(IncidentTestCase):
+    """
+    Tests for the sequence-backed incident ID allocators
+    """
+    def test_ids_use_existing_format(self):
+        incident = self.create_incident()
+        self.assertRegex(incident.incident_id, r'^RMG\d{5}\d{4}$')
+
+    def test_block_lease_avoids_per_id_queries(self):
+        allocator = FeistelIncidentIdAllocator(block_size=10)
+        with self.captureOnCommitCallbacks(execute=True):
+            allocator.allocate(year=2030)
+        with self.assertNumQueries(0):
+            for _ in range(9):
+                allocator.allocate(year=2030)
+
+    def test_feistel_ids_are_unique(self):
+        allocator = FeistelIncidentIdAllocator(block_size=500)
+        ids = allocator.allocate_many(2000, year=2030)
+        self.assertEqual(len(set(ids)), 2000)
+        self.assertNotEqual(ids[:10], sorted(ids[:10]))
+
+    def test_feistel_permutation_is_bijective(self):
+        allocator = FeistelIncidentIdAllocator()
+        values = {allocator.permute(n, 2030) for n in range(allocator.CAPACITY)}
+        self.assertEqual(len(values), allocator.CAPACITY)
+
+    def test_existing_ids_are_skipped(self):
+        allocator = SequenceIncidentIdAllocator(block_size=5)
+        self.create_incident(incident_id='RMG000002030')
+        ids = allocator.allocate_many(5, year=2030)
+        self.assertNotIn('RMG000002030', ids)
+        self.assertEqual(len(set(ids)), 5)
+
+    def test_remaining_capacity(self):
+        allocator = SequenceIncidentIdAllocator(block_size=25)
+        self.assertEqual(allocator.remaining(2030), allocator.CAPACITY)
+        with self.captureOnCommitCallbacks(execute=True):
+            allocator.allocate(year=2030)
+        self.assertEqual(allocator.remaining(2030), allocator.CAPACITY - 1)
+
+    def test_rolled_back_lease_is_not_reused(self):
+        allocator = SequenceIncidentIdAllocator(block_size=25)
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                first = allocator.allocate(year=2030)
+                raise RuntimeError
+        self.assertEqual(allocator.remaining(2030), allocator.CAPACITY)
+        # The sequence was rolled back, so the range is leased again rather
+        # than also being handed out from memory
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(allocator.allocate(year=2030), first)
+        self.assertEqual(allocator.remaining(2030), allocator.CAPACITY - 1)
+
+    def test_block_is_reused_within_a_transaction(self):
+        allocator = SequenceIncidentIdAllocator(block_size=10)
+        first = allocator.allocate(year=2030)
+        with self.assertNumQueries(0):
+            ids = [allocator.allocate(year=2030) for _ in range(9)]
+        self.assertEqual(len({first, *ids}), 10)
+        self.assertEqual(allocator.remaining(2030), allocator.CAPACITY - 10)
+
+    def test_exhausted_year_raises(self):
+        allocator = SequenceIncidentIdAllocator()
+        IncidentIdSequence.objects.create(year=2030, next_value=allocator.CAPACITY)
+        with self.assertRaises(IncidentIdSpaceExhausted):
+            allocator.allocate(year=2030)
+
+
+class QueryPlanTests(IncidentTestCase):
+    """
+    Tests for the check_query_plans management command
+    """
+    def test_view_querysets_use_indexes(self):
+        out = StringIO()
+        call_command('check_query_plans', reporter=self.user.pk, stdout=out)
+        self.assertNotIn('FAIL', out.getvalue())
+
+    def test_querysets_are_the_views_own(self):
+        from incidents.management.commands.check_query_plans import Command
+
+        querysets = Command().get_querysets(self.user.pk)
+        self.assertEqual(querysets['incident-list-create'].query.select_related, {'reporter': {}})
+        self.assertEqual(querysets['incident-list-create.cursor'].query.order_by, ('-reported_date', '-id'))
+        # Stats are explained as the aggregate query the service runs
+        sql, _ = querysets['incident-stats']
+        self.assertIn('COUNT(', sql)
+        self.assertNotIn('GROUP BY', sql)
+
+    def test_full_scan_is_reported(self):
+        from incidents.management.commands.check_query_plans import Command
+
+        querysets = {'unindexed': Incident.objects.order_by('incident_details')}
+        with mock.patch.object(Command, 'get_querysets', return_value=querysets):
+            with self.assertRaises(CommandError):
+                call_command('check_query_plans', stdout=StringIO())
+
+
+class IncidentCursorPaginationTests(IncidentTestCase):
+    """
+    Tests for keyset pagination of the incident list
+    """
+    def setUp(self):
+        super().setUp()
+        self.incidents = [self.create_incident() for _ in range(5)]
+        self.url = reverse('incident-list-create')
+
+    def get_ids(self, response):
+        return [item['id'] for item in response.data['results']]
+
+    def test_pages_follow_reported_date_then_id(self):
+        expected = [incident.pk for incident in sorted(
+            self.incidents, key=lambda i: (i.reported_date, i.pk), reverse=True
+        )]
+        first = self.client.get(self.url, {'pagination': 'cursor', 'page_size': 2})
+        self.assertNotIn('count', first.data)
+        self.assertIsNone(first.data['previous'])
+        second = self.client.get(first.data['next'])
+        third = self.client.get(second.data['next'])
+        self.assertEqual(self.get_ids(first) + self.get_ids(second) + self.get_ids(third), expected)
+        self.assertIsNone(third.data['next'])
+
+        back = self.client.get(third.data['previous'])
+        self.assertEqual(self.get_ids(back), self.get_ids(second))
+
+    def test_pages_are_stable_under_inserts(self):
+        first = self.client.get(self.url, {'pagination': 'cursor', 'page_size': 2})
+        self.create_incident()
+        second = self.client.get(first.data['next'])
+        self.assertTrue(set(self.get_ids(second)).isdisjoint(self.get_ids(first)))
+        self.assertEqual(len(self.get_ids(second)), 2)
+
+    def test_cursor_mode_skips_count_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url, {'pagination': 'cursor', 'page_size': 2})
+        self.assertFalse(any('COUNT(' in query['sql'] for query in queries))
+
+    def test_cursor_pages_are_index_range_scans(self):
+        from incidents.management.commands.check_query_plans import Command
+
+        paginator = IncidentCursorPagination()
+        incidents = Incident.objects.for_reporter(self.user)
+        position = paginator.get_position(self.incidents[2])
+        for reverse in (False, True):
+            queryset = paginator.get_page_queryset(incidents, position, reverse)
+            plan = Command().explain(queryset[:3])
+            for pattern, label in Command.PROBLEM_PATTERNS[connection.vendor]:
+                self.assertIsNone(pattern.search(plan), f'{label} in {plan}')
+
+    def test_invalid_cursor_returns_404(self):
+        response = self.client.get(self.url, {IncidentCursorPagination.cursor_query_param: 'garbage'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_default_pagination_is_unchanged(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['count'], 5)
+
+
+class IncidentQueryCountTests(IncidentTestCase):
+    """
+    Tests that incident endpoints run a bounded number of queries
+    """
+    def list_queries(self, params=None):
+        # The validator version, the count and the page
+        with self.assertMaxQueries(3) as queries:
+            response = self.client.get(reverse('incident-list-create'), params or {})
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_list_page_cost_is_independent_of_size(self):
+        self.create_incident()
+        small = self.list_queries()
+        for _ in range(19):
+            self.create_incident()
+        self.assertEqual(self.list_queries(), small)
+        self.assertEqual(self.list_queries({'pagination': 'cursor'}), 2)
+
+    def test_detail_search_and_close_queries(self):
+        incident = self.create_incident()
+        with self.assertMaxQueries(2):
+            self.client.get(reverse('incident-detail', args=[incident.pk]))
+        with self.assertMaxQueries(2):
+            self.client.get(reverse('incident-search'), {'incident_id': incident.incident_id})
+        # Moving priority also moves the daily rollup count (the new row may need
+        # an INSERT); every write also bumps the reporter's incident version
+        with self.assertMaxQueries(8):
+            response = self.client.patch(
+                reverse('incident-detail', args=[incident.pk]), {'priority': 'HIGH'}, format='json'
+            )
+        self.assertEqual(response.data['priority'], 'HIGH')
+        with self.assertMaxQueries(4) as queries:
+            self.client.post(reverse('incident-close', args=[incident.pk]))
+        update = next(query['sql'] for query in queries.captured_queries if query['sql'].startswith('UPDATE'))
+        self.assertNotIn('incident_details', update)
+
+
+class IncidentFastSerializerTests(IncidentTestCase):
+    """
+    Tests for the read-only fast incident serializer
+    """
+    def setUp(self):
+        super().setUp()
+        self.create_incident(priority='HIGH')
+        self.create_incident(status='CLOSED', incident_details='Closed one')
+
+    def test_matches_incident_serializer(self):
+        queryset = Incident.objects.for_reporter(self.user).select_related('reporter')
+        expected = IncidentSerializer(queryset, many=True).data
+        rows = queryset.values(*IncidentFastSerializer.values_fields)
+        self.assertEqual(IncidentFastSerializer(rows).data, [dict(item) for item in expected])
+
+    def test_list_endpoint_fast_mode(self):
+        url = reverse('incident-list-create')
+        regular = self.client.get(url)
+        fast = self.client.get(url, {'fast': 'true'})
+        self.assertEqual(fast.data['count'], regular.data['count'])
+        self.assertEqual(fast.data['results'], [dict(item) for item in regular.data['results']])
+
+        cursor = self.client.get(url, {'fast': 'true', 'pagination': 'cursor', 'page_size': 1})
+        following = self.client.get(cursor.data['next'])
+        self.assertEqual(following.data['results'][0]['id'], regular.data['results'][1]['id'])
+
+
+class BenchmarkSuiteTests(IncidentTestCase):
+    """
+    Tests for the micro-benchmark suite and regression checks
+    """
+    def test_compare_results_flags_slowdowns_and_extra_queries(self):
+        baseline = {
+            'a': {'median_ms': 1.0, 'min_ms': 0.9, 'queries': 1},
+            'b': {'median_ms': 1.0, 'min_ms': 0.9, 'queries': 1},
+            'c': {'median_ms': 1.0, 'min_ms': 0.9, 'queries': 1},
+        }
+        results = {
+            'a': {'median_ms': 1.2, 'min_ms': 1.0, 'queries': 1},
+            'b': {'median_ms': 1.5, 'min_ms': 1.4, 'queries': 1},
+            'c': {'median_ms': 1.0, 'min_ms': 0.9, 'queries': 2},
+            'new': {'median_ms': 9.0, 'min_ms': 9.0, 'queries': 9},
+        }
+        regressions = compare_results(results, baseline, threshold=0.25)
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(regressions[0].startswith('b:'))
+        self.assertTrue(regressions[1].startswith('c:'))
+
+    def test_run_benchmarks_saves_and_checks_baseline(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'baseline.json')
+            options = {'only': ['serializers', 'views'], 'repeat': 1, 'operations': 1,
+                       'page_sizes': [5], 'stdout': StringIO()}
+            call_command('run_benchmarks', save_baseline=path, **options)
+            with open(path) as handle:
+                results = json.load(handle)['results']
+            self.assertEqual(results['view.incident-stats.warm']['queries'], 0)
+            # The validator version and the incident
+            self.assertEqual(results['view.incident-detail']['queries'], 2)
+
+            # Fixtures are rolled back
+            self.assertFalse(Incident.objects.exclude(reporter=self.user).exists())
+
+            for result in results.values():
+                result['median_ms'] = 1000
+            results['view.incident-detail']['queries'] = 0
+            with open(path, 'w') as handle:
+                json.dump({'results': results}, handle)
+            with self.assertRaisesMessage(CommandError, 'view.incident-detail'):
+                call_command('run_benchmarks', baseline=path, **options)
+
+    def test_allocator_benchmark_removes_its_fixtures(self):
+        call_command('run_benchmarks', only=['incident_id'], repeat=1, operations=2,
+                     fill_levels=[0.0, 0.001], stdout=StringIO())
+        self.assertFalse(Incident.objects.filter(incident_id__endswith='2099').exists())
+        self.assertFalse(IncidentIdSequence.objects.filter(year=2099).exists())
+        self.assertFalse(User.objects.filter(username='benchmark_allocator').exists())
+
+
+class IncidentSearchTests(IncidentTestCase):
+    """
+    Tests for the full-text incident search index
+    """
+    def search(self, query, **params):
+        return self.client.get(reverse('incident-search'), {'q': query, **params})
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize('The DB-01 server is DOWN, a 2nd time!'), ['db', '01', 'server', 'down', '2nd', 'time'])
+
+    def test_ranked_search_scoped_to_reporter(self):
+        strong = self.create_incident(incident_details='Database down. Database replica also down.')
+        weak = self.create_incident(incident_details='Primary database unreachable, network down')
+        self.create_incident(incident_details='Email delays')
+        other = User.objects.create_user(username='other', email='other@example.com', password='x')
+        self.create_incident(user=other, incident_details='Database down')
+
+        response = self.search('database down')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual([item['id'] for item in response.data['results']], [strong.pk, weak.pk])
+        self.assertGreater(response.data['results'][0]['score'], response.data['results'][1]['score'])
+
+        self.assertEqual(self.search('database email').data['count'], 0)
+        self.assertEqual(self.search('database email', match='any').data['count'], 3)
+        self.assertEqual(self.search('the of').data['count'], 0)
+
+    def test_index_follows_saves_and_deletes(self):
+        incident = self.create_incident(incident_details='Printer jam')
+        self.assertEqual(self.search('printer').data['count'], 1)
+
+        incident.incident_details = 'Scanner offline'
+        incident.save()
+        self.assertEqual(self.search('printer').data['count'], 0)
+        self.assertEqual(self.search('scanner').data['count'], 1)
+
+        incident.delete()
+        self.assertFalse(IncidentSearchToken.objects.exists())
+
+    def test_search_queries_are_bounded(self):
+        for number in range(30):
+            self.create_incident(incident_details=f'Disk failure on node {number}')
+        with self.assertMaxQueries(6):
+            response = self.search('disk failure')
+        self.assertEqual(response.data['count'], 30)
+        self.assertEqual(len(response.data['results']), 20)
+
+    def test_rebuild_search_index(self):
+        incident = self.create_incident(incident_details='Router reboot loop')
+        IncidentSearchToken.objects.all().delete()
+        call_command('rebuild_search_index', clear=True, stdout=StringIO())
+        self.assertEqual(
+            set(IncidentSearchToken.objects.values_list('token', flat=True)), {'router', 'reboot', 'loop'}
+        )
+        self.assertEqual(self.search('router').data['results'][0]['id'], incident.pk)
+
+    def test_admin_search_uses_token_index(self):
+        match = self.create_incident(incident_details='Cooling fan failure')
+        self.create_incident(incident_details='Fan replaced')
+        admin = site._registry[Incident]
+        request = RequestFactory().get('/')
+        results, _ = admin.get_search_results(request, Incident.objects.all(), 'fan failure')
+        self.assertEqual(list(results), [match])
+
+
+class IncidentPrefixSearchTests(IncidentTestCase):
+    """
+    Tests for incident ID typeahead (search mode=prefix)
+    """
+    def typeahead(self, prefix, **params):
+        return self.client.get(reverse('incident-search'), {'incident_id': prefix, 'mode': 'prefix', **params})
+
+    def test_prefix_matches_are_scoped_ordered_and_limited(self):
+        for incident_id in ['RMG123452025', 'RMG123012025', 'RMG124002025', 'RMG123992024']:
+            self.create_incident(incident_id=incident_id)
+        other = User.objects.create_user(username='other', email='other@example.com', password='x')
+        self.create_incident(user=other, incident_id='RMG123002025')
+
+        response = self.typeahead('rmg123')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['prefix'], 'RMG123')
+        self.assertEqual(
+            [item['incident_id'] for item in response.data['results']],
+            ['RMG123012025', 'RMG123452025', 'RMG123992024'],
+        )
+        self.assertIn('max-age=10', response['Cache-Control'])
+        self.assertIn('private', response['Cache-Control'])
+
+        self.assertEqual(len(self.typeahead('RMG12', limit=2).data['results']), 2)
+        self.assertEqual(self.typeahead('RMG9').data['results'], [])
+        self.assertEqual(self.typeahead('RMG-1').status_code, 400)
+        self.assertEqual(self.typeahead('RMG', limit='x').status_code, 400)
+
+    def test_prefixes_ending_in_9_or_z_match(self):
+        for incident_id in ['RMG129012025', 'RMG130002025', 'RMGZ00012025', 'RMH000012025']:
+            self.create_incident(incident_id=incident_id)
+        self.assertEqual(
+            [item['incident_id'] for item in self.typeahead('RMG129').data['results']], ['RMG129012025']
+        )
+        self.assertEqual(
+            [item['incident_id'] for item in self.typeahead('RMGZ').data['results']], ['RMGZ00012025']
+        )
+        # No bound is computed from the prefix, so collation order cannot empty the range
+        sql = str(IncidentPrefixSearchService().get_queryset(self.user, 'RMG129').query)
+        self.assertIn('LIKE', sql)
+        self.assertNotIn('<', sql)
+
+    def test_results_are_cached_until_an_incident_changes(self):
+        incident = self.create_incident(incident_id='RMG555552025')
+        self.typeahead('RMG5')
+        # Only the validator version lookup runs
+        with self.assertMaxQueries(1):
+            self.assertEqual(self.typeahead('RMG5').data['results'][0]['status'], 'OPEN')
+
+        self.client.post(reverse('incident-close', args=[incident.pk]))
+        self.assertEqual(self.typeahead('RMG5').data['results'][0]['status'], 'CLOSED')
+
+        self.create_incident(incident_id='RMG555562025')
+        self.assertEqual(len(self.typeahead('RMG5').data['results']), 2)
+
+    def test_generation_survives_eviction(self):
+        self.create_incident(incident_id='RMG777772025')
+        self.typeahead('RMG7')
+        # An update without signals is only visible once the cached page is unreachable
+        Incident.objects.filter(incident_id='RMG777772025').update(status='CLOSED')
+        cache.delete(IncidentPrefixSearchService.GENERATION_KEY.format(reporter_id=self.user.pk))
+        self.assertEqual(self.typeahead('RMG7').data['results'][0]['status'], 'CLOSED')
+
+
+class IncidentBulkTests(IncidentTestCase):
+    """
+    Tests for the bulk create and bulk close endpoints
+    """
+    def bulk_create(self, payload):
+        return self.client.post(reverse('incident-bulk-create'), payload, format='json')
+
+    def bulk_close(self, payload):
+        return self.client.post(reverse('incident-bulk-close'), payload, format='json')
+
+    def item(self, **kwargs):
+        return {'reporter_type': 'ENTERPRISE', 'incident_details': 'Burst incident', 'priority': 'HIGH', **kwargs}
+
+    def test_bulk_create_reports_per_item_results(self):
+        self.client.get(reverse('incident-stats'))
+        response = self.bulk_create({'incidents': [
+            self.item(incident_details='Printer on fire'),
+            self.item(priority='URGENT'),
+            self.item(),
+        ]})
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual((response.data['succeeded'], response.data['failed']), (2, 1))
+        results = response.data['results']
+        self.assertEqual([result['status'] for result in results], ['created', 'invalid', 'created'])
+        self.assertIn('priority', results[1]['errors'])
+
+        incident = Incident.objects.get(pk=results[0]['id'])
+        self.assertEqual(incident.incident_id, results[0]['incident_id'])
+        self.assertEqual(incident.reporter, self.user)
+        self.assertEqual(self.client.get(reverse('incident-stats')).data['total_incidents'], 2)
+        self.assertEqual(self.client.get(reverse('incident-search'), {'q': 'printer'}).data['count'], 1)
+
+    def test_bulk_create_status_codes_and_limits(self):
+        self.assertEqual(self.bulk_create([self.item(), self.item()]).status_code, 201)
+        self.assertEqual(self.bulk_create([self.item(reporter_type='NOBODY')]).status_code, 400)
+        self.assertEqual(self.bulk_create({'incidents': []}).status_code, 400)
+        with self.settings(INCIDENT_BULK_MAX_ITEMS=2):
+            self.assertEqual(self.bulk_create([self.item()] * 3).status_code, 400)
+        self.assertEqual(Incident.objects.count(), 2)
+
+    @override_settings(INCIDENT_ID_BLOCK_SIZE=1)
+    def test_bulk_create_query_count_is_constant(self):
+        # With single-ID blocks every request leases exactly one block
+        reset_incident_id_allocator()
+        self.bulk_create([self.item()])
+        with CaptureQueriesContext(connection) as few:
+            self.bulk_create([self.item(incident_details=f'Item {n}') for n in range(10)])
+        with CaptureQueriesContext(connection) as many:
+            response = self.bulk_create([self.item(incident_details=f'Item {n}') for n in range(100)])
+        self.assertEqual(len(many), len(few))
+        self.assertEqual(response.data['succeeded'], 100)
+        self.assertEqual(Incident.objects.values('incident_id').distinct().count(), 111)
+
+    def test_bulk_close(self):
+        open_incident = self.create_incident()
+        closed_incident = self.create_incident(status='CLOSED')
+        other = User.objects.create_user(username='other', email='other@example.com', password='x')
+        foreign = self.create_incident(user=other)
+
+        response = self.bulk_close({'ids': [open_incident.pk, closed_incident.pk, foreign.pk, open_incident.pk]})
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(
+            [(result['id'], result['status']) for result in response.data['results']],
+            [(open_incident.pk, 'closed'), (closed_incident.pk, 'already_closed'), (foreign.pk, 'not_found')],
+        )
+        open_incident.refresh_from_db()
+        foreign.refresh_from_db()
+        self.assertEqual(open_incident.status, 'CLOSED')
+        self.assertGreater(open_incident.updated_date, open_incident.reported_date)
+        self.assertEqual(foreign.status, 'OPEN')
+        self.assertEqual(self.client.get(reverse('incident-stats')).data['closed_incidents'], 2)
+
+        self.assertEqual(self.bulk_close([open_incident.pk]).status_code, 400)
+        self.assertEqual(self.bulk_close({'ids': ['1']}).status_code, 400)
+        self.assertEqual(self.bulk_close([foreign.pk]).data['results'][0]['status'], 'not_found')
+
+
+class IncidentConcurrencyTests(TransactionTestCase):
+    """
+    Tests that parallel close/update requests cannot both succeed
+    """
+    def setUp(self):
+        cache.clear()
+        reset_incident_id_allocator()
+        self.user = User.objects.create_user(
+            username='reporter', email='reporter@example.com', password='testpass123'
+        )
+        self.incident = Incident.objects.create(
+            reporter=self.user, reporter_type='ENTERPRISE', incident_details='Race', priority='LOW'
+        )
+
+    def run_parallel(self, requests):
+        """
+        Fire the requests from separate threads at the same moment and return the status codes
+        """
+        barrier = threading.Barrier(len(requests))
+
+        def send(request):
+            client = APIClient()
+            client.force_authenticate(user=self.user)
+            barrier.wait()
+            try:
+                return request(client).status_code
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=len(requests)) as executor:
+            return list(executor.map(send, requests))
+
+    def test_parallel_closes_succeed_once(self):
+        url = reverse('incident-close', args=[self.incident.pk])
+        codes = self.run_parallel([lambda client: client.post(url)] * 8)
+        self.assertEqual(sorted(codes), [200] + [400] * 7)
+        self.incident.refresh_from_db()
+        self.assertEqual(self.incident.status, 'CLOSED')
+
+    def test_updates_racing_a_close_never_modify_a_closed_incident(self):
+        close_url = reverse('incident-close', args=[self.incident.pk])
+        detail_url = reverse('incident-detail', args=[self.incident.pk])
+        update = lambda client: client.patch(detail_url, {'priority': 'HIGH'}, format='json')
+        codes = self.run_parallel([lambda client: client.post(close_url)] + [update] * 7)
+        self.assertEqual(codes[0], 200)
+
+        self.incident.refresh_from_db()
+        self.assertEqual(self.incident.status, 'CLOSED')
+        if self.incident.priority == 'HIGH':
+            # An update that won the race must have been applied before the close
+            self.assertIn(200, codes[1:])
+        else:
+            self.assertNotIn(200, codes[1:])
+
+
+class IncidentEventBrokerTests(TestCase):
+    """
+    Tests for the incident change event brokers
+    """
+    def setUp(self):
+        cache.clear()
+
+    def check_broker(self, broker):
+        self.assertEqual(broker.read(1, 0), ([], 0, False))
+        for number in range(5):
+            broker.publish(1, 'created', {'id': number})
+        broker.publish(2, 'created', {'id': 99})
+
+        events, last_id, reset = broker.read(1, 3)
+        self.assertEqual(([event['id'] for event in events], last_id, reset), ([4, 5], 5, False))
+        # Events 1 and 2 fell out of the 3-event buffer
+        self.assertEqual(broker.read(1, 1), ([], 5, True))
+        self.assertEqual(broker.read(1, 2)[2], False)
+        self.assertEqual(broker.read(1, 8), ([], 5, True))
+        self.assertEqual(broker.read(2, 0)[0][0]['data'], {'id': 99})
+
+        async def wait_for_publish():
+            loop = asyncio.get_running_loop()
+            loop.call_later(0.05, lambda: threading.Thread(
+                target=broker.publish, args=(1, 'closed', {'id': 6})
+            ).start())
+            return await broker.wait(1, 5, timeout=5)
+
+        events, last_id, reset = asyncio.run(wait_for_publish())
+        self.assertEqual([event['type'] for event in events], ['closed'])
+        self.assertEqual(asyncio.run(broker.wait(1, 6, timeout=0.05)), ([], 6, False))
+
+    def test_in_memory_broker(self):
+        self.check_broker(InMemoryEventBroker(buffer_size=3))
+
+    def test_cache_broker(self):
+        self.check_broker(CacheEventBroker(buffer_size=3, poll_interval=0.01))
+
+    def test_cache_broker_resets_clients_behind_a_lost_event(self):
+        broker = CacheEventBroker(buffer_size=10)
+        for number in range(4):
+            broker.publish(1, 'created', {'id': number})
+        key = CacheEventBroker.KEY.format(reporter_id=1)
+        events = cache.get(key)
+        # Event 3 was overwritten by a concurrent publish, event 2 was written last
+        cache.set(key, [events[0], events[3], events[1]], None)
+
+        self.assertEqual(broker.read(1, 1), ([], 4, True))
+        self.assertEqual(broker.read(1, 3)[0], [events[3]])
+        cache.set(key, [events[0], events[2], events[1], events[3]], None)
+        self.assertEqual([event['id'] for event in broker.read(1, 1)[0]], [2, 3, 4])
+
+
+class IncidentEventStreamTests(IncidentTestCase):
+    """
+    Tests for the incident change event endpoint
+    """
+    def setUp(self):
+        super().setUp()
+        self.token = Token.objects.create(user=self.user)
+        self.url = reverse('incident-events')
+
+    def poll(self, **params):
+        return self.client.get(self.url, {'timeout': 0, **params}, HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_long_poll_returns_deltas(self):
+        self.assertEqual(self.client.get(self.url, {'token': 'nope'}).status_code, 401)
+        start = self.poll().json()['last_id']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            incident = self.create_incident(incident_details='Fan failure')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(reverse('incident-detail', args=[incident.pk]), {'priority': 'HIGH'}, format='json')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('incident-close', args=[incident.pk]))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_incident(user=User.objects.create_user(username='other', email='o@example.com'))
+
+        body = self.poll(after=start).json()
+        self.assertEqual([event['type'] for event in body['events']], ['created', 'updated', 'closed'])
+        created, updated, closed = [event['data'] for event in body['events']]
+        self.assertEqual(created['incident_details'], 'Fan failure')
+        self.assertEqual(updated['priority'], 'HIGH')
+        self.assertNotIn('incident_details', updated)
+        self.assertEqual((closed['status'], closed['is_editable']), ('CLOSED', False))
+        self.assertEqual(body['last_id'], body['events'][-1]['id'])
+        self.assertEqual(self.poll(after=body['last_id']).json()['events'], [])
+
+    def test_bulk_writes_and_deletes_publish_events(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('incident-bulk-create'), [
+                {'reporter_type': 'ENTERPRISE', 'incident_details': f'Item {n}', 'priority': 'LOW'}
+                for n in range(3)
+            ], format='json')
+        ids = [result['id'] for result in response.data['results']]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('incident-bulk-close'), ids[:2], format='json')
+        with self.captureOnCommitCallbacks(execute=True):
+            Incident.objects.get(pk=ids[2]).delete()
+
+        events = self.poll(after=0).json()['events']
+        self.assertEqual([event['type'] for event in events], ['created'] * 3 + ['closed'] * 2 + ['deleted'])
+        self.assertEqual(events[-1]['data'], {'id': ids[2], 'incident_id': response.data['results'][2]['incident_id']})
+
+    @override_settings(INCIDENT_EVENTS_BUFFER_SIZE=2)
+    def test_lagging_client_is_told_to_reset(self):
+        reset_event_broker()
+        for number in range(4):
+            get_event_broker().publish(self.user.pk, 'created', {'id': number})
+        body = self.poll(after=1).json()
+        self.assertEqual((body['events'], body['reset'], body['last_id']), ([], True, 4))
+
+    @override_settings(INCIDENT_EVENTS_STREAM_TIMEOUT=5, INCIDENT_EVENTS_HEARTBEAT=1)
+    async def test_server_sent_events(self):
+        broker = get_event_broker()
+        broker.publish(self.user.pk, 'created', {'id': 1})
+        client = AsyncClient()
+        response = await client.get(
+            self.url, {'token': self.token.key},
+            headers={'Accept': 'text/event-stream', 'Last-Event-ID': '0'},
+        )
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = response.streaming_content
+        try:
+            self.assertEqual(await anext(stream), b'retry: 1000\n\n')
+            self.assertEqual(await anext(stream), b'id: 1\nevent: created\ndata: {"id": 1}\n\n')
+            broker.publish(self.user.pk, 'closed', {'id': 1})
+            self.assertEqual(await anext(stream), b'id: 2\nevent: closed\ndata: {"id": 1}\n\n')
+            self.assertEqual(await anext(stream), b': keepalive\n\n')
+        finally:
+            await stream.aclose()
+
+
+class IncidentRollupTests(IncidentTestCase):
+    """
+    Tests for the daily incident rollups and the analytics endpoint
+    """
+    url = reverse('incident-analytics')
+
+    def rollups(self):
+        return set(
+            IncidentDailyRollup.objects.exclude(reported_count=0, closed_count=0)
+            .values_list('reporter_id', 'date', 'reporter_type', 'priority', 'reported_count', 'closed_count')
+        )
+
+    def assertMatchesRebuild(self):
+        incremental = self.rollups()
+        call_command('rebuild_incident_rollups', stdout=StringIO())
+        self.assertEqual(incremental, self.rollups())
+
+    def test_writes_keep_rollups_in_sync(self):
+        first = self.create_incident(priority='HIGH')
+        second = self.create_incident(priority='LOW')
+        self.create_incident(priority='LOW', reporter_type='GOVERNMENT')
+        self.client.post(reverse('incident-bulk-create'), {'incidents': [
+            {'reporter_type': 'ENTERPRISE', 'incident_details': 'Bulk', 'priority': 'HIGH'},
+        ] * 3}, format='json')
+        self.assertMatchesRebuild()
+
+        self.client.patch(reverse('incident-detail', args=[first.pk]), {'priority': 'LOW'}, format='json')
+        self.client.post(reverse('incident-close', args=[second.pk]))
+        bulk = Incident.objects.filter(incident_details='Bulk').values_list('pk', flat=True)
+        self.client.post(reverse('incident-bulk-close'), {'ids': list(bulk[:2])}, format='json')
+        self.assertMatchesRebuild()
+
+        # Plain saves (e.g. from the admin) are diffed against the loaded values
+        incident = Incident.objects.get(pk=first.pk)
+        incident.reporter_type = 'GOVERNMENT'
+        incident.save()
+        incident.status = 'CLOSED'
+        incident.save()
+        Incident.objects.get(pk=bulk[2]).delete()
+        self.assertMatchesRebuild()
+
+        today = IncidentDailyRollup.objects.filter(reporter=self.user)
+        self.assertEqual(sum(today.values_list('reported_count', flat=True)), 5)
+        self.assertEqual(sum(today.values_list('closed_count', flat=True)), 4)
+
+    def test_closes_count_on_the_closing_day(self):
+        incident = self.create_incident()
+        last_week = datetime.now(dt_timezone.utc) - timedelta(days=7)
+        Incident.objects.filter(pk=incident.pk).update(reported_date=last_week)
+        call_command('rebuild_incident_rollups', stdout=StringIO())
+
+        self.client.post(reverse('incident-close', args=[incident.pk]))
+        rows = {row[1]: row[4:] for row in self.rollups()}
+        self.assertEqual(rows, {last_week.date(): (1, 0), datetime.now(dt_timezone.utc).date(): (0, 1)})
+
+    def test_rebuild_since_keeps_older_days(self):
+        incident = self.create_incident()
+        old = datetime(2020, 1, 1, tzinfo=dt_timezone.utc)
+        Incident.objects.filter(pk=incident.pk).update(reported_date=old)
+        call_command('rebuild_incident_rollups', stdout=StringIO())
+        Incident.objects.filter(pk=incident.pk).delete()
+        call_command('rebuild_incident_rollups', since='2021-01-01', stdout=StringIO())
+        self.assertEqual(IncidentDailyRollup.objects.get().date, old.date())
+        with self.assertRaises(CommandError):
+            call_command('rebuild_incident_rollups', since='yesterday', stdout=StringIO())
+
+    def test_analytics_endpoint(self):
+        for priority in ('HIGH', 'HIGH', 'LOW'):
+            self.create_incident(priority=priority)
+        other = User.objects.create_user(username='other', email='other@example.com', password='x')
+        self.create_incident(user=other)
+        Incident.objects.filter(priority='LOW').update(reported_date=datetime(2024, 1, 2, tzinfo=dt_timezone.utc))
+        Incident.objects.filter(priority='HIGH').update(reported_date=datetime(2024, 1, 1, tzinfo=dt_timezone.utc))
+        call_command('rebuild_incident_rollups', stdout=StringIO())
+
+        with self.assertMaxQueries(1):
+            response = self.client.get(self.url, {'start': '2024-01-01', 'end': '2024-01-31', 'group_by': 'priority'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['totals'], {'reported': 3, 'closed': 0})
+        self.assertEqual(
+            [(str(row['date']), row['priority'], row['reported']) for row in response.data['series']],
+            [('2024-01-01', 'HIGH', 2), ('2024-01-02', 'LOW', 1)]
+        )
+
+        response = self.client.get(self.url, {'start': '2024-01-02', 'end': '2024-01-02'})
+        self.assertEqual(response.data['series'], [{'date': datetime(2024, 1, 2).date(), 'reported': 1, 'closed': 0}])
+
+    def test_analytics_rejects_bad_parameters(self):
+        for params in (
+            {'start': 'yesterday'},
+            {'start': '2024-02-01', 'end': '2024-01-01'},
+            {'start': '2020-01-01', 'end': '2024-01-01'},
+            {'group_by': 'status'},
+        ):
+            self.assertEqual(self.client.get(self.url, params).status_code, 400, params)
+
+
+class RequestProfilingTests(IncidentTestCase):
+    """
+    Tests for the request profiling middleware and the metrics endpoint
+    """
+    def setUp(self):
+        super().setUp()
+        reset_request_metrics()
+
+    def sample(self, metrics, name, **labels):
+        prefix = name + '{' + ','.join(f'{key}="{value}"' for key, value in labels.items())
+        for line in metrics.splitlines():
+            if line.startswith(prefix):
+                return float(line.rsplit(' ', 1)[1])
+        return None
+
+    def test_records_per_view_metrics(self):
+        self.create_incident()
+        self.client.get(reverse('incident-list-create'))
+        self.client.get(reverse('incident-list-create'))
+        self.client.get(reverse('incident-stats'))
+        self.client.get('/api/incidents/missing/')
+
+        with self.settings(METRICS_ALLOWED_IPS=['127.0.0.1']):
+            metrics = self.client.get(reverse('metrics')).content.decode()
+        list_labels = {'view': 'incident-list-create', 'method': 'GET'}
+        self.assertEqual(self.sample(metrics, 'http_requests_total', **list_labels, status='200'), 2)
+        self.assertEqual(self.sample(metrics, 'http_request_duration_seconds_count', **list_labels), 2)
+        self.assertEqual(self.sample(metrics, 'http_request_db_queries_sum', **list_labels), 6)
+        self.assertEqual(self.sample(metrics, 'http_request_db_queries_bucket', **list_labels, le='+Inf'), 2)
+        self.assertEqual(self.sample(metrics, 'http_request_db_queries_count', view='incident-stats', method='GET'), 1)
+        self.assertEqual(self.sample(metrics, 'http_requests_total', view='unresolved', method='GET', status='404'), 1)
+
+    def test_counts_duplicate_queries(self):
+        profile = RequestProfile()
+        execute = mock.Mock(return_value='rows')
+        for sql, params in (('SELECT %s', (1,)), ('SELECT %s', (2,)), ('SELECT %s', (1,)), ('SELECT %s', (1,))):
+            self.assertEqual(profile(execute, sql, params, False, {}), 'rows')
+        self.assertEqual((profile.queries, profile.duplicates), (4, 2))
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('incident-stats'))
+        self.assertNotIn('Server-Timing', response)
+        with self.settings(REQUEST_PROFILING_SERVER_TIMING=True):
+            response = self.client.get(reverse('incident-stats'))
+        self.assertRegex(response['Server-Timing'], r'^total;dur=[\d.]+, db;dur=[\d.]+;desc="\d+ queries, 0 duplicates"$')
+
+    def test_metrics_endpoint_is_closed_by_default(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 404)
+        with self.settings(METRICS_ALLOWED_IPS=['127.0.0.1']):
+            self.assertEqual(self.client.get(reverse('metrics'), REMOTE_ADDR='203.0.113.9').status_code, 404)
+            response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_token(self):
+        url = reverse('metrics')
+        self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION='Bearer wrong').status_code, 404)
+        self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION='Bearer secret').status_code, 200)
+
+
+class QueryDiagnosticsTests(IncidentTestCase):
+    """
+    Tests for slow and repeated query detection
+    """
+    def test_repeated_queries_are_attributed_to_the_caller(self):
+        incidents = [self.create_incident() for _ in range(4)]
+        diagnostics = QueryDiagnostics(slow_ms=10000, repeat_threshold=3)
+        profile = RequestProfile(diagnostics)
+        with connection.execute_wrapper(profile):
+            for incident in incidents:
+                Incident.objects.get(pk=incident.pk)
+            Incident.objects.count()
+
+        [finding] = diagnostics.findings()
+        self.assertEqual(finding['kind'], 'repeated')
+        self.assertEqual(finding['count'], 4)
+        self.assertEqual(finding['frame']['file'], os.path.join('incidents', 'tests.py'))
+        self.assertEqual(finding['frame']['function'], 'test_repeated_queries_are_attributed_to_the_caller')
+
+    @override_settings(QUERY_DIAGNOSTICS=True, QUERY_DIAGNOSTICS_SLOW_MS=0)
+    def test_middleware_logs_findings(self):
+        incident = self.create_incident()
+        with self.assertLogs('incident_management.diagnostics', 'WARNING') as logs:
+            self.client.patch(reverse('incident-detail', args=[incident.pk]), {'priority': 'LOW'}, format='json')
+
+        findings = [record.finding for record in logs.records]
+        self.assertTrue(all(finding['kind'] == 'slow' for finding in findings))
+        update = next(finding for finding in findings if finding['sql'].startswith('UPDATE "incidents"'))
+        self.assertEqual(update['view'], 'incident-detail')
+        self.assertEqual(update['method'], 'PATCH')
+        self.assertEqual(update['frame']['file'], os.path.join('incidents', 'views.py'))
+        self.assertEqual(update['frame']['function'], 'update')
+
+        line = json.loads(JsonFormatter().format(logs.records[0]))
+        self.assertEqual(line['kind'], 'slow')
+        self.assertEqual(line['logger'], 'incident_management.diagnostics')
+
+    def test_diagnostics_are_off_by_default(self):
+        with self.assertNoLogs('incident_management.diagnostics'):
+            self.client.get(reverse('incident-list-create'))
+
+
+class IncidentConditionalGetTests(IncidentTestCase):
+    """
+    Tests for ETag / Last-Modified validators on incident reads
+    """
+    def setUp(self):
+        super().setUp()
+        self.incident = self.create_incident()
+        self.urls = [
+            reverse('incident-list-create'),
+            reverse('incident-detail', args=[self.incident.pk]),
+            reverse('incident-search') + f'?incident_id={self.incident.incident_id}',
+        ]
+
+    def revalidate(self, url, response):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def test_unchanged_data_returns_304_with_one_query(self):
+        for url in self.urls:
+            first = self.client.get(url)
+            self.assertEqual(first.status_code, 200, url)
+            self.assertIn('no-cache', first['Cache-Control'])
+            self.assertIn('Last-Modified', first)
+            # Only the validator version lookup runs
+            with self.assertNumQueries(1):
+                again = self.revalidate(url, first)
+            self.assertEqual(again.status_code, 304, url)
+            self.assertEqual(again['ETag'], first['ETag'])
+            self.assertEqual(again.content, b'')
+
+    def test_writes_change_validators(self):
+        responses = {url: self.client.get(url) for url in self.urls}
+        self.client.patch(reverse('incident-detail', args=[self.incident.pk]), {'priority': 'LOW'}, format='json')
+        for url, response in responses.items():
+            self.assertEqual(self.revalidate(url, response).status_code, 200, url)
+
+        extra = self.create_incident()
+        responses = {url: self.client.get(url) for url in self.urls}
+        extra.delete()
+        for url, response in responses.items():
+            changed = self.revalidate(url, response)
+            self.assertEqual(changed.status_code, 200, url)
+            self.assertGreaterEqual(
+                parse_http_date(changed['Last-Modified']), parse_http_date(response['Last-Modified'])
+            )
+
+    def test_validators_depend_on_user_and_request(self):
+        url = self.urls[0]
+        first = self.client.get(url)
+        self.assertNotEqual(self.client.get(url, {'page_size': 1})['ETag'], first['ETag'])
+
+        self.user.first_name = 'Renamed'
+        self.user.save()
+        self.assertEqual(self.revalidate(url, first).status_code, 200)
+
+        other = User.objects.create_user(username='other', email='other@example.com', password='x')
+        self.client.force_authenticate(user=other)
+        self.assertEqual(self.revalidate(url, first).status_code, 200)
+
+    def test_if_modified_since(self):
+        url = self.urls[1]
+        first = self.client.get(url)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified']).status_code, 304)
+
+    def test_validators_do_not_depend_on_the_cache(self):
+        url = self.urls[0]
+        first = self.client.get(url)
+        # Another process has its own cache; the version lives in the database
+        cache.clear()
+        self.assertEqual(self.revalidate(url, first).status_code, 304)
+        IncidentVersionService.touch([self.user.pk])
+        self.assertEqual(self.revalidate(url, first).status_code, 200)
+
+    def test_errors_and_writes_carry_no_validators(self):
+        missing = self.client.get(reverse('incident-search'), {'incident_id': 'RMG000002099'})
+        self.assertEqual(missing.status_code, 404)
+        self.assertNotIn('ETag', missing)
+        created = self.client.post(reverse('incident-list-create'), {
+            'reporter_type': 'ENTERPRISE', 'incident_details': 'New', 'priority': 'LOW'
+        }, format='json')
+        self.assertEqual(created.status_code, 201)
+        self.assertNotIn('ETag', created)
@@ -6,5 +6,9 @@ urlpatterns = [
     path('<int:pk>/', views.IncidentDetailView.as_view(), name='incident-detail'),
     path('search/', views.search_incident, name='incident-search'),
     path('stats/', views.incident_stats, name='incident-stats'),
+    path('analytics/daily/', views.incident_analytics, name='incident-analytics'),
     path('<int:pk>/close/', views.close_incident, name='incident-close'),
+    path('bulk/', views.bulk_create_incidents, name='incident-bulk-create'),
+    path('bulk/close/', views.bulk_close_incidents, name='incident-bulk-close'),
+    path('events/', views.incident_events, name='incident-events'),
 ]
\ No newline at end of file
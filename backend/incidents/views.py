@@ -1,12 +1,32 @@
+import json
+import time
+from datetime import date, timedelta
+from asgiref.sync import sync_to_async
 from rest_framework import status, generics
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from django.conf import settings
 from django.db.models import Q
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from users.authentication import CachedTokenAuthentication
+from .bulk import IncidentBulkService
+from .conditional import conditional_incident_get
+from .events import get_event_broker
 from .models import Incident
+from .pagination import IncidentCursorPagination
+from .rollups import IncidentRollupService
+from .search import IncidentSearchIndex
+from .services import IncidentPrefixSearchService, IncidentStatsService
+from .signals import incidents_written
 from .serializers import (
     IncidentSerializer, IncidentCreateSerializer, 
-    IncidentUpdateSerializer, IncidentDetailSerializer
+    IncidentUpdateSerializer, IncidentDetailSerializer,
+    IncidentFastSerializer
 )
 
 
@@ -20,7 +40,19 @@ class IncidentListCreateView(generics.ListCreateAPIView):
         """
         Return incidents created by the current user only
         """
-        return Incident.objects.filter(reporter=self.request.user)
+        return Incident.objects.for_reporter(self.request.user).select_related('reporter')
+    
+    @property
+    def paginator(self):
+        """
+        Use keyset pagination when the client asks for it (?pagination=cursor)
+        """
+        if not hasattr(self, '_paginator'):
+            if IncidentCursorPagination.is_requested(self.request):
+                self._paginator = IncidentCursorPagination()
+            else:
+                self._paginator = self.pagination_class() if self.pagination_class else None
+        return self._paginator
     
     def get_serializer_class(self):
         """
@@ -30,6 +62,23 @@ class IncidentListCreateView(generics.ListCreateAPIView):
             return IncidentCreateSerializer
         return IncidentSerializer
     
+    @conditional_incident_get
+    def list(self, request, *args, **kwargs):
+        """
+        Serve the list through IncidentFastSerializer when requested (?fast=true)
+        """
+        if not IncidentFastSerializer.is_requested(request):
+            return super().list(request, *args, **kwargs)
+        
+        queryset = self.filter_queryset(self.get_queryset()).values(
+            *IncidentFastSerializer.values_fields
+        )
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(IncidentFastSerializer(page).data)
+        
+        return Response(IncidentFastSerializer(queryset).data)
+    
     def perform_create(self, serializer):
         """
         Set the reporter to the current user
@@ -47,7 +96,7 @@ class IncidentDetailView(generics.RetrieveUpdateDestroyAPIView):
         """
         Return incidents created by the current user only
         """
-        return Incident.objects.filter(reporter=self.request.user)
+        return Incident.objects.for_reporter(self.request.user).select_related('reporter')
     
     def get_serializer_class(self):
         """
@@ -57,10 +106,16 @@ class IncidentDetailView(generics.RetrieveUpdateDestroyAPIView):
             return IncidentUpdateSerializer
         return IncidentDetailSerializer
     
+    @conditional_incident_get
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+    
     def update(self, request, *args, **kwargs):
         """
-        Override update to check if incident is editable
+        Update the incident with a single conditional UPDATE so that an
+        incident closed in the meantime is never modified
         """
+        partial = kwargs.pop('partial', False)
         instance = self.get_object()
         
         if not instance.is_editable():
@@ -68,27 +123,55 @@ class IncidentDetailView(generics.RetrieveUpdateDestroyAPIView):
                 'error': 'Cannot edit a closed incident'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        return super().update(request, *args, **kwargs)
+        serializer = self.get_serializer(instance, data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        changes = serializer.validated_data
+        
+        if changes:
+            changes['updated_date'] = timezone.now()
+            updated = self.get_queryset().filter(pk=instance.pk).exclude(status='CLOSED').update(**changes)
+            if not updated:
+                return Response({
+                    'error': 'Cannot edit a closed incident'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            
+            previous = {field: getattr(instance, field) for field in changes}
+            for field, value in changes.items():
+                setattr(instance, field, value)
+            incidents_written.send(
+                sender=Incident, incidents=[instance], created=False, update_fields=list(changes),
+                previous=[previous]
+            )
+        
+        return Response(serializer.data)
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@conditional_incident_get
 def search_incident(request):
     """
-    View to search incidents by incident ID
+    View to search incidents by incident ID, by ID prefix (?mode=prefix) or
+    by words in the details (?q=)
     """
+    query = request.query_params.get('q', '')
+    if query:
+        return search_incident_text(request, query)
+    
     incident_id = request.query_params.get('incident_id', '')
     
     if not incident_id:
         return Response({
-            'error': 'Please provide incident_id parameter'
+            'error': 'Please provide incident_id or q parameter'
         }, status=status.HTTP_400_BAD_REQUEST)
     
+    if request.query_params.get('mode') == 'prefix':
+        return search_incident_prefix(request, incident_id)
+    
     try:
         # Search only in current user's incidents
-        incident = Incident.objects.get(
-            incident_id=incident_id,
-            reporter=request.user
+        incident = Incident.objects.for_reporter(request.user).select_related('reporter').get(
+            incident_id=incident_id
         )
         serializer = IncidentDetailSerializer(incident)
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -99,53 +182,275 @@ def search_incident(request):
         }, status=status.HTTP_404_NOT_FOUND)
 
 
+def search_incident_prefix(request, prefix):
+    """
+    Return the current user's incidents whose ID starts with the prefix (typeahead)
+    """
+    service = IncidentPrefixSearchService()
+    prefix = service.normalize(prefix)
+    if prefix is None:
+        return Response({
+            'error': 'incident_id prefix may only contain letters and digits (max 12)'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        limit = int(request.query_params.get('limit', 10))
+    except ValueError:
+        return Response({
+            'error': 'limit must be a number'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    results = service.get_matches(request.user, prefix, limit)
+    response = Response({'prefix': prefix, 'results': results}, status=status.HTTP_200_OK)
+    # Let the browser reuse the answer while the user keeps typing
+    patch_cache_control(response, private=True, max_age=getattr(settings, 'INCIDENT_PREFIX_MAX_AGE', 10))
+    return response
+
+
+def search_incident_text(request, query):
+    """
+    Return the current user's incidents matching the query words, best match first
+    """
+    match_all = request.query_params.get('match', 'all') != 'any'
+    ranked = IncidentSearchIndex().search(request.user, query, match_all=match_all)
+    
+    paginator = api_settings.DEFAULT_PAGINATION_CLASS()
+    page = paginator.paginate_queryset(ranked, request)
+    scores = {row['incident_id']: row['score'] for row in page}
+    incidents = Incident.objects.for_reporter(request.user).select_related('reporter').in_bulk(scores)
+    
+    results = []
+    for incident_pk, score in scores.items():
+        if incident_pk in incidents:
+            data = IncidentSerializer(incidents[incident_pk]).data
+            data['score'] = round(score, 4)
+            results.append(data)
+    return paginator.get_paginated_response(results)
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def incident_stats(request):
     """
     View to get incident statistics for the current user
     """
-    user_incidents = Incident.objects.filter(reporter=request.user)
-    
-    stats = {
-        'total_incidents': user_incidents.count(),
-        'open_incidents': user_incidents.filter(status='OPEN').count(),
-        'in_progress_incidents': user_incidents.filter(status='IN_PROGRESS').count(),
-        'closed_incidents': user_incidents.filter(status='CLOSED').count(),
-        'high_priority': user_incidents.filter(priority='HIGH').count(),
-        'medium_priority': user_incidents.filter(priority='MEDIUM').count(),
-        'low_priority': user_incidents.filter(priority='LOW').count(),
-    }
+    stats = IncidentStatsService().get_stats(request.user)
     
     return Response(stats, status=status.HTTP_200_OK)
 
 
-@api_view(['POST'])
+@api_view(['GET'])
 @permission_classes([IsAuthenticated])
-def close_incident(request, pk):
+def incident_analytics(request):
     """
-    View to close an incident
+    View to get the current user's daily reported and closed incident counts,
+    optionally grouped by priority or reporter_type (?group_by=)
     """
     try:
-        incident = Incident.objects.get(
-            pk=pk,
-            reporter=request.user
+        end = date.fromisoformat(request.query_params['end']) if 'end' in request.query_params else timezone.localdate()
+        start = (
+            date.fromisoformat(request.query_params['start']) if 'start' in request.query_params
+            else end - timedelta(days=29)
         )
-        
-        if incident.status == 'CLOSED':
-            return Response({
-                'error': 'Incident is already closed'
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
-        incident.status = 'CLOSED'
-        incident.save()
-        
+    except ValueError:
+        return Response({
+            'error': 'start and end must be dates (YYYY-MM-DD)'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    max_days = getattr(settings, 'INCIDENT_ANALYTICS_MAX_DAYS', 366)
+    if start > end or (end - start).days >= max_days:
+        return Response({
+            'error': f'start must not be after end and the range may span at most {max_days} days'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    group_by = request.query_params.get('group_by') or None
+    if group_by is not None and group_by not in IncidentRollupService.GROUP_BY:
         return Response({
-            'message': 'Incident closed successfully',
-            'incident': IncidentSerializer(incident).data
-        }, status=status.HTTP_200_OK)
+            'error': f"group_by must be one of: {', '.join(IncidentRollupService.GROUP_BY)}"
+        }, status=status.HTTP_400_BAD_REQUEST)
     
+    series = list(IncidentRollupService().daily_series(request.user, start, end, group_by))
+    return Response({
+        'start': start,
+        'end': end,
+        'group_by': group_by,
+        'totals': {
+            'reported': sum(row['reported'] for row in series),
+            'closed': sum(row['closed'] for row in series),
+        },
+        'series': series,
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def close_incident(request, pk):
+    """
+    View to close an incident
+    """
+    # The conditional UPDATE decides the outcome, so concurrent closes cannot both succeed
+    now = timezone.now()
+    closed = Incident.objects.for_reporter(request.user).filter(pk=pk).close(now)
+    try:
+        # get() drops the default ordering, so the primary key lookup needs no sort
+        incident = Incident.objects.for_reporter(request.user).select_related('reporter').get(pk=pk)
     except Incident.DoesNotExist:
         return Response({
             'error': 'Incident not found or you do not have permission to close it'
         }, status=status.HTTP_404_NOT_FOUND)
+    
+    if not closed:
+        return Response({
+            'error': 'Incident is already closed'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    incidents_written.send(
+        sender=Incident, incidents=[incident], created=False, update_fields=['status', 'updated_date']
+    )
+    
+    return Response({
+        'message': 'Incident closed successfully',
+        'incident': IncidentSerializer(incident).data
+    }, status=status.HTTP_200_OK)
+
+
+def bulk_response(results, succeeded, success_status):
+    """
+    Return success_status when every item succeeded, 207 for partial success
+    and 400 when none did
+    """
+    if succeeded == len(results):
+        response_status = success_status
+    elif succeeded:
+        response_status = status.HTTP_207_MULTI_STATUS
+    else:
+        response_status = status.HTTP_400_BAD_REQUEST
+    return Response({
+        'succeeded': succeeded,
+        'failed': len(results) - succeeded,
+        'results': results,
+    }, status=response_status)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def bulk_create_incidents(request):
+    """
+    View to create many incidents in one request
+    """
+    service = IncidentBulkService()
+    items = request.data.get('incidents') if isinstance(request.data, dict) else request.data
+    error = service.check_items(items, 'incidents')
+    if error:
+        return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+    
+    results = service.create(request.user, items, context={'request': request})
+    created = sum(result['status'] == 'created' for result in results)
+    return bulk_response(results, created, status.HTTP_201_CREATED)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def bulk_close_incidents(request):
+    """
+    View to close many incidents in one request
+    """
+    service = IncidentBulkService()
+    ids = request.data.get('ids') if isinstance(request.data, dict) else request.data
+    error = service.check_items(ids, 'ids')
+    if not error and not all(isinstance(pk, int) and not isinstance(pk, bool) for pk in ids):
+        error = 'ids must be incident id numbers'
+    if error:
+        return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+    
+    results = service.close(request.user, ids)
+    closed = sum(result['status'] == 'closed' for result in results)
+    return bulk_response(results, closed, status.HTTP_200_OK)
+
+
+async def authenticate_event_request(request):
+    """
+    Return the user of a token (Authorization header or ?token=, as
+    EventSource cannot set headers) or session, or None
+    """
+    key = request.GET.get('token')
+    header = request.headers.get('Authorization', '').split()
+    if len(header) == 2 and header[0] == 'Token':
+        key = header[1]
+    if key:
+        try:
+            user, _ = await sync_to_async(CachedTokenAuthentication().authenticate_credentials)(key)
+        except AuthenticationFailed:
+            return None
+        return user
+    user = await request.auser()
+    return user if user.is_authenticated else None
+
+
+def format_event(event):
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event['data'])}\n\n"
+
+
+async def stream_incident_events(broker, reporter_id, cursor):
+    """
+    Yield server-sent events until INCIDENT_EVENTS_STREAM_TIMEOUT; the
+    browser then reconnects with Last-Event-ID
+    """
+    heartbeat = getattr(settings, 'INCIDENT_EVENTS_HEARTBEAT', 15)
+    deadline = time.monotonic() + getattr(settings, 'INCIDENT_EVENTS_STREAM_TIMEOUT', 300)
+    yield f'retry: {heartbeat * 1000}\n\n'
+    
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        events, last_id, reset = await broker.wait(reporter_id, cursor, min(heartbeat, remaining))
+        if reset:
+            events = [{'id': last_id, 'type': 'reset', 'data': {}}]
+        for event in events:
+            yield format_event(event)
+        if events:
+            cursor = events[-1]['id']
+        else:
+            yield ': keepalive\n\n'
+
+
+async def incident_events(request):
+    """
+    Async view serving the current user's incident change events.
+
+    With Accept: text/event-stream (or ?stream=sse) events are streamed as
+    server-sent events. Otherwise the request long-polls: it returns as soon
+    as there are events after ?after= or when ?timeout= seconds have passed.
+    A reset event/flag means events were missed and data should be reloaded.
+    """
+    if request.method != 'GET':
+        return JsonResponse({'detail': f'Method "{request.method}" not allowed.'}, status=405)
+    
+    user = await authenticate_event_request(request)
+    if user is None:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+    
+    broker = get_event_broker()
+    after = request.headers.get('Last-Event-ID') or request.GET.get('after')
+    try:
+        after = int(after) if after else None
+        timeout = float(request.GET.get('timeout', 25))
+    except ValueError:
+        return JsonResponse({'error': 'after and timeout must be numbers'}, status=400)
+    if after is None:
+        # Start from now: only changes made after connecting are sent
+        after, _ = await broker.asnapshot(user.pk)
+    
+    if 'text/event-stream' in request.headers.get('Accept', '') or request.GET.get('stream') == 'sse':
+        response = StreamingHttpResponse(
+            stream_incident_events(broker, user.pk, after), content_type='text/event-stream'
+        )
+        response['Cache-Control'] = 'no-cache'
+        # Stop nginx from buffering the stream
+        response['X-Accel-Buffering'] = 'no'
+        return response
+    
+    timeout = max(0, min(timeout, getattr(settings, 'INCIDENT_EVENTS_LONG_POLL_TIMEOUT', 25)))
+    events, last_id, reset = await broker.wait(user.pk, after, timeout)
+    return JsonResponse({'events': events, 'last_id': last_id, 'reset': reset})
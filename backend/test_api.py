@@ -3,13 +3,26 @@
 Comprehensive API test script for Incident Management System
 """
 
-import requests
+import argparse
 import json
+import math
 import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import requests
 
 class APITester:
-    def __init__(self, base_url="http://localhost:8000"):
+    def __init__(self, base_url="http://localhost:8000", username="test_user", email="test@example.com"):
         self.base_url = base_url
+        self.username = username
+        self.email = email
+        self.password = "testpass123"
+        self.session = requests.Session()
         self.token = None
         self.user_id = None
         
@@ -23,13 +36,24 @@ class APITester:
             print(f"Response: {response.text}")
         print("-" * 60)
     
-    def test_user_registration(self):
-        """Test user registration"""
-        print("Testing User Registration...")
-        
-        data = {
-            "username": "test_user",
-            "email": "test@example.com",
+    def request(self, step, method, path, **kwargs):
+        """Send one scenario request, authenticated once a token is known"""
+        if self.token:
+            kwargs.setdefault("headers", {})["Authorization"] = f"Token {self.token}"
+        return self.session.request(method, f"{self.base_url}{path}", **kwargs)
+    
+    def authenticate(self, response):
+        """Keep the token and user id of a registration or login response"""
+        result = response.json()
+        self.token = result['token']
+        self.user_id = result['user']['id']
+    
+    # Scenario steps, shared by the functional pass and the load test
+    
+    def register(self):
+        return self.request("register", "POST", "/api/users/register/", json={
+            "username": self.username,
+            "email": self.email,
             "first_name": "Test",
             "last_name": "User",
             "phone_number": "+91-9876543213",
@@ -37,17 +61,50 @@ class APITester:
             "pincode": "110001",
             "city": "New Delhi",
             "country": "India",
-            "password": "testpass123",
-            "password_confirm": "testpass123"
-        }
+            "password": self.password,
+            "password_confirm": self.password
+        })
+    
+    def login(self):
+        return self.request("login", "POST", "/api/users/login/", json={
+            "email": self.email,
+            "password": self.password
+        })
+    
+    def lookup_pincode(self):
+        return self.request("pincode", "GET", "/api/users/pincode/110001/")
+    
+    def get_profile(self):
+        return self.request("profile", "GET", "/api/users/profile/")
+    
+    def create_incident(self):
+        return self.request("create", "POST", "/api/incidents/", json={
+            "reporter_type": "ENTERPRISE",
+            "incident_details": "Test incident created via API",
+            "priority": "HIGH"
+        })
+    
+    def list_incidents(self):
+        return self.request("list", "GET", "/api/incidents/")
+    
+    def search_incident(self, incident_id):
+        return self.request("search", "GET", f"/api/incidents/search/?incident_id={incident_id}")
+    
+    def get_stats(self):
+        return self.request("stats", "GET", "/api/incidents/stats/")
+    
+    def close_incident(self, pk):
+        return self.request("close", "POST", f"/api/incidents/{pk}/close/")
+    
+    def test_user_registration(self):
+        """Test user registration"""
+        print("Testing User Registration...")
         
-        response = requests.post(f"{self.base_url}/api/users/register/", json=data)
+        response = self.register()
         self.print_response(response, "User Registration")
         
         if response.status_code == 201:
-            result = response.json()
-            self.token = result['token']
-            self.user_id = result['user']['id']
+            self.authenticate(response)
             print(f"✓ Registration successful. Token: {self.token}")
             return True
         else:
@@ -58,18 +115,11 @@ class APITester:
         """Test user login"""
         print("Testing User Login...")
         
-        data = {
-            "email": "test@example.com",
-            "password": "testpass123"
-        }
-        
-        response = requests.post(f"{self.base_url}/api/users/login/", json=data)
+        response = self.login()
         self.print_response(response, "User Login")
         
         if response.status_code == 200:
-            result = response.json()
-            self.token = result['token']
-            self.user_id = result['user']['id']
+            self.authenticate(response)
             print(f"✓ Login successful. Token: {self.token}")
             return True
         else:
@@ -80,7 +130,7 @@ class APITester:
         """Test pincode lookup"""
         print("Testing Pincode Lookup...")
         
-        response = requests.get(f"{self.base_url}/api/users/pincode/110001/")
+        response = self.lookup_pincode()
         self.print_response(response, "Pincode Lookup")
         
         if response.status_code == 200:
@@ -98,14 +148,7 @@ class APITester:
             print("✗ No authentication token available")
             return False
         
-        headers = {"Authorization": f"Token {self.token}"}
-        data = {
-            "reporter_type": "ENTERPRISE",
-            "incident_details": "Test incident created via API",
-            "priority": "HIGH"
-        }
-        
-        response = requests.post(f"{self.base_url}/api/incidents/", json=data, headers=headers)
+        response = self.create_incident()
         self.print_response(response, "Incident Creation")
         
         if response.status_code == 201:
@@ -125,8 +168,7 @@ class APITester:
             print("✗ No authentication token available")
             return False
         
-        headers = {"Authorization": f"Token {self.token}"}
-        response = requests.get(f"{self.base_url}/api/incidents/", headers=headers)
+        response = self.list_incidents()
         self.print_response(response, "Incident List")
         
         if response.status_code == 200:
@@ -144,8 +186,7 @@ class APITester:
             print("✗ No authentication token or incident ID available")
             return False
         
-        headers = {"Authorization": f"Token {self.token}"}
-        response = requests.get(f"{self.base_url}/api/incidents/search/?incident_id={self.incident_id}", headers=headers)
+        response = self.search_incident(self.incident_id)
         self.print_response(response, "Incident Search")
         
         if response.status_code == 200:
@@ -163,8 +204,7 @@ class APITester:
             print("✗ No authentication token available")
             return False
         
-        headers = {"Authorization": f"Token {self.token}"}
-        response = requests.get(f"{self.base_url}/api/incidents/stats/", headers=headers)
+        response = self.get_stats()
         self.print_response(response, "Incident Statistics")
         
         if response.status_code == 200:
@@ -182,8 +222,7 @@ class APITester:
             print("✗ No authentication token available")
             return False
         
-        headers = {"Authorization": f"Token {self.token}"}
-        response = requests.get(f"{self.base_url}/api/users/profile/", headers=headers)
+        response = self.get_profile()
         self.print_response(response, "User Profile")
         
         if response.status_code == 200:
@@ -237,10 +276,163 @@ class APITester:
             print("⚠️  Some tests failed. Check server logs for details.")
 
 
+def percentile(values, pct):
+    """Nearest-rank percentile of a sorted list"""
+    if not values:
+        return None
+    rank = max(math.ceil(pct / 100 * len(values)) - 1, 0)
+    return values[min(rank, len(values) - 1)]
+
+
+class VirtualUser(APITester):
+    """A single simulated client running the APITester scenario steps"""
+
+    def __init__(self, load_tester, number):
+        suffix = f"{number}_{uuid.uuid4().hex[:8]}"
+        super().__init__(load_tester.base_url, username=f"load_{suffix}", email=f"load_{suffix}@example.com")
+        self.load_tester = load_tester
+
+    def request(self, step, method, path, **kwargs):
+        """Send the request and record its latency under the step name"""
+        start = time.perf_counter()
+        try:
+            response = super().request(step, method, path, timeout=30, **kwargs)
+            ok = response.status_code < 400
+        except requests.RequestException:
+            response, ok = None, False
+        self.load_tester.record(step, time.perf_counter() - start, ok)
+        return response if ok else None
+
+    def run_iteration(self):
+        self.create_incident()
+        response = self.list_incidents()
+        self.get_stats()
+        
+        # The newest incident is first in the list
+        results = response.json().get("results", []) if response is not None else []
+        if results:
+            incident = results[0]
+            self.search_incident(incident['incident_id'])
+            self.close_incident(incident['id'])
+    
+    def run(self, iterations):
+        if self.register() is None:
+            return
+        response = self.login()
+        if response is None:
+            return
+        self.authenticate(response)
+        for _ in range(iterations):
+            self.run_iteration()
+
+
+class LoadTester:
+    """Drive many concurrent virtual users and report per-endpoint latency"""
+
+    def __init__(self, base_url="http://localhost:8000", users=10, iterations=5):
+        self.base_url = base_url
+        self.users = users
+        self.iterations = iterations
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.lock = threading.Lock()
+
+    def record(self, endpoint, seconds, ok):
+        with self.lock:
+            self.latencies[endpoint].append(seconds)
+            if not ok:
+                self.errors[endpoint] += 1
+
+    def run(self):
+        started_at = datetime.now(timezone.utc)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.users) as pool:
+            futures = [
+                pool.submit(VirtualUser(self, number).run, self.iterations)
+                for number in range(self.users)
+            ]
+            for future in futures:
+                future.result()
+        duration = time.perf_counter() - start
+        return self.summarize(started_at, duration)
+
+    def summarize(self, started_at, duration):
+        endpoints = {}
+        for endpoint, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            endpoints[endpoint] = {
+                "requests": len(values),
+                "errors": self.errors[endpoint],
+                "throughput_rps": round(len(values) / duration, 2),
+                "mean_ms": round(sum(values) / len(values) * 1000, 2),
+                "p50_ms": round(percentile(values, 50) * 1000, 2),
+                "p95_ms": round(percentile(values, 95) * 1000, 2),
+                "p99_ms": round(percentile(values, 99) * 1000, 2),
+            }
+        total = sum(item["requests"] for item in endpoints.values())
+        return {
+            "base_url": self.base_url,
+            "started_at": started_at.isoformat(),
+            "virtual_users": self.users,
+            "iterations": self.iterations,
+            "duration_s": round(duration, 3),
+            "total_requests": total,
+            "total_errors": sum(item["errors"] for item in endpoints.values()),
+            "throughput_rps": round(total / duration, 2) if duration else 0,
+            "endpoints": endpoints,
+        }
+
+    @staticmethod
+    def print_report(report):
+        print("=" * 78)
+        print(f"LOAD TEST: {report['virtual_users']} users x {report['iterations']} iterations "
+              f"against {report['base_url']}")
+        print("=" * 78)
+        print(f"{'endpoint':<10}{'requests':>10}{'errors':>8}{'rps':>10}"
+              f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+        for endpoint, stats in report["endpoints"].items():
+            print(f"{endpoint:<10}{stats['requests']:>10}{stats['errors']:>8}"
+                  f"{stats['throughput_rps']:>10}{stats['p50_ms']:>10}"
+                  f"{stats['p95_ms']:>10}{stats['p99_ms']:>10}")
+        print("-" * 78)
+        print(f"Total: {report['total_requests']} requests, {report['total_errors']} errors, "
+              f"{report['throughput_rps']} req/s in {report['duration_s']}s")
+
+    @staticmethod
+    def print_comparison(report, baseline):
+        print(f"{'endpoint':<10}{'base p95':>12}{'p95':>12}{'change':>10}")
+        for endpoint, stats in report["endpoints"].items():
+            previous = baseline["endpoints"].get(endpoint)
+            if not previous:
+                continue
+            if previous["p95_ms"] and stats["p95_ms"] is not None:
+                change = f"{(stats['p95_ms'] - previous['p95_ms']) / previous['p95_ms'] * 100:>+9.1f}%"
+            else:
+                # No relative change against an empty or zero baseline
+                change = f"{'n/a':>10}"
+            print(f"{endpoint:<10}{str(previous['p95_ms']):>12}{str(stats['p95_ms']):>12}{change}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Incident Management System API tests")
+    parser.add_argument("--base-url", default="http://localhost:8000",
+                        help="Server to test (runserver or gunicorn)")
+    parser.add_argument("--load", action="store_true",
+                        help="Run the load test instead of the functional pass")
+    parser.add_argument("--users", type=int, default=10, help="Concurrent virtual users")
+    parser.add_argument("--iterations", type=int, default=5,
+                        help="Scenario iterations per virtual user")
+    parser.add_argument("--json", dest="json_path", help="Write the load test report to this file")
+    parser.add_argument("--compare", help="Earlier JSON report to compare p95 latency against")
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
+    args = parse_args()
+    
     # Check if server is running
     try:
-        response = requests.get("http://localhost:8000/api/users/list/")
+        response = requests.get(f"{args.base_url}/api/users/list/")
         if response.status_code == 401:  # Unauthorized is expected
             print("✓ Server is running")
         else:
@@ -250,6 +442,18 @@ if __name__ == "__main__":
         print("  python manage.py runserver")
         sys.exit(1)
     
-    # Run tests
-    tester = APITester()
-    tester.run_all_tests()
\ No newline at end of file
+    if args.load:
+        load_tester = LoadTester(args.base_url, users=args.users, iterations=args.iterations)
+        report = load_tester.run()
+        LoadTester.print_report(report)
+        if args.compare:
+            with open(args.compare) as handle:
+                LoadTester.print_comparison(report, json.load(handle))
+        if args.json_path:
+            with open(args.json_path, "w") as handle:
+                json.dump(report, handle, indent=2)
+            print(f"Report written to {args.json_path}")
+    else:
+        # Run tests
+        tester = APITester(args.base_url)
+        tester.run_all_tests()
@@ -0,0 +1,168 @@
+import threading
+import time
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from .cache import LRUCache
+
+
+class LoginActivityTracker:
+    """
+    Record last-login and last-seen times without writing the users row on
+    every request.
+
+    Activity is coalesced in memory (at most one recorded write per user per
+    write interval) and flushed with bulk_update() once the batch is full or,
+    from a background timer, once the flush interval has passed.
+
+    Pending activity belongs to the database it was recorded against; if the
+    configured database changes before a flush (e.g. when the test runner
+    destroys its test database), the pending entries are discarded.
+    """
+
+    def __init__(self, write_interval=None, flush_interval=None, batch_size=None):
+        self.write_interval = write_interval if write_interval is not None else getattr(
+            settings, 'LOGIN_ACTIVITY_WRITE_INTERVAL', 300)
+        self.flush_interval = flush_interval if flush_interval is not None else getattr(
+            settings, 'LOGIN_ACTIVITY_FLUSH_INTERVAL', 60)
+        self.batch_size = batch_size or getattr(settings, 'LOGIN_ACTIVITY_BATCH_SIZE', 500)
+
+        self._pending = {}
+        self._recorded = LRUCache(max_size=100000, default_ttl=self.write_interval)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._database = None
+        self._timer = None
+        self.writes = 0
+        self.coalesced = 0
+
+    def record_login(self, user, when=None):
+        """
+        Record a successful login
+        """
+        when = when or timezone.now()
+        user.last_login = when
+        with self._lock:
+            entry = self._add_pending(user.pk)
+            entry['last_login'] = when
+            entry['last_seen'] = when
+        self._recorded.set(user.pk, True)
+        self.maybe_flush()
+
+    def record_seen(self, user_id, when=None):
+        """
+        Record an authenticated request, ignoring users seen within the write interval
+        """
+        if self._recorded.get(user_id):
+            with self._lock:
+                self.coalesced += 1
+            return
+        self._recorded.set(user_id, True)
+        with self._lock:
+            self._add_pending(user_id)['last_seen'] = when or timezone.now()
+        self.maybe_flush()
+
+    def _add_pending(self, user_id):
+        # Called with self._lock held
+        if not self._pending:
+            self._database = connection.settings_dict['NAME']
+            self._schedule()
+        return self._pending.setdefault(user_id, {})
+
+    def _schedule(self):
+        if self._timer is None and self.flush_interval > 0:
+            self._timer = threading.Timer(self.flush_interval, self._flush_from_timer)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _flush_from_timer(self):
+        with self._lock:
+            self._timer = None
+        try:
+            self.flush()
+        finally:
+            # The timer thread opened its own connection
+            connection.close()
+
+    def discard(self):
+        """
+        Drop pending activity without writing it and stop the flush timer
+        """
+        with self._lock:
+            self._pending = {}
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+    def maybe_flush(self):
+        with self._lock:
+            due = (
+                len(self._pending) >= self.batch_size
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            )
+        if due:
+            self.flush()
+
+    def flush(self):
+        """
+        Write all pending activity in batched UPDATEs and return the user count
+        """
+        from .models import User
+
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                database, self._database = self._database, None
+                self._last_flush = time.monotonic()
+            if not pending or connection.settings_dict['NAME'] != database:
+                return 0
+
+            logins = [
+                User(pk=user_id, last_login=entry['last_login'], last_seen=entry['last_seen'])
+                for user_id, entry in pending.items() if 'last_login' in entry
+            ]
+            seen = [
+                User(pk=user_id, last_seen=entry['last_seen'])
+                for user_id, entry in pending.items() if 'last_login' not in entry
+            ]
+            if logins:
+                User.objects.bulk_update(logins, ['last_login', 'last_seen'], batch_size=self.batch_size)
+            if seen:
+                User.objects.bulk_update(seen, ['last_seen'], batch_size=self.batch_size)
+
+        with self._lock:
+            self.writes += len(pending)
+        return len(pending)
+
+    def stats(self):
+        with self._lock:
+            return {'pending': len(self._pending), 'writes': self.writes, 'coalesced': self.coalesced}
+
+
+_tracker = None
+_tracker_lock = threading.Lock()
+
+
+def get_activity_tracker():
+    """
+    Return the process-wide LoginActivityTracker
+    """
+    global _tracker
+    if _tracker is None:
+        with _tracker_lock:
+            if _tracker is None:
+                _tracker = LoginActivityTracker()
+    return _tracker
+
+
+def reset_activity_tracker():
+    """
+    Drop the process-wide LoginActivityTracker and its pending activity
+    without writing it
+    """
+    global _tracker
+    with _tracker_lock:
+        if _tracker is not None:
+            _tracker.discard()
+        _tracker = None
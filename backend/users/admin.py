@@ -12,11 +12,15 @@ class UserAdmin(BaseUserAdmin):
     list_filter = ['is_active', 'is_staff', 'date_joined', 'city', 'country']
     search_fields = ['username', 'email', 'first_name', 'last_name', 'phone_number']
     ordering = ['-date_joined']
+    readonly_fields = ['last_login', 'last_seen', 'date_joined']
     
     fieldsets = BaseUserAdmin.fieldsets + (
         ('Additional Info', {
             'fields': ('phone_number', 'address', 'pincode', 'city', 'country')
         }),
+        ('Activity', {
+            'fields': ('last_seen',)
+        }),
     )
     
     add_fieldsets = BaseUserAdmin.add_fieldsets + (
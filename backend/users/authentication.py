@@ -0,0 +1,144 @@
+import copy
+import threading
+import time
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.authentication import TokenAuthentication
+from .activity import get_activity_tracker
+from .cache import LRUCache
+
+
+class TokenUserCache:
+    """
+    Bounded TTL cache of token key -> (user, token) with hit rate and
+    latency-saved accounting.
+
+    Revocations are published as change stamps (the time of the change) in
+    the shared cache, one per token and one per user, which every hit checks:
+    an entry read from the database before its token or user last changed is
+    dropped, in whichever process it lives. Stamps expire with the entries
+    they could invalidate. This needs a shared CACHES backend when running
+    more than one worker process.
+    """
+    TOKEN_STAMP_KEY = 'auth_token_changed:{key}'
+    USER_STAMP_KEY = 'auth_user_changed:{user_id}'
+
+    def __init__(self, max_size, ttl, stamp_cache=None):
+        self.entries = LRUCache(max_size=max_size, default_ttl=ttl)
+        self.ttl = ttl
+        self.stamp_cache = stamp_cache if stamp_cache is not None else cache
+        self._lock = threading.Lock()
+        self._miss_seconds = 0.0
+        self._timed_misses = 0
+
+    def get(self, key):
+        """
+        Return (user, token) for the key, or None if it is not cached or its
+        token or user changed since it was read
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        user, token, read_at = entry
+        stamps = self.stamp_cache.get_many([
+            self.TOKEN_STAMP_KEY.format(key=key), self.USER_STAMP_KEY.format(user_id=user.pk),
+        ])
+        if any(stamp >= read_at for stamp in stamps.values()):
+            self.entries.delete(key)
+            return None
+        return user, token
+
+    def set(self, key, user, token, read_at, lookup_seconds):
+        """
+        Cache the user and token read from the database at read_at (time.time())
+        """
+        self.entries.set(key, (user, token, read_at))
+        with self._lock:
+            self._miss_seconds += lookup_seconds
+            self._timed_misses += 1
+
+    def evict_token(self, key):
+        """
+        Stop serving the token from any process' cache
+        """
+        self.stamp_cache.set(self.TOKEN_STAMP_KEY.format(key=key), time.time(), self.ttl + 1)
+        self.entries.delete(key)
+
+    def evict_users(self, user_ids):
+        """
+        Make every process read the users' tokens from the database again
+        """
+        now = time.time()
+        self.stamp_cache.set_many(
+            {self.USER_STAMP_KEY.format(user_id=user_id): now for user_id in user_ids}, self.ttl + 1
+        )
+
+    def evict_user(self, user_id):
+        self.evict_users([user_id])
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self):
+        """
+        Return cache counters plus the estimated database time saved by hits
+        """
+        stats = self.entries.stats()
+        with self._lock:
+            average = self._miss_seconds / self._timed_misses if self._timed_misses else 0.0
+        stats['avg_lookup_ms'] = average * 1000
+        stats['saved_ms'] = stats['hits'] * average * 1000
+        return stats
+
+
+_token_cache = None
+_token_cache_lock = threading.Lock()
+
+
+def get_token_cache():
+    """
+    Return the process-wide token cache configured from settings
+    """
+    global _token_cache
+    if _token_cache is None:
+        with _token_cache_lock:
+            if _token_cache is None:
+                _token_cache = TokenUserCache(
+                    max_size=getattr(settings, 'TOKEN_AUTH_CACHE_SIZE', 10000),
+                    ttl=getattr(settings, 'TOKEN_AUTH_CACHE_TIMEOUT', 60),
+                )
+    return _token_cache
+
+
+def reset_token_cache():
+    """
+    Drop the process-wide token cache so that it is rebuilt from settings
+    """
+    global _token_cache
+    _token_cache = None
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication that resolves token keys through an in-process TTL
+    cache instead of querying authtoken_token and users on every request.
+
+    Entries are invalidated in every process (through the shared cache) when
+    the token is deleted or the user is saved or updated; see TokenUserCache.
+    """
+
+    def authenticate_credentials(self, key):
+        token_cache = get_token_cache()
+        cached = token_cache.get(key)
+        if cached is None:
+            read_at = time.time()
+            start = time.perf_counter()
+            user, token = super().authenticate_credentials(key)
+            token_cache.set(key, user, token, read_at, time.perf_counter() - start)
+        else:
+            user, token = cached
+
+        get_activity_tracker().record_seen(user.pk)
+
+        # Hand every request its own copy so per-request changes never leak
+        return copy.copy(user), token
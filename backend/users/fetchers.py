@@ -0,0 +1,100 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class PincodeFetcher:
+    """
+    Fetch pincode data from external providers over pooled, persistent
+    connections.
+
+    All providers are queried concurrently and the first valid answer wins.
+    Concurrent fetches of the same pincode are coalesced into one upstream
+    round (single-flight).
+    """
+
+    def __init__(self, providers, parse, timeout=5, max_workers=8, pool_size=10):
+        self.providers = list(providers)
+        self.parse = parse
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max(len(self.providers), 1), pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='pincode-fetch')
+
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.upstream_requests = 0
+        self.coalesced = 0
+
+    def fetch(self, pincode):
+        """
+        Return parsed data for the pincode, or None if no provider had it
+        """
+        with self._lock:
+            future = self._inflight.get(pincode)
+            leader = future is None
+            if leader:
+                future = self._inflight[pincode] = Future()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = self._fetch_first_valid(pincode)
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            with self._lock:
+                self._inflight.pop(pincode, None)
+        return result
+
+    def stats(self):
+        with self._lock:
+            return {
+                'upstream_requests': self.upstream_requests,
+                'coalesced': self.coalesced,
+                'inflight': len(self._inflight),
+            }
+
+    def _fetch_first_valid(self, pincode):
+        if len(self.providers) == 1:
+            return self._fetch_one(self.providers[0], pincode)
+
+        deadline = time.monotonic() + self.timeout
+        pending = {self.executor.submit(self._fetch_one, url, pincode) for url in self.providers}
+        try:
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    if result is not None:
+                        return result
+        finally:
+            for future in pending:
+                future.cancel()
+        return None
+
+    def _fetch_one(self, api_url, pincode):
+        with self._lock:
+            self.upstream_requests += 1
+        try:
+            response = self.session.get(f"{api_url}{pincode}", timeout=self.timeout)
+            if response.status_code == 200:
+                return self.parse(response.json(), pincode)
+        except Exception:
+            # Any provider failure just means this provider has no answer
+            pass
+        return None
@@ -0,0 +1,86 @@
+from asgiref.sync import sync_to_async
+from rest_framework.utils.encoders import JSONEncoder
+from .models import User
+from .serializers import UserSerializer
+
+
+class UserListService:
+    """
+    Service to read the user list as plain rows, a page or an export at a time.
+
+    Rows come from `.values()` with only the requested fields. Exports walk
+    the table in id order in fixed-size keyset batches, so memory stays
+    constant on every database (MySQL does not stream `.iterator()` results).
+    """
+    FIELDS = tuple(UserSerializer.Meta.fields)
+    EXPORT_FORMATS = ('json', 'ndjson')
+    EXPORT_CHUNK_SIZE = 2000
+
+    def parse_fields(self, value):
+        """
+        Return the requested fields of a comma-separated list (all fields if
+        empty), or None if one of them is unknown
+        """
+        if not value:
+            return self.FIELDS
+        fields = tuple(dict.fromkeys(field.strip() for field in value.split(',') if field.strip()))
+        if not fields or any(field not in self.FIELDS for field in fields):
+            return None
+        return fields
+
+    def get_queryset(self, fields):
+        # id is always read for keyset paging and dropped again by select()
+        return User.objects.values('id', *fields)
+
+    def select(self, rows, fields):
+        """
+        Return the rows with only the requested fields, in request order
+        """
+        return [{field: row[field] for field in fields} for row in rows]
+
+    def batches(self, fields, chunk_size=None):
+        """
+        Yield lists of rows of all users in id order
+        """
+        chunk_size = chunk_size or self.EXPORT_CHUNK_SIZE
+        queryset = self.get_queryset(fields).order_by('id')
+        last_id = 0
+        while True:
+            rows = list(queryset.filter(id__gt=last_id)[:chunk_size])
+            if not rows:
+                return
+            last_id = rows[-1]['id']
+            yield self.select(rows, fields)
+
+    def export(self, fields, export_format, chunk_size=None):
+        """
+        Yield the encoded export, one chunk of bytes per batch
+        """
+        encoder = JSONEncoder()
+        if export_format == 'ndjson':
+            for rows in self.batches(fields, chunk_size):
+                yield ''.join(encoder.encode(row) + '\n' for row in rows).encode()
+            return
+
+        yield b'['
+        separator = ''
+        for rows in self.batches(fields, chunk_size):
+            yield (separator + ','.join(encoder.encode(row) for row in rows)).encode()
+            separator = ','
+        yield b']'
+
+    async def aexport(self, fields, export_format, chunk_size=None):
+        """
+        Async version of export() for ASGI servers, which would otherwise
+        read a synchronous iterator into memory before sending it
+        """
+        chunks = self.export(fields, export_format, chunk_size)
+        while True:
+            chunk = await sync_to_async(next)(chunks, None)
+            if chunk is None:
+                return
+            yield chunk
+
+    @staticmethod
+    def content_type(export_format):
+        return 'application/x-ndjson' if export_format == 'ndjson' else 'application/json'
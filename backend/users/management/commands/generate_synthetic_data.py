@@ -0,0 +1,267 @@
+import multiprocessing
+import random
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+from incidents.allocators import SequenceIncidentIdAllocator, get_incident_id_allocator
+from incidents.models import Incident
+
+User = get_user_model()
+
+SAMPLE_DETAILS = [
+    'Server downtime reported in production environment.',
+    'Database connectivity issues causing delays in portal access.',
+    'Email system experiencing intermittent failures.',
+    'Security alert raised by the authentication system.',
+    'Network latency reported across multiple locations.',
+]
+
+# Per-process state set up by _init_worker
+_worker = {}
+
+
+@contextmanager
+def explicit_timestamps():
+    """
+    Let bulk_create keep the reported/updated dates set on the instances
+    """
+    fields = [Incident._meta.get_field(name) for name in ('reported_date', 'updated_date')]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _init_worker(state):
+    # Forked workers must not share the parent's database connections
+    connections.close_all()
+    _worker.clear()
+    _worker.update(state)
+    _worker['allocator'] = get_incident_id_allocator()
+
+
+def _weighted(rng, weights):
+    return rng.choices(weights[0], weights[1])[0]
+
+
+def _insert_chunk(task):
+    """
+    Insert one chunk of incidents and return (inserted, skipped)
+    """
+    index, year, window_start, window_end, start, end = task
+    rng = random.Random(_worker['seed'] * 1000003 + index)
+    allocator = _worker['allocator']
+    user_ids, heavy_count = _worker['user_ids'], _worker['heavy_count']
+    now = _worker['now']
+
+    candidates = [allocator.format_id(allocator.permute(number, year), year) for number in range(start, end)]
+    taken = set()
+    for offset in range(0, len(candidates), 500):
+        taken.update(
+            Incident.objects.filter(incident_id__in=candidates[offset:offset + 500])
+            .values_list('incident_id', flat=True)
+        )
+
+    incidents = []
+    span = (window_end - window_start).total_seconds()
+    for incident_id in candidates:
+        if incident_id in taken:
+            continue
+        if heavy_count < len(user_ids) and rng.random() >= _worker['heavy_share']:
+            reporter_id = user_ids[rng.randrange(heavy_count, len(user_ids))]
+        else:
+            reporter_id = user_ids[rng.randrange(heavy_count)]
+        status = _weighted(rng, _worker['status_weights'])
+        reported_date = window_start + timedelta(seconds=rng.random() * span)
+        updated_date = reported_date
+        if status != 'OPEN':
+            updated_date = min(reported_date + timedelta(seconds=rng.random() * 30 * 86400), now)
+        incidents.append(Incident(
+            incident_id=incident_id,
+            reporter_id=reporter_id,
+            reporter_type=('ENTERPRISE', 'GOVERNMENT')[reporter_id % 2],
+            incident_details=rng.choice(SAMPLE_DETAILS),
+            priority=_weighted(rng, _worker['priority_weights']),
+            status=status,
+            reported_date=reported_date,
+            updated_date=updated_date,
+        ))
+
+    with explicit_timestamps():
+        Incident.objects.bulk_create(incidents, batch_size=1000)
+    return len(incidents), len(taken)
+
+
+class Command(BaseCommand):
+    help = 'Generate production-scale synthetic users and incidents with bulk inserts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000,
+                            help='Number of users to create')
+        parser.add_argument('--incidents', type=int, default=100000,
+                            help='Number of incidents to create')
+        parser.add_argument('--heavy-reporters', type=float, default=0.01,
+                            help='Fraction of users that are heavy reporters')
+        parser.add_argument('--heavy-share', type=float, default=0.5,
+                            help='Fraction of incidents filed by the heavy reporters')
+        parser.add_argument('--priority-weights', default='HIGH=20,MEDIUM=50,LOW=30',
+                            help='Relative priority weights, e.g. HIGH=20,MEDIUM=50,LOW=30')
+        parser.add_argument('--status-weights', default='OPEN=30,IN_PROGRESS=20,CLOSED=50',
+                            help='Relative status weights, e.g. OPEN=30,IN_PROGRESS=20,CLOSED=50')
+        parser.add_argument('--years', type=int, default=3,
+                            help='Spread reported dates over this many years up to now')
+        parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count(),
+                            help='Worker processes inserting incidents')
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Incidents per worker task')
+        parser.add_argument('--prefix', default='synthetic',
+                            help='Username/email prefix of generated users')
+        parser.add_argument('--password', default='testpass123',
+                            help='Password of every generated user')
+        parser.add_argument('--seed', type=int, default=42,
+                            help='Random seed; the same seed gives the same data')
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['incidents'] < 0 or options['years'] < 1:
+            raise CommandError('--users and --years must be at least 1 and --incidents non-negative')
+        if not 0 < options['heavy_reporters'] <= 1 or not 0 <= options['heavy_share'] <= 1:
+            raise CommandError('--heavy-reporters must be in (0, 1] and --heavy-share in [0, 1]')
+
+        allocator = get_incident_id_allocator()
+        if not isinstance(allocator, SequenceIncidentIdAllocator):
+            raise CommandError(
+                'Pre-assigning incident IDs needs a sequence-based INCIDENT_ID_ALLOCATOR'
+            )
+
+        priority_weights = self.parse_weights(options['priority_weights'], Incident.PRIORITY_CHOICES)
+        status_weights = self.parse_weights(options['status_weights'], Incident.STATUS_CHOICES)
+        now = timezone.now()
+        plan = self.plan_years(now, options['years'], options['incidents'])
+
+        # Fail before writing anything if a year cannot take its share
+        for year, _, _, count in plan:
+            remaining = allocator.remaining(year)
+            if count > remaining:
+                raise CommandError(
+                    f'{year} needs {count} incident IDs but only {remaining} are left '
+                    f'(capacity is {allocator.CAPACITY} per year)'
+                )
+
+        started = time.perf_counter()
+        user_ids = self.create_users(options)
+        self.stdout.write(f'Created {len(user_ids)} users')
+
+        tasks = []
+        for year, window_start, window_end, count in plan:
+            if not count:
+                continue
+            numbers = allocator.lease(year, count)
+            for start in range(numbers.start, numbers.stop, options['batch_size']):
+                end = min(start + options['batch_size'], numbers.stop)
+                tasks.append((len(tasks), year, window_start, window_end, start, end))
+
+        state = {
+            'seed': options['seed'],
+            'user_ids': user_ids,
+            'heavy_count': max(1, round(len(user_ids) * options['heavy_reporters'])),
+            'heavy_share': options['heavy_share'],
+            'priority_weights': priority_weights,
+            'status_weights': status_weights,
+            'now': now,
+        }
+        inserted, skipped = self.run_tasks(tasks, state, options['workers'])
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {inserted} incidents in {elapsed:.1f}s ({inserted / max(elapsed, 1e-9):,.0f}/s)'
+        ))
+        if skipped:
+            self.stdout.write(f'Skipped {skipped} IDs already used by existing incidents')
+        self.stdout.write(
+            'Bulk inserts bypass model signals; run rebuild_search_index and rebuild_incident_rollups.'
+        )
+
+    def parse_weights(self, value, choices):
+        valid = [choice for choice, _ in choices]
+        weights = {}
+        for item in value.split(','):
+            name, _, weight = item.partition('=')
+            name = name.strip().upper()
+            if name not in valid:
+                raise CommandError(f'Unknown choice "{name}"; expected one of {", ".join(valid)}')
+            try:
+                weights[name] = float(weight)
+            except ValueError:
+                raise CommandError(f'Invalid weight for {name}: "{weight}"')
+        if sum(weights.values()) <= 0:
+            raise CommandError(f'Weights must not all be zero: "{value}"')
+        return list(weights), list(weights.values())
+
+    def plan_years(self, now, years, total):
+        """
+        Split the incidents over calendar years in proportion to their share of the window
+        """
+        window_start = now - timedelta(days=365 * years)
+        windows = []
+        for year in range(window_start.year, now.year + 1):
+            start = max(window_start, datetime(year, 1, 1, tzinfo=dt_timezone.utc))
+            end = min(now, datetime(year + 1, 1, 1, tzinfo=dt_timezone.utc))
+            if end > start:
+                windows.append((year, start, end))
+
+        span = (now - window_start).total_seconds()
+        shares = [total * (end - start).total_seconds() / span for _, start, end in windows]
+        counts = [int(share) for share in shares]
+        # Hand out the rounding remainder to the largest fractions
+        by_fraction = sorted(range(len(shares)), key=lambda i: shares[i] - counts[i], reverse=True)
+        for i in by_fraction[:total - sum(counts)]:
+            counts[i] += 1
+        return [(year, start, end, count) for (year, start, end), count in zip(windows, counts)]
+
+    def create_users(self, options):
+        """
+        Bulk create users sharing one password hash and return all their ids
+        """
+        prefix = options['prefix']
+        existing = User.objects.filter(username__startswith=f'{prefix}_').count()
+        password = make_password(options['password'])
+
+        batch_size = options['batch_size']
+        for offset in range(existing, existing + options['users'], batch_size):
+            User.objects.bulk_create([
+                User(
+                    username=f'{prefix}_{number}',
+                    email=f'{prefix}_{number}@example.com',
+                    first_name='Synthetic',
+                    last_name=f'User {number}',
+                    password=password,
+                )
+                for number in range(offset, min(offset + batch_size, existing + options['users']))
+            ], batch_size=1000)
+
+        return list(
+            User.objects.filter(username__startswith=f'{prefix}_')
+            .order_by('id').values_list('id', flat=True)[existing:]
+        )
+
+    def run_tasks(self, tasks, state, workers):
+        if workers > 1 and len(tasks) > 1 and 'fork' in multiprocessing.get_all_start_methods():
+            connections.close_all()
+            context = multiprocessing.get_context('fork')
+            with context.Pool(min(workers, len(tasks)), _init_worker, (state,)) as pool:
+                results = pool.map(_insert_chunk, tasks, chunksize=1)
+        else:
+            _worker.clear()
+            _worker.update(state)
+            _worker['allocator'] = get_incident_id_allocator()
+            results = [_insert_chunk(task) for task in tasks]
+        return sum(result[0] for result in results), sum(result[1] for result in results)
@@ -1,85 +1,258 @@
-from django.core.management.base import BaseCommand
+import csv
+import json
+import os
+import time
+from itertools import islice
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
 from users.models import PincodeData
+from users.pincode_index import get_pincode_index
 
 
 class Command(BaseCommand):
-    help = 'Load sample pincode data for testing'
+    help = 'Load pincode data from the built-in sample or stream it from a CSV/NDJSON file'
 
-    def handle(self, *args, **options):
-        # Sample Indian pincode data
-        pincode_data = [
-            # Delhi
-            {"pincode": "110001", "city": "New Delhi", "state": "Delhi", "country": "India"},
-            {"pincode": "110002", "city": "New Delhi", "state": "Delhi", "country": "India"},
-            {"pincode": "110003", "city": "New Delhi", "state": "Delhi", "country": "India"},
-            {"pincode": "110004", "city": "New Delhi", "state": "Delhi", "country": "India"},
-            {"pincode": "110005", "city": "New Delhi", "state": "Delhi", "country": "India"},
-            
-            # Mumbai
-            {"pincode": "400001", "city": "Mumbai", "state": "Maharashtra", "country": "India"},
-            {"pincode": "400002", "city": "Mumbai", "state": "Maharashtra", "country": "India"},
-            {"pincode": "400003", "city": "Mumbai", "state": "Maharashtra", "country": "India"},
-            {"pincode": "400004", "city": "Mumbai", "state": "Maharashtra", "country": "India"},
-            {"pincode": "400005", "city": "Mumbai", "state": "Maharashtra", "country": "India"},
-            
-            # Bangalore
-            {"pincode": "560001", "city": "Bangalore", "state": "Karnataka", "country": "India"},
-            {"pincode": "560002", "city": "Bangalore", "state": "Karnataka", "country": "India"},
-            {"pincode": "560003", "city": "Bangalore", "state": "Karnataka", "country": "India"},
-            {"pincode": "560004", "city": "Bangalore", "state": "Karnataka", "country": "India"},
-            {"pincode": "560005", "city": "Bangalore", "state": "Karnataka", "country": "India"},
-            
-            # Chennai
-            {"pincode": "600001", "city": "Chennai", "state": "Tamil Nadu", "country": "India"},
-            {"pincode": "600002", "city": "Chennai", "state": "Tamil Nadu", "country": "India"},
-            {"pincode": "600003", "city": "Chennai", "state": "Tamil Nadu", "country": "India"},
-            {"pincode": "600004", "city": "Chennai", "state": "Tamil Nadu", "country": "India"},
-            {"pincode": "600005", "city": "Chennai", "state": "Tamil Nadu", "country": "India"},
-            
-            # Hyderabad
-            {"pincode": "500001", "city": "Hyderabad", "state": "Telangana", "country": "India"},
-            {"pincode": "500002", "city": "Hyderabad", "state": "Telangana", "country": "India"},
-            {"pincode": "500003", "city": "Hyderabad", "state": "Telangana", "country": "India"},
-            {"pincode": "500004", "city": "Hyderabad", "state": "Telangana", "country": "India"},
-            {"pincode": "500005", "city": "Hyderabad", "state": "Telangana", "country": "India"},
-            
-            # Pune
-            {"pincode": "411001", "city": "Pune", "state": "Maharashtra", "country": "India"},
-            {"pincode": "411002", "city": "Pune", "state": "Maharashtra", "country": "India"},
-            {"pincode": "411003", "city": "Pune", "state": "Maharashtra", "country": "India"},
-            {"pincode": "411004", "city": "Pune", "state": "Maharashtra", "country": "India"},
-            {"pincode": "411005", "city": "Pune", "state": "Maharashtra", "country": "India"},
-            
-            # Kolkata
-            {"pincode": "700001", "city": "Kolkata", "state": "West Bengal", "country": "India"},
-            {"pincode": "700002", "city": "Kolkata", "state": "West Bengal", "country": "India"},
-            {"pincode": "700003", "city": "Kolkata", "state": "West Bengal", "country": "India"},
-            {"pincode": "700004", "city": "Kolkata", "state": "West Bengal", "country": "India"},
-            {"pincode": "700005", "city": "Kolkata", "state": "West Bengal", "country": "India"},
-            
-            # Ahmedabad
-            {"pincode": "380001", "city": "Ahmedabad", "state": "Gujarat", "country": "India"},
-            {"pincode": "380002", "city": "Ahmedabad", "state": "Gujarat", "country": "India"},
-            {"pincode": "380003", "city": "Ahmedabad", "state": "Gujarat", "country": "India"},
-            {"pincode": "380004", "city": "Ahmedabad", "state": "Gujarat", "country": "India"},
-            {"pincode": "380005", "city": "Ahmedabad", "state": "Gujarat", "country": "India"},
-        ]
+    # Sample Indian pincode data, loaded when no --file is given
+    SAMPLE_PINCODE_DATA = [
+        # Delhi
+        {"pincode": "110001", "city": "New Delhi", "state": "Delhi", "country": "India"},
+        {"pincode": "110002", "city": "New Delhi", "state": "Delhi", "country": "India"},
+        {"pincode": "110003", "city": "New Delhi", "state": "Delhi", "country": "India"},
+        {"pincode": "110004", "city": "New Delhi", "state": "Delhi", "country": "India"},
+        {"pincode": "110005", "city": "New Delhi", "state": "Delhi", "country": "India"},
         
-        created_count = 0
-        for data in pincode_data:
-            obj, created = PincodeData.objects.get_or_create(
-                pincode=data['pincode'],
-                defaults={
-                    'city': data['city'],
-                    'state': data['state'],
-                    'country': data['country']
-                }
-            )
-            if created:
-                created_count += 1
+        # Mumbai
+        {"pincode": "400001", "city": "Mumbai", "state": "Maharashtra", "country": "India"},
+        {"pincode": "400002", "city": "Mumbai", "state": "Maharashtra", "country": "India"},
+        {"pincode": "400003", "city": "Mumbai", "state": "Maharashtra", "country": "India"},
+        {"pincode": "400004", "city": "Mumbai", "state": "Maharashtra", "country": "India"},
+        {"pincode": "400005", "city": "Mumbai", "state": "Maharashtra", "country": "India"},
+        
+        # Bangalore
+        {"pincode": "560001", "city": "Bangalore", "state": "Karnataka", "country": "India"},
+        {"pincode": "560002", "city": "Bangalore", "state": "Karnataka", "country": "India"},
+        {"pincode": "560003", "city": "Bangalore", "state": "Karnataka", "country": "India"},
+        {"pincode": "560004", "city": "Bangalore", "state": "Karnataka", "country": "India"},
+        {"pincode": "560005", "city": "Bangalore", "state": "Karnataka", "country": "India"},
+        
+        # Chennai
+        {"pincode": "600001", "city": "Chennai", "state": "Tamil Nadu", "country": "India"},
+        {"pincode": "600002", "city": "Chennai", "state": "Tamil Nadu", "country": "India"},
+        {"pincode": "600003", "city": "Chennai", "state": "Tamil Nadu", "country": "India"},
+        {"pincode": "600004", "city": "Chennai", "state": "Tamil Nadu", "country": "India"},
+        {"pincode": "600005", "city": "Chennai", "state": "Tamil Nadu", "country": "India"},
+        
+        # Hyderabad
+        {"pincode": "500001", "city": "Hyderabad", "state": "Telangana", "country": "India"},
+        {"pincode": "500002", "city": "Hyderabad", "state": "Telangana", "country": "India"},
+        {"pincode": "500003", "city": "Hyderabad", "state": "Telangana", "country": "India"},
+        {"pincode": "500004", "city": "Hyderabad", "state": "Telangana", "country": "India"},
+        {"pincode": "500005", "city": "Hyderabad", "state": "Telangana", "country": "India"},
         
-        self.stdout.write(
-            self.style.SUCCESS(
-                f'Successfully loaded {created_count} pincode records'
+        # Pune
+        {"pincode": "411001", "city": "Pune", "state": "Maharashtra", "country": "India"},
+        {"pincode": "411002", "city": "Pune", "state": "Maharashtra", "country": "India"},
+        {"pincode": "411003", "city": "Pune", "state": "Maharashtra", "country": "India"},
+        {"pincode": "411004", "city": "Pune", "state": "Maharashtra", "country": "India"},
+        {"pincode": "411005", "city": "Pune", "state": "Maharashtra", "country": "India"},
+        
+        # Kolkata
+        {"pincode": "700001", "city": "Kolkata", "state": "West Bengal", "country": "India"},
+        {"pincode": "700002", "city": "Kolkata", "state": "West Bengal", "country": "India"},
+        {"pincode": "700003", "city": "Kolkata", "state": "West Bengal", "country": "India"},
+        {"pincode": "700004", "city": "Kolkata", "state": "West Bengal", "country": "India"},
+        {"pincode": "700005", "city": "Kolkata", "state": "West Bengal", "country": "India"},
+        
+        # Ahmedabad
+        {"pincode": "380001", "city": "Ahmedabad", "state": "Gujarat", "country": "India"},
+        {"pincode": "380002", "city": "Ahmedabad", "state": "Gujarat", "country": "India"},
+        {"pincode": "380003", "city": "Ahmedabad", "state": "Gujarat", "country": "India"},
+        {"pincode": "380004", "city": "Ahmedabad", "state": "Gujarat", "country": "India"},
+        {"pincode": "380005", "city": "Ahmedabad", "state": "Gujarat", "country": "India"},
+    ]
+
+    # Accepted source column names for each PincodeData field
+    FIELD_ALIASES = {
+        'pincode': ('pincode', 'pin', 'pin_code'),
+        'city': ('city', 'district', 'districtname', 'district_name'),
+        'state': ('state', 'statename', 'state_name'),
+        'country': ('country',),
+    }
+    UPDATE_FIELDS = ['city', 'state', 'country']
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', help='CSV or NDJSON file to import')
+        parser.add_argument('--format', choices=['csv', 'ndjson'],
+                            help='File format (inferred from the extension by default)')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Rows per upsert batch')
+        parser.add_argument('--default-country', default='India',
+                            help='Country for rows without a country column')
+        parser.add_argument('--checkpoint', help='File recording how many source rows were imported')
+        parser.add_argument('--resume', action='store_true',
+                            help='Skip the source rows recorded in --checkpoint')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Report differences against pincode_data without writing')
+        parser.add_argument('--show-diffs', type=int, default=20,
+                            help='Maximum number of changed rows to print in --dry-run mode')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] <= 0:
+            raise CommandError('--batch-size must be positive')
+        if options['resume'] and not options['checkpoint']:
+            raise CommandError('--resume requires --checkpoint')
+
+        source = os.path.abspath(options['file']) if options['file'] else 'sample'
+        skip = self.read_checkpoint(options['checkpoint'], source) if options['resume'] else 0
+        rows = islice(self.read_rows(options), skip, None)
+        if skip:
+            self.stdout.write(f'Resuming after {skip} rows')
+
+        self.totals = {'rows': skip, 'skipped': 0, 'new': 0, 'changed': 0, 'unchanged': 0, 'written': 0}
+        self.diffs_shown = 0
+        start = time.perf_counter()
+
+        while True:
+            batch = list(islice(rows, options['batch_size']))
+            if not batch:
+                break
+
+            records = self.normalize_batch(batch, options['default_country'])
+            if options['dry_run']:
+                self.diff_batch(records, options['show_diffs'])
+            else:
+                self.upsert_batch(records)
+
+            self.totals['rows'] += len(batch)
+            if options['checkpoint'] and not options['dry_run']:
+                self.write_checkpoint(options['checkpoint'], source, self.totals['rows'])
+
+            elapsed = time.perf_counter() - start
+            processed = self.totals['rows'] - skip
+            self.stdout.write(
+                f'{self.totals["rows"]} rows processed ({processed / elapsed if elapsed else 0:,.0f} rows/sec)'
             )
-        )
\ No newline at end of file
+
+        if self.totals['written']:
+            # bulk_create() skips signals, so publish the change explicitly
+            get_pincode_index().bump_version()
+
+        self.report(options['dry_run'], time.perf_counter() - start, skip)
+
+    def read_rows(self, options):
+        """
+        Yield source rows as dicts without loading the whole file
+        """
+        if not options['file']:
+            yield from self.SAMPLE_PINCODE_DATA
+            return
+
+        path = options['file']
+        file_format = options['format'] or ('ndjson' if path.endswith(('.ndjson', '.jsonl', '.json')) else 'csv')
+        try:
+            handle = open(path, newline='', encoding='utf-8-sig')
+        except OSError as exc:
+            raise CommandError(f'Cannot open {path}: {exc}')
+
+        with handle:
+            if file_format == 'csv':
+                yield from csv.DictReader(handle)
+            else:
+                for line_number, line in enumerate(handle, start=1):
+                    if not line.strip():
+                        continue
+                    try:
+                        row = json.loads(line)
+                    except ValueError:
+                        raise CommandError(f'Invalid JSON on line {line_number} of {path}')
+                    if not isinstance(row, dict):
+                        raise CommandError(
+                            f'Line {line_number} of {path} is not a JSON object '
+                            f'(NDJSON files hold one object per line, not an array)'
+                        )
+                    yield row
+
+    def normalize_batch(self, batch, default_country):
+        """
+        Map source columns to PincodeData fields, dropping invalid rows and
+        keeping the last row for repeated pincodes
+        """
+        records = {}
+        for row in batch:
+            row = {str(key).strip().lower(): value for key, value in row.items() if key is not None}
+            record = {}
+            for field, aliases in self.FIELD_ALIASES.items():
+                value = next((row[alias] for alias in aliases if row.get(alias) not in (None, '')), '')
+                record[field] = str(value).strip()
+            record['country'] = record['country'] or default_country
+
+            if not record['pincode'] or not record['city'] or not record['state']:
+                self.totals['skipped'] += 1
+                continue
+            records[record['pincode']] = record
+        return records
+
+    def upsert_batch(self, records):
+        kwargs = {'update_conflicts': True, 'update_fields': self.UPDATE_FIELDS}
+        if connection.features.supports_update_conflicts_with_target:
+            kwargs['unique_fields'] = ['pincode']
+
+        with transaction.atomic():
+            PincodeData.objects.bulk_create([PincodeData(**record) for record in records.values()], **kwargs)
+        self.totals['written'] += len(records)
+
+    def diff_batch(self, records, show_diffs):
+        existing = PincodeData.objects.in_bulk(list(records), field_name='pincode')
+        for pincode, record in records.items():
+            current = existing.get(pincode)
+            if current is None:
+                self.totals['new'] += 1
+                continue
+
+            changes = {
+                field: (getattr(current, field), record[field])
+                for field in self.UPDATE_FIELDS
+                if getattr(current, field) != record[field]
+            }
+            if not changes:
+                self.totals['unchanged'] += 1
+                continue
+
+            self.totals['changed'] += 1
+            if self.diffs_shown < show_diffs:
+                self.diffs_shown += 1
+                details = ', '.join(f'{field}: {old!r} -> {new!r}' for field, (old, new) in changes.items())
+                self.stdout.write(f'  ~ {pincode}: {details}')
+
+    def read_checkpoint(self, path, source):
+        try:
+            with open(path) as handle:
+                checkpoint = json.load(handle)
+        except FileNotFoundError:
+            return 0
+        except ValueError:
+            raise CommandError(f'Checkpoint {path} is not valid JSON')
+
+        if checkpoint.get('source') != source:
+            raise CommandError(f'Checkpoint {path} belongs to {checkpoint.get("source")}, not {source}')
+        return checkpoint.get('rows', 0)
+
+    def write_checkpoint(self, path, source, rows):
+        temporary = f'{path}.tmp'
+        with open(temporary, 'w') as handle:
+            json.dump({'source': source, 'rows': rows}, handle)
+        os.replace(temporary, path)
+
+    def report(self, dry_run, elapsed, skip):
+        totals = self.totals
+        rate = (totals['rows'] - skip) / elapsed if elapsed else 0
+        if dry_run:
+            self.stdout.write(self.style.SUCCESS(
+                f'Dry run: {totals["new"]} new, {totals["changed"]} changed, '
+                f'{totals["unchanged"]} unchanged, {totals["skipped"]} invalid rows skipped'
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f'Successfully loaded {totals["written"]} pincode records '
+                f'({totals["skipped"]} invalid rows skipped, {rate:,.0f} rows/sec)'
+            ))
@@ -0,0 +1,44 @@
+import random
+import time
+from django.core.management.base import BaseCommand
+from users.pincode_index import PincodeIndex
+
+
+class Command(BaseCommand):
+    help = 'Load the in-memory pincode index and report its memory footprint'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--synthetic', type=int, metavar='N',
+            help='Build the index from N generated offices instead of the pincode_data table'
+        )
+
+    def synthetic_rows(self, count):
+        """
+        Generate rows shaped like the national dataset (~750 districts, 36 states)
+        """
+        rng = random.Random(0)
+        states = [f'State {number}' for number in range(36)]
+        districts = [(f'District {number}', rng.choice(states)) for number in range(750)]
+        pincodes = rng.sample(range(110001, 855118), count)
+        for pincode in pincodes:
+            district, state = rng.choice(districts)
+            yield str(pincode), district, state, 'India'
+
+    def handle(self, *args, **options):
+        index = PincodeIndex()
+        rows = self.synthetic_rows(options['synthetic']) if options['synthetic'] else None
+        
+        start = time.perf_counter()
+        index.load(rows)
+        elapsed = time.perf_counter() - start
+        
+        footprint = index.memory_footprint()
+        self.stdout.write(f'Entries: {footprint["entries"]}')
+        self.stdout.write(f'Interned strings: {footprint["strings"]}')
+        self.stdout.write(f'Arrays: {footprint["arrays_bytes"]:,} bytes')
+        self.stdout.write(f'String table: {footprint["strings_bytes"]:,} bytes')
+        self.stdout.write(f'Overflow: {footprint["overflow_bytes"]:,} bytes')
+        self.stdout.write(self.style.SUCCESS(
+            f'Total: {footprint["total_bytes"] / 1024:,.1f} KiB, loaded in {elapsed * 1000:.0f} ms'
+        ))
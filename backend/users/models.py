@@ -1,7 +1,32 @@
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager
 from django.db import models
 
 
+class UserQuerySet(models.QuerySet):
+    """
+    User queryset whose update() announces the changed users, so caches of
+    user rows can be dropped without post_save
+    """
+    def update(self, **kwargs):
+        """
+        Update the users and send users_updated with their ids, unless only
+        activity timestamps change
+        """
+        if set(kwargs) <= set(User.ACTIVITY_FIELDS):
+            return super().update(**kwargs)
+        from .signals import users_updated
+        user_ids = list(self.values_list('pk', flat=True))
+        rows = super().update(**kwargs)
+        users_updated.send(sender=self.model, user_ids=user_ids)
+        return rows
+
+
+class CustomUserManager(UserManager.from_queryset(UserQuerySet)):
+    """
+    UserManager returning UserQuerySet querysets
+    """
+
+
 class User(AbstractUser):
     """
     Custom User model with additional fields for incident management system
@@ -16,7 +41,14 @@ class User(AbstractUser):
     # Additional fields for user management
     is_active = models.BooleanField(default=True)
     date_joined = models.DateTimeField(auto_now_add=True)
-    last_login = models.DateTimeField(auto_now=True)
+    
+    # Activity timestamps are written in batches by users.activity
+    last_login = models.DateTimeField(blank=True, null=True)
+    last_seen = models.DateTimeField(blank=True, null=True)
+    
+    ACTIVITY_FIELDS = ('last_login', 'last_seen')
+    
+    objects = CustomUserManager()
     
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username', 'first_name', 'last_name']
@@ -24,6 +56,18 @@ class User(AbstractUser):
     def __str__(self):
         return f"{self.first_name} {self.last_name} ({self.email})"
     
+    def save(self, *args, **kwargs):
+        """
+        Save the user without the activity timestamps unless they are named in
+        update_fields, so a stale instance never overwrites flushed activity
+        """
+        if not self._state.adding and not args and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.attname for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.ACTIVITY_FIELDS
+            ]
+        super().save(*args, **kwargs)
+    
     class Meta:
         db_table = 'users'
         verbose_name = 'User'
@@ -0,0 +1,221 @@
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from django.conf import settings
+from django.core.cache import caches
+from .models import PincodeData
+
+
+class PincodeIndex:
+    """
+    Compact in-memory copy of the pincode_data table.
+
+    Numeric pincodes are kept in a sorted array of unsigned ints with parallel
+    16-bit arrays pointing into one interned string table for city, state and
+    country, so a lookup is a binary search with no database access. Updates,
+    deletes and bulk imports bump a version number in the Django cache; every
+    index notices the new version and reloads itself on its next lookup.
+    Indexes in other processes only see the new version when that cache is
+    shared between them. New rows are added to this process's index directly,
+    without a version bump, so they do not discard anything cached.
+    """
+    VERSION_CACHE_KEY = 'pincode_index_version'
+
+    def __init__(self, version_cache_alias='default', check_interval=None):
+        self.version_cache = caches[version_cache_alias]
+        if check_interval is None:
+            check_interval = getattr(settings, 'PINCODE_INDEX_CHECK_INTERVAL', 5)
+        self.check_interval = check_interval
+        self.loaded_version = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._reset()
+
+    def _reset(self, string_typecode='H'):
+        self._codes = array('I')
+        self._cities = array(string_typecode)
+        self._states = array(string_typecode)
+        self._countries = array(string_typecode)
+        self._strings = []
+        self._overflow = {}
+
+    def load(self, rows=None):
+        """
+        Build the index from (pincode, city, state, country) rows, read from
+        the database when no rows are given
+        """
+        version = self.current_version()
+        if rows is None:
+            rows = PincodeData.objects.values_list(
+                'pincode', 'city', 'state', 'country'
+            ).iterator(chunk_size=5000)
+
+        string_ids = {}
+
+        def intern(value):
+            string_id = string_ids.get(value)
+            if string_id is None:
+                string_id = string_ids[value] = len(string_ids)
+            return string_id
+
+        entries = []
+        overflow = {}
+        for pincode, city, state, country in rows:
+            if pincode.isdigit() and not pincode.startswith('0') and int(pincode) < 2 ** 32:
+                entries.append((int(pincode), intern(city), intern(state), intern(country)))
+            else:
+                overflow[pincode] = (intern(city), intern(state), intern(country))
+        entries.sort()
+
+        # String ids fit in 16 bits for any realistic dataset
+        string_typecode = 'H' if len(string_ids) <= 0xFFFF else 'I'
+        with self._lock:
+            self._reset(string_typecode)
+            for code, city, state, country in entries:
+                self._codes.append(code)
+                self._cities.append(city)
+                self._states.append(state)
+                self._countries.append(country)
+            self._strings = list(string_ids)
+            self._overflow = overflow
+            self.loaded_version = version
+            self._checked_at = time.monotonic()
+
+    def add(self, pincode, city, state, country):
+        """
+        Add one new row to a loaded index without reloading it
+        """
+        with self._lock:
+            if self.loaded_version is None:
+                return
+            ids = []
+            for value in (city, state, country):
+                try:
+                    ids.append(self._strings.index(value))
+                except ValueError:
+                    ids.append(len(self._strings))
+                    self._strings.append(value)
+
+            if not (pincode.isdigit() and not pincode.startswith('0') and int(pincode) < 2 ** 32):
+                self._overflow[pincode] = tuple(ids)
+                return
+            if max(ids) >= 1 << (8 * self._cities.itemsize):
+                # The string ids outgrew their column type, so rebuild it
+                self.loaded_version = None
+                return
+
+            code = int(pincode)
+            position = bisect_left(self._codes, code)
+            if position < len(self._codes) and self._codes[position] == code:
+                self._cities[position], self._states[position], self._countries[position] = ids
+                return
+            self._codes.insert(position, code)
+            self._cities.insert(position, ids[0])
+            self._states.insert(position, ids[1])
+            self._countries.insert(position, ids[2])
+
+    def lookup(self, pincode):
+        """
+        Return the pincode data dict, or None if the pincode is not indexed
+        """
+        self.ensure_current()
+
+        with self._lock:
+            if pincode.isdigit() and not pincode.startswith('0'):
+                code = int(pincode)
+                position = bisect_left(self._codes, code)
+                if position == len(self._codes) or self._codes[position] != code:
+                    return None
+                ids = (self._cities[position], self._states[position], self._countries[position])
+            else:
+                ids = self._overflow.get(pincode)
+                if ids is None:
+                    return None
+
+            return {
+                'pincode': pincode,
+                'city': self._strings[ids[0]],
+                'state': self._strings[ids[1]],
+                'country': self._strings[ids[2]],
+            }
+
+    def ensure_current(self):
+        """
+        Reload the index if it was never loaded or its version is outdated
+        """
+        if self.loaded_version is not None:
+            if time.monotonic() - self._checked_at < self.check_interval:
+                return
+            self._checked_at = time.monotonic()
+            if self.current_version() == self.loaded_version:
+                return
+        with self._load_lock:
+            # Another thread may have reloaded the index while this one waited
+            if self.loaded_version is not None and self.current_version() == self.loaded_version:
+                return
+            self.load()
+
+    def current_version(self):
+        return self.version_cache.get(self.VERSION_CACHE_KEY, 0)
+
+    def bump_version(self):
+        """
+        Publish a new version so that every index reloads
+        """
+        try:
+            self.version_cache.incr(self.VERSION_CACHE_KEY)
+        except ValueError:
+            self.version_cache.set(self.VERSION_CACHE_KEY, 1, None)
+        self._checked_at = 0.0
+
+    def memory_footprint(self):
+        """
+        Return the approximate memory used by the index in bytes
+        """
+        with self._lock:
+            arrays = sum(
+                sys.getsizeof(column)
+                for column in (self._codes, self._cities, self._states, self._countries)
+            )
+            strings = sys.getsizeof(self._strings) + sum(sys.getsizeof(s) for s in self._strings)
+            overflow = sys.getsizeof(self._overflow) + sum(
+                sys.getsizeof(key) + sys.getsizeof(value) for key, value in self._overflow.items()
+            )
+            return {
+                'entries': len(self._codes) + len(self._overflow),
+                'strings': len(self._strings),
+                'arrays_bytes': arrays,
+                'strings_bytes': strings,
+                'overflow_bytes': overflow,
+                'total_bytes': arrays + strings + overflow,
+            }
+
+    def __len__(self):
+        return len(self._codes) + len(self._overflow)
+
+
+_pincode_index = None
+_pincode_index_lock = threading.Lock()
+
+
+def get_pincode_index():
+    """
+    Return the process-wide PincodeIndex
+    """
+    global _pincode_index
+    if _pincode_index is None:
+        with _pincode_index_lock:
+            if _pincode_index is None:
+                _pincode_index = PincodeIndex()
+    return _pincode_index
+
+
+def reset_pincode_index():
+    """
+    Drop the process-wide PincodeIndex
+    """
+    global _pincode_index
+    _pincode_index = None
@@ -1,6 +1,11 @@
-import requests
+import threading
+import time
 from django.conf import settings
+from django.core.cache import caches
+from .cache import LRUCache
+from .fetchers import PincodeFetcher
 from .models import PincodeData
+from .pincode_index import get_pincode_index
 
 
 class PincodeService:
@@ -8,17 +13,108 @@ class PincodeService:
     Service to handle pincode lookup and auto-fill city/country
     """
     
-    def __init__(self):
-        # You can add external API URLs here
-        self.external_apis = [
+    def __init__(self, local_cache=None, shared_cache_alias=None, index=None, fetcher=None):
+        # You can add external API URLs here (or via PINCODE_EXTERNAL_APIS)
+        self.external_apis = getattr(settings, 'PINCODE_EXTERNAL_APIS', [
             'https://api.postalpincode.in/pincode/',
             # Add more APIs as needed
-        ]
+        ])
+        self.fetcher = fetcher or PincodeFetcher(
+            self.external_apis, self._parse_api_response,
+            timeout=getattr(settings, 'PINCODE_EXTERNAL_API_TIMEOUT', 5)
+        )
+        
+        # Results are cached in a bounded in-process LRU and, optionally, in a
+        # shared Django cache. Failed lookups are cached for a shorter time.
+        # Keys include the pincode data version (see PincodeIndex), so an
+        # update or delete in pincode_data makes every cached result
+        # unreachable. New rows (e.g. fetched from an external API) keep it.
+        self.cache_timeout = getattr(settings, 'PINCODE_CACHE_TIMEOUT', 86400)
+        self.negative_cache_timeout = getattr(settings, 'PINCODE_NEGATIVE_CACHE_TIMEOUT', 60)
+        if local_cache is None:
+            local_cache = LRUCache(max_size=getattr(settings, 'PINCODE_CACHE_SIZE', 10000))
+        self.local_cache = local_cache
+        self.version_check_interval = getattr(settings, 'PINCODE_INDEX_CHECK_INTERVAL', 5)
+        self._version = None
+        self._version_checked_at = 0.0
+        if shared_cache_alias is None:
+            shared_cache_alias = getattr(settings, 'PINCODE_CACHE_ALIAS', '')
+        self.shared_cache = caches[shared_cache_alias] if shared_cache_alias else None
+        self.shared_hits = 0
+        self.shared_misses = 0
+        self._counter_lock = threading.Lock()
+        
+        # With PINCODE_PRELOAD_INDEX the whole table is served from memory
+        if index is None and getattr(settings, 'PINCODE_PRELOAD_INDEX', False):
+            index = get_pincode_index()
+        self.index = index
     
     def lookup_pincode(self, pincode):
+        """
+        Lookup pincode through the cache tiers, then the local database and external APIs
+        """
+        version = self._data_version()
+        result = self.local_cache.get((version, pincode))
+        if result is not None:
+            return result
+        
+        if self.shared_cache is not None:
+            result = self.shared_cache.get(self._shared_cache_key(pincode, version))
+            with self._counter_lock:
+                if result is not None:
+                    self.shared_hits += 1
+                else:
+                    self.shared_misses += 1
+            if result is not None:
+                self.local_cache.set((version, pincode), result, self._cache_ttl(result))
+                return result
+        
+        result = self._lookup_uncached(pincode)
+        ttl = self._cache_ttl(result)
+        self.local_cache.set((version, pincode), result, ttl)
+        if self.shared_cache is not None:
+            self.shared_cache.set(self._shared_cache_key(pincode, version), result, ttl)
+        return result
+    
+    def cache_stats(self):
+        """
+        Return hit, miss and eviction counters for every cache tier
+        """
+        stats = {'local': self.local_cache.stats()}
+        if self.shared_cache is not None:
+            with self._counter_lock:
+                stats['shared'] = {'hits': self.shared_hits, 'misses': self.shared_misses}
+        stats['upstream'] = self.fetcher.stats()
+        return stats
+    
+    def _cache_ttl(self, result):
+        return self.cache_timeout if result['success'] else self.negative_cache_timeout
+    
+    def _shared_cache_key(self, pincode, version):
+        return f'pincode:{version}:{pincode}'
+    
+    def _data_version(self):
+        """
+        Return the pincode data version, read at most every
+        PINCODE_INDEX_CHECK_INTERVAL seconds
+        """
+        now = time.monotonic()
+        if self._version is None or now - self._version_checked_at >= self.version_check_interval:
+            self._version = get_pincode_index().current_version()
+            self._version_checked_at = now
+        return self._version
+    
+    def _lookup_uncached(self, pincode):
         """
         Lookup pincode from local database first, then external APIs
         """
+        if self.index is not None:
+            # The index mirrors the whole table, so a miss skips the database
+            data = self.index.lookup(pincode)
+            if data is not None:
+                return {'success': True, 'data': data}
+            return self._fetch_from_external_apis(pincode)
+        
         try:
             # First try local database
             pincode_data = PincodeData.objects.get(pincode=pincode)
@@ -39,33 +135,30 @@ class PincodeService:
         """
         Fetch pincode data from external APIs
         """
-        for api_url in self.external_apis:
-            try:
-                response = requests.get(f"{api_url}{pincode}", timeout=5)
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    
-                    # Process API response (this depends on the API structure)
-                    if self._is_valid_response(data):
-                        processed_data = self._process_api_response(data, pincode)
-                        
-                        # Save to local database for future use
-                        self._save_to_local_db(processed_data)
-                        
-                        return {
-                            'success': True,
-                            'data': processed_data
-                        }
-                        
-            except Exception as e:
-                continue
+        processed_data = self.fetcher.fetch(pincode)
+        
+        if processed_data:
+            # Save to local database for future use
+            self._save_to_local_db(processed_data)
+            
+            return {
+                'success': True,
+                'data': processed_data
+            }
         
         return {
             'success': False,
             'error': 'Pincode not found'
         }
     
+    def _parse_api_response(self, data, pincode):
+        """
+        Return processed data for a valid API response, otherwise None
+        """
+        if self._is_valid_response(data):
+            return self._process_api_response(data, pincode)
+        return None
+    
     def _is_valid_response(self, data):
         """
         Check if API response is valid
@@ -128,4 +221,37 @@ class PincodeService:
         """
         Get cities for a specific state
         """
-        return PincodeData.objects.filter(state=state).values_list('city', flat=True).distinct()
\ No newline at end of file
+        return PincodeData.objects.filter(state=state).values_list('city', flat=True).distinct()
+
+
+_pincode_service = None
+_pincode_service_lock = threading.Lock()
+
+
+def get_pincode_service():
+    """
+    Return the process-wide PincodeService so that its caches are shared
+    """
+    global _pincode_service
+    if _pincode_service is None:
+        with _pincode_service_lock:
+            if _pincode_service is None:
+                _pincode_service = PincodeService()
+    return _pincode_service
+
+
+def reset_pincode_service():
+    """
+    Drop the process-wide PincodeService so that it is rebuilt from settings
+    """
+    global _pincode_service
+    _pincode_service = None
+
+
+def preload_pincode_index():
+    """
+    Load the pincode index when PINCODE_PRELOAD_INDEX is set (called on the
+    first request of every process, see users.signals)
+    """
+    if getattr(settings, 'PINCODE_PRELOAD_INDEX', False):
+        get_pincode_index().ensure_current()
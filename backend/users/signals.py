@@ -0,0 +1,68 @@
+from django.core.signals import request_started
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import Signal, receiver
+from rest_framework.authtoken.models import Token
+from .authentication import get_token_cache
+from .models import User, PincodeData
+from .pincode_index import get_pincode_index
+from .services import preload_pincode_index
+
+# Sent after User.objects...update(), where post_save is not sent.
+# Arguments: user_ids (the ids of the updated users).
+users_updated = Signal()
+
+
+@receiver(post_save, sender=PincodeData)
+def pincode_data_saved(sender, instance, created, **kwargs):
+    """
+    Add a new pincode to the in-memory index, or make every index and cached
+    lookup reload after an existing row changes
+    """
+    if created:
+        # Nothing cached can contradict a new row except a short-lived
+        # negative result, so keep every other cached lookup
+        get_pincode_index().add(instance.pincode, instance.city, instance.state, instance.country)
+    else:
+        get_pincode_index().bump_version()
+
+
+@receiver(post_delete, sender=PincodeData)
+def pincode_data_deleted(sender, instance, **kwargs):
+    """
+    Make every in-memory pincode index and cached lookup reload after a delete
+    """
+    get_pincode_index().bump_version()
+
+
+@receiver(request_started, dispatch_uid='users.preload_pincode_index')
+def first_request_started(sender, **kwargs):
+    """
+    Warm the pincode index once per process, on its first request rather
+    than at import time
+    """
+    request_started.disconnect(dispatch_uid='users.preload_pincode_index')
+    preload_pincode_index()
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    """
+    Stop authenticating with a token once it is deleted (e.g. on logout)
+    """
+    get_token_cache().evict_token(instance.key)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, **kwargs):
+    """
+    Drop cached users so deactivation and profile changes apply immediately
+    """
+    get_token_cache().evict_user(instance.pk)
+
+
+@receiver(users_updated, sender=User)
+def users_bulk_updated(sender, user_ids, **kwargs):
+    """
+    Drop cached users after a queryset update (e.g. a bulk deactivation)
+    """
+    get_token_cache().evict_users(user_ids)
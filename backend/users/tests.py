@@ -1,3 +1,622 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+from io import StringIO
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import AsyncClient, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework.authtoken.models import Token
+from incidents.allocators import RandomIncidentIdAllocator, reset_incident_id_allocator
+from incidents.models import Incident, IncidentIdSequence
+from .activity import LoginActivityTracker, get_activity_tracker, reset_activity_tracker
+from .authentication import TokenUserCache, get_token_cache, reset_token_cache
+from .cache import LRUCache
+from .fetchers import PincodeFetcher
+from .listing import UserListService
+from .models import User, PincodeData
+from .pincode_index import PincodeIndex, get_pincode_index, reset_pincode_index
+from .serializers import UserSerializer
+from .services import PincodeService, reset_pincode_service
 
-# Create your tests here.
+
+class LRUCacheTests(TestCase):
+    """
+    Tests for the in-process LRU cache
+    """
+    def test_evicts_least_recently_used(self):
+        lru = LRUCache(max_size=2)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual(lru.get('a'), 1)
+        self.assertEqual(lru.stats()['evictions'], 1)
+
+    def test_expired_entries_are_misses(self):
+        lru = LRUCache()
+        lru.set('a', 1, ttl=-1)
+        self.assertIsNone(lru.get('a'))
+        self.assertEqual(lru.stats()['misses'], 1)
+
+
+class PincodeCacheTests(TestCase):
+    """
+    Tests for cached pincode lookups
+    """
+    def setUp(self):
+        cache.clear()
+        reset_pincode_service()
+        PincodeData.objects.create(pincode='110001', city='New Delhi', state='Delhi', country='India')
+
+    def test_repeated_lookup_skips_database(self):
+        service = PincodeService()
+        with self.assertNumQueries(1):
+            service.lookup_pincode('110001')
+        with self.assertNumQueries(0):
+            result = service.lookup_pincode('110001')
+        self.assertEqual(result['data']['city'], 'New Delhi')
+        self.assertEqual(service.cache_stats()['local']['hits'], 1)
+
+    def test_unknown_pincode_is_negatively_cached(self):
+        fetcher = mock.Mock(**{'fetch.return_value': None})
+        service = PincodeService(fetcher=fetcher)
+        self.assertFalse(service.lookup_pincode('999999')['success'])
+        self.assertFalse(service.lookup_pincode('999999')['success'])
+        self.assertEqual(fetcher.fetch.call_count, 1)
+
+    def test_negative_results_expire_quickly(self):
+        fetcher = mock.Mock(**{'fetch.return_value': None})
+        service = PincodeService(fetcher=fetcher)
+        service.negative_cache_timeout = -1
+        service.lookup_pincode('999999')
+        service.lookup_pincode('999999')
+        self.assertEqual(fetcher.fetch.call_count, 2)
+
+    def test_shared_tier(self):
+        first = PincodeService(shared_cache_alias='default')
+        first.lookup_pincode('110001')
+        second = PincodeService(shared_cache_alias='default')
+        with self.assertNumQueries(0):
+            second.lookup_pincode('110001')
+        self.assertEqual(second.cache_stats()['shared'], {'hits': 1, 'misses': 0})
+
+    def test_injected_empty_cache_is_used(self):
+        local_cache = LRUCache(max_size=10)
+        service = PincodeService(local_cache=local_cache)
+        service.lookup_pincode('110001')
+        self.assertIs(service.local_cache, local_cache)
+        self.assertEqual(len(local_cache), 1)
+
+    @override_settings(PINCODE_INDEX_CHECK_INTERVAL=0)
+    def test_data_changes_invalidate_cached_results(self):
+        service = PincodeService(shared_cache_alias='default')
+        service.lookup_pincode('110001')
+        PincodeData.objects.filter(pincode='110001').update(city='Delhi')
+        # Bulk writes (e.g. load_pincode_data) publish the change explicitly
+        PincodeIndex().bump_version()
+        self.assertEqual(service.lookup_pincode('110001')['data']['city'], 'Delhi')
+
+        PincodeData.objects.get(pincode='110001').delete()
+        fresh = PincodeService(shared_cache_alias='default', fetcher=mock.Mock(**{'fetch.return_value': None}))
+        self.assertFalse(fresh.lookup_pincode('110001')['success'])
+
+    @override_settings(PINCODE_INDEX_CHECK_INTERVAL=0)
+    def test_new_external_pincodes_keep_cached_results(self):
+        fetcher = mock.Mock()
+        fetcher.fetch.side_effect = lambda pincode: {
+            'pincode': pincode, 'city': 'Mumbai', 'state': 'Maharashtra', 'country': 'India'
+        } if pincode == '400001' else None
+        service = PincodeService(shared_cache_alias='default', fetcher=fetcher)
+        service.lookup_pincode('110001')
+        service.lookup_pincode('000000')
+
+        self.assertTrue(service.lookup_pincode('400001')['success'])
+        self.assertTrue(PincodeData.objects.filter(pincode='400001').exists())
+        with self.assertNumQueries(0):
+            self.assertTrue(service.lookup_pincode('110001')['success'])
+            self.assertFalse(service.lookup_pincode('000000')['success'])
+        self.assertEqual(fetcher.fetch.call_count, 2)
+
+    def test_view_uses_shared_service(self):
+        client = APIClient()
+        url = reverse('pincode-lookup', args=['110001'])
+        self.assertEqual(client.get(url).status_code, 200)
+        with self.assertNumQueries(0):
+            response = client.get(url)
+        self.assertEqual(response.data['state'], 'Delhi')
+
+
+class PincodeIndexTests(TestCase):
+    """
+    Tests for the in-memory pincode index
+    """
+    def setUp(self):
+        cache.clear()
+        PincodeData.objects.create(pincode='400001', city='Mumbai', state='Maharashtra', country='India')
+        PincodeData.objects.create(pincode='110001', city='New Delhi', state='Delhi', country='India')
+        PincodeData.objects.create(pincode='SW1A', city='London', state='England', country='UK')
+        self.index = PincodeIndex(check_interval=0)
+
+    def test_lookups_do_not_query(self):
+        self.index.load()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.index.lookup('110001')['city'], 'New Delhi')
+            self.assertEqual(self.index.lookup('SW1A')['country'], 'UK')
+            self.assertIsNone(self.index.lookup('560001'))
+        self.assertEqual(len(self.index), 3)
+
+    def test_changed_rows_become_visible(self):
+        self.index.load()
+        PincodeData.objects.filter(pincode='110001').update(city='Delhi')
+        PincodeData.objects.get(pincode='400001').save()
+        self.assertEqual(self.index.lookup('110001')['city'], 'Delhi')
+        PincodeData.objects.get(pincode='SW1A').delete()
+        self.assertIsNone(self.index.lookup('SW1A'))
+
+    def test_new_rows_are_added_without_a_reload(self):
+        self.addCleanup(reset_pincode_index)
+        index = get_pincode_index()
+        index.load()
+        version = index.current_version()
+        PincodeData.objects.create(pincode='560001', city='Bangalore', state='Karnataka', country='India')
+        PincodeData.objects.create(pincode='E1', city='London', state='England', country='UK')
+        with self.assertNumQueries(0):
+            self.assertEqual(index.lookup('560001')['city'], 'Bangalore')
+            self.assertEqual(index.lookup('400001')['city'], 'Mumbai')
+            self.assertEqual(index.lookup('E1')['country'], 'UK')
+        self.assertEqual(index.current_version(), version)
+        self.assertEqual(len(index), 5)
+
+    def test_service_skips_database_for_indexed_pincodes(self):
+        service = PincodeService(index=self.index)
+        self.index.load()
+        with self.assertNumQueries(0):
+            result = service.lookup_pincode('400001')
+        self.assertEqual(result['data']['state'], 'Maharashtra')
+
+    def test_concurrent_checks_reload_once(self):
+        loads = []
+
+        def load():
+            loads.append(1)
+            time.sleep(0.05)
+            self.index.loaded_version = self.index.current_version()
+
+        with mock.patch.object(self.index, 'load', side_effect=load):
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                list(executor.map(lambda _: self.index.ensure_current(), range(4)))
+        self.assertEqual(len(loads), 1)
+
+    def test_memory_footprint(self):
+        self.index.load()
+        footprint = self.index.memory_footprint()
+        self.assertEqual(footprint['entries'], 3)
+        self.assertGreater(footprint['total_bytes'], 0)
+
+
+class StubPincodeHandler(BaseHTTPRequestHandler):
+    """
+    Serves postalpincode.in-shaped responses; behaviour is set per server
+    """
+    def do_GET(self):
+        self.server.hits += 1
+        time.sleep(self.server.delay)
+        pincode = self.path.rstrip('/').rsplit('/', 1)[-1]
+        if self.server.valid:
+            body = [{'Status': 'Success', 'PostOffice': [
+                {'District': self.server.district, 'State': 'Delhi', 'Country': 'India'}
+            ]}]
+        else:
+            body = [{'Status': 'Error', 'PostOffice': None}]
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class PincodeFetcherTests(TestCase):
+    """
+    Tests for the pooled external pincode fetcher against local stub servers
+    """
+    def start_server(self, valid=True, delay=0.0, district='New Delhi'):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), StubPincodeHandler)
+        server.hits, server.valid, server.delay, server.district = 0, valid, delay, district
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server, f'http://127.0.0.1:{server.server_address[1]}/pincode/'
+
+    def make_fetcher(self, *urls):
+        return PincodeFetcher(urls, PincodeService()._parse_api_response, timeout=2)
+
+    def test_concurrent_lookups_share_one_upstream_call(self):
+        server, url = self.start_server(delay=0.3)
+        fetcher = self.make_fetcher(url)
+        with ThreadPoolExecutor(max_workers=10) as pool:
+            results = list(pool.map(fetcher.fetch, ['110001'] * 10))
+        self.assertEqual(server.hits, 1)
+        self.assertTrue(all(result['city'] == 'New Delhi' for result in results))
+        self.assertEqual(fetcher.stats()['coalesced'], 9)
+
+    def test_first_valid_provider_wins(self):
+        _, invalid_url = self.start_server(valid=False)
+        _, slow_url = self.start_server(delay=1.0, district='Slow')
+        _, fast_url = self.start_server(delay=0.1, district='Fast')
+        fetcher = self.make_fetcher(invalid_url, slow_url, fast_url)
+        self.assertEqual(fetcher.fetch('110001')['city'], 'Fast')
+
+    def test_no_valid_provider_returns_none(self):
+        _, url = self.start_server(valid=False)
+        self.assertIsNone(self.make_fetcher(url, 'http://127.0.0.1:9/pincode/').fetch('999999'))
+
+    def test_service_saves_fetched_pincode(self):
+        _, url = self.start_server()
+        service = PincodeService(fetcher=self.make_fetcher(url))
+        self.assertTrue(service.lookup_pincode('110099')['success'])
+        self.assertTrue(PincodeData.objects.filter(pincode='110099').exists())
+
+
+class LoadPincodeDataTests(TestCase):
+    """
+    Tests for the streaming pincode importer
+    """
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write_file(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w') as handle:
+            handle.write(content)
+        return path
+
+    def load(self, **options):
+        out = StringIO()
+        call_command('load_pincode_data', stdout=out, **options)
+        return out.getvalue()
+
+    def test_sample_data_loads(self):
+        self.load()
+        self.assertEqual(PincodeData.objects.count(), 40)
+
+    def test_csv_upsert_with_column_aliases(self):
+        PincodeData.objects.create(pincode='110001', city='Old', state='Delhi', country='India')
+        path = self.write_file('pincodes.csv', (
+            'officename,pincode,districtname,statename\n'
+            'A,110001,New Delhi,Delhi\n'
+            'B,110001,New Delhi,Delhi\n'
+            'C,400001,Mumbai,Maharashtra\n'
+            'D,,Nowhere,Nowhere\n'
+        ))
+        output = self.load(file=path, batch_size=2)
+        self.assertEqual(PincodeData.objects.get(pincode='110001').city, 'New Delhi')
+        self.assertEqual(PincodeData.objects.get(pincode='400001').country, 'India')
+        self.assertIn('rows/sec', output)
+
+    def test_ndjson_dry_run_reports_diffs_without_writing(self):
+        PincodeData.objects.create(pincode='110001', city='Old', state='Delhi', country='India')
+        path = self.write_file('pincodes.ndjson', (
+            '{"pincode": "110001", "city": "New Delhi", "state": "Delhi"}\n'
+            '{"pincode": "400001", "city": "Mumbai", "state": "Maharashtra"}\n'
+        ))
+        output = self.load(file=path, dry_run=True)
+        self.assertIn("city: 'Old' -> 'New Delhi'", output)
+        self.assertIn('1 new, 1 changed, 0 unchanged', output)
+        self.assertEqual(PincodeData.objects.count(), 1)
+
+    def test_non_object_json_rows_are_rejected(self):
+        array = self.write_file('pincodes.json', '[{"pincode": "110001", "city": "New Delhi", "state": "Delhi"}]\n')
+        with self.assertRaisesMessage(CommandError, 'Line 1 of'):
+            self.load(file=array)
+        mixed = self.write_file('pincodes.ndjson', (
+            '{"pincode": "110001", "city": "New Delhi", "state": "Delhi"}\n'
+            '"400001"\n'
+        ))
+        with self.assertRaisesMessage(CommandError, 'Line 2 of'):
+            self.load(file=mixed)
+
+    def test_resume_from_checkpoint(self):
+        path = self.write_file('pincodes.csv', (
+            'pincode,city,state\n'
+            '110001,New Delhi,Delhi\n'
+            '400001,Mumbai,Maharashtra\n'
+        ))
+        checkpoint = os.path.join(self.directory.name, 'checkpoint.json')
+        with open(checkpoint, 'w') as handle:
+            json.dump({'source': os.path.abspath(path), 'rows': 1}, handle)
+        self.load(file=path, checkpoint=checkpoint, resume=True)
+        self.assertEqual(list(PincodeData.objects.values_list('pincode', flat=True)), ['400001'])
+        with open(checkpoint) as handle:
+            self.assertEqual(json.load(handle)['rows'], 2)
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """
+    Tests for cached token authentication
+    """
+    def setUp(self):
+        cache.clear()
+        reset_token_cache()
+        reset_activity_tracker()
+        self.addCleanup(reset_activity_tracker)
+        self.user = User.objects.create_user(
+            username='reporter', email='reporter@example.com', password='testpass123'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.url = reverse('user-profile')
+
+    def test_second_request_skips_token_query(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+        stats = get_token_cache().stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+        self.assertGreater(stats['saved_ms'], 0)
+
+    def test_logout_evicts_token(self):
+        self.client.get(self.url)
+        self.assertEqual(self.client.post(reverse('user-logout')).status_code, 200)
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_deactivation_invalidates_cache(self):
+        self.client.get(self.url)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_queryset_deactivation_invalidates_cache(self):
+        self.client.get(self.url)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_revocations_reach_other_processes(self):
+        self.client.get(self.url)
+        # Another worker process shares only the default cache
+        other = TokenUserCache(max_size=10, ttl=60)
+        other.evict_token(self.token.key)
+        self.assertIsNone(get_token_cache().get(self.token.key))
+
+        self.client.get(self.url)
+        other.evict_user(self.user.pk)
+        self.assertIsNone(get_token_cache().get(self.token.key))
+
+    def test_profile_update_is_visible(self):
+        self.client.get(self.url)
+        self.client.patch(self.url, {'city': 'Pune'})
+        self.assertEqual(self.client.get(self.url).data['city'], 'Pune')
+
+
+class LoginActivityTrackerTests(TestCase):
+    """
+    Tests for coalesced login activity tracking
+    """
+    def setUp(self):
+        reset_activity_tracker()
+        self.addCleanup(reset_activity_tracker)
+        self.user = User.objects.create_user(
+            username='reporter', email='reporter@example.com', password='testpass123'
+        )
+
+    def test_save_does_not_touch_last_login(self):
+        self.user.city = 'Pune'
+        self.user.save()
+        self.user.refresh_from_db()
+        self.assertIsNone(self.user.last_login)
+
+    def test_seen_is_coalesced_per_write_interval(self):
+        tracker = LoginActivityTracker(write_interval=300, flush_interval=3600)
+        with self.assertNumQueries(0):
+            for _ in range(5):
+                tracker.record_seen(self.user.pk)
+        self.assertEqual(tracker.stats(), {'pending': 1, 'writes': 0, 'coalesced': 4})
+        with self.assertNumQueries(1):
+            self.assertEqual(tracker.flush(), 1)
+        self.user.refresh_from_db()
+        self.assertIsNotNone(self.user.last_seen)
+        self.assertIsNone(self.user.last_login)
+
+    def test_batch_flush_mixes_logins_and_seen(self):
+        other = User.objects.create_user(
+            username='other', email='other@example.com', password='testpass123'
+        )
+        tracker = LoginActivityTracker(write_interval=300, flush_interval=3600, batch_size=2)
+        tracker.record_seen(other.pk)
+        tracker.record_login(self.user)
+        self.assertEqual(tracker.stats()['writes'], 2)
+        self.user.refresh_from_db()
+        other.refresh_from_db()
+        self.assertIsNotNone(self.user.last_login)
+        self.assertIsNone(other.last_login)
+        self.assertIsNotNone(other.last_seen)
+
+    def test_save_keeps_flushed_activity(self):
+        stale = User.objects.get(pk=self.user.pk)
+        tracker = LoginActivityTracker(write_interval=300, flush_interval=3600)
+        tracker.record_seen(self.user.pk)
+        tracker.flush()
+        stale.city = 'Pune'
+        stale.save()
+        stale.refresh_from_db()
+        self.assertEqual(stale.city, 'Pune')
+        self.assertIsNotNone(stale.last_seen)
+
+    def test_pending_activity_is_dropped_for_another_database(self):
+        tracker = LoginActivityTracker(write_interval=300, flush_interval=3600)
+        tracker.record_seen(self.user.pk)
+        with mock.patch.dict(connection.settings_dict, NAME='other.sqlite3'):
+            with self.assertNumQueries(0):
+                self.assertEqual(tracker.flush(), 0)
+        self.user.refresh_from_db()
+        self.assertIsNone(self.user.last_seen)
+
+    def test_timer_flushes_after_interval(self):
+        tracker = LoginActivityTracker(write_interval=300, flush_interval=0.01)
+        with mock.patch.object(tracker, 'flush') as flush:
+            tracker.record_seen(self.user.pk)
+            tracker._timer.join()
+        flush.assert_called_once_with()
+
+    def test_reset_discards_pending_activity(self):
+        tracker = get_activity_tracker()
+        tracker.record_seen(self.user.pk)
+        reset_activity_tracker()
+        self.assertEqual(tracker.stats()['pending'], 0)
+        self.assertIsNone(tracker._timer)
+
+    def test_login_view_records_login(self):
+        response = APIClient().post(reverse('user-login'), {
+            'email': 'reporter@example.com', 'password': 'testpass123'
+        })
+        self.assertIsNotNone(response.data['user']['last_login'])
+
+
+class GenerateSyntheticDataTests(TestCase):
+    """
+    Tests for the bulk synthetic data generator
+    """
+    def setUp(self):
+        reset_incident_id_allocator()
+
+    def generate(self, **options):
+        options = {'users': 20, 'incidents': 300, 'years': 2, 'workers': 1,
+                   'batch_size': 100, 'stdout': StringIO(), **options}
+        call_command('generate_synthetic_data', **options)
+
+    def test_generates_skewed_incidents_across_years(self):
+        self.generate(heavy_reporters=0.1, heavy_share=0.8, status_weights='CLOSED=1')
+        self.assertEqual(User.objects.filter(username__startswith='synthetic_').count(), 20)
+        incidents = list(Incident.objects.all())
+        self.assertEqual(len(incidents), 300)
+        self.assertEqual(len({incident.incident_id for incident in incidents}), 300)
+        self.assertTrue(all(incident.status == 'CLOSED' for incident in incidents))
+        self.assertTrue(all(
+            incident.incident_id.endswith(str(incident.reported_date.year))
+            and incident.updated_date >= incident.reported_date
+            for incident in incidents
+        ))
+        self.assertGreaterEqual(len({incident.reported_date.year for incident in incidents}), 2)
+
+        heavy = User.objects.filter(username__in=['synthetic_0', 'synthetic_1'])
+        self.assertGreater(Incident.objects.filter(reporter__in=heavy).count(), 200)
+
+        user = User.objects.get(username='synthetic_5')
+        self.assertTrue(user.check_password('testpass123'))
+
+    def test_same_seed_gives_same_data_and_ids_are_not_reused(self):
+        self.generate(prefix='first')
+        self.generate(prefix='second')
+        self.assertEqual(Incident.objects.count(), 600)
+        self.assertEqual(Incident.objects.values('incident_id').distinct().count(), 600)
+        first = Incident.objects.filter(reporter__username__startswith='first_')
+        second = Incident.objects.filter(reporter__username__startswith='second_')
+        self.assertEqual(
+            sorted(first.values_list('priority', 'status', 'incident_details')),
+            sorted(second.values_list('priority', 'status', 'incident_details')),
+        )
+
+    def test_rejects_more_incidents_than_id_capacity(self):
+        year = timezone.now().year
+        IncidentIdSequence.objects.create(year=year, next_value=RandomIncidentIdAllocator.CAPACITY - 10)
+        with self.assertRaisesMessage(CommandError, str(year)):
+            self.generate(incidents=100000, years=1)
+        self.assertFalse(User.objects.filter(username__startswith='synthetic_').exists())
+
+    def test_rejects_invalid_weights(self):
+        with self.assertRaisesMessage(CommandError, 'URGENT'):
+            self.generate(priority_weights='URGENT=1')
+
+
+class UserListTests(TestCase):
+    """
+    Tests for the paginated and streamed user list
+    """
+    url = reverse('user-list')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create_user(
+                username=f'user{number}', email=f'user{number}@example.com', password='x',
+                first_name='User', last_name=str(number)
+            )
+            for number in range(5)
+        ]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.users[0])
+
+    def test_pages_follow_the_cursor(self):
+        ids = []
+        url, params = self.url, {'page_size': 2}
+        while url:
+            with self.assertNumQueries(1):
+                response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            ids += [row['id'] for row in response.data['results']]
+            url, params = response.data['next'], None
+        self.assertEqual(ids, [user.pk for user in self.users])
+
+    def test_matches_user_serializer(self):
+        response = self.client.get(self.url)
+        expected = json.loads(json.dumps(UserSerializer(self.users, many=True).data))
+        self.assertEqual(json.loads(response.content)['results'], expected)
+
+    def test_field_selection(self):
+        response = self.client.get(self.url, {'fields': 'email,first_name', 'page_size': 1})
+        self.assertEqual(response.data['results'], [{'email': 'user0@example.com', 'first_name': 'User'}])
+        self.assertIsNotNone(response.data['next'])
+        self.assertEqual(self.client.get(self.url, {'fields': 'password'}).status_code, 400)
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.client.get(self.url, {'cursor': 'garbage'}).status_code, 404)
+        self.assertEqual(self.client.get(self.url, {'export': 'csv'}).status_code, 400)
+
+    def test_ndjson_export_streams_in_batches(self):
+        with mock.patch.object(UserListService, 'EXPORT_CHUNK_SIZE', 2):
+            response = self.client.get(self.url, {'export': 'ndjson', 'fields': 'id,username'})
+            self.assertTrue(response.streaming)
+            self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+            with self.assertNumQueries(4):
+                lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], [
+            {'id': user.pk, 'username': user.username} for user in self.users
+        ])
+
+    def test_json_export(self):
+        response = self.client.get(self.url, {'export': 'json', 'fields': 'email'})
+        self.assertEqual(json.loads(b''.join(response.streaming_content)), [
+            {'email': user.email} for user in self.users
+        ])
+        User.objects.all().delete()
+        service = UserListService()
+        self.assertEqual(json.loads(b''.join(service.export(service.FIELDS, 'json'))), [])
+
+    async def test_export_under_asgi_uses_an_async_iterator(self):
+        token = await Token.objects.acreate(user=self.users[0])
+        client = AsyncClient()
+        response = await client.get(
+            self.url, {'export': 'ndjson', 'fields': 'id'}, headers={'Authorization': f'Token {token.key}'}
+        )
+        self.assertTrue(response.is_async)
+        content = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(len(content.splitlines()), len(self.users))
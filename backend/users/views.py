@@ -4,8 +4,13 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
 from django.contrib.auth import authenticate
+from django.core.handlers.asgi import ASGIRequest
 from django.db import IntegrityError
+from django.http import StreamingHttpResponse
+from .activity import get_activity_tracker
+from .listing import UserListService
 from .models import User, PincodeData
+from .pagination import UserCursorPagination
 from .serializers import (
     UserRegistrationSerializer, UserLoginSerializer, 
     UserSerializer, PincodeDataSerializer
@@ -52,6 +57,7 @@ def login_view(request):
     if serializer.is_valid():
         user = serializer.validated_data['user']
         token, created = Token.objects.get_or_create(user=user)
+        get_activity_tracker().record_login(user)
         
         return Response({
             'user': UserSerializer(user).data,
@@ -100,10 +106,9 @@ def pincode_lookup(request, pincode):
     """
     View to lookup city and country by pincode
     """
-    from .services import PincodeService
+    from .services import get_pincode_service
     
-    service = PincodeService()
-    result = service.lookup_pincode(pincode)
+    result = get_pincode_service().lookup_pincode(pincode)
     
     if result['success']:
         return Response(result['data'], status=status.HTTP_200_OK)
@@ -117,8 +122,30 @@ def pincode_lookup(request, pincode):
 @permission_classes([IsAuthenticated])
 def user_list(request):
     """
-    View to list all users (for admin purposes)
+    View to list all users (for admin purposes), a keyset page at a time or
+    as a streamed export (?export=json|ndjson), with optional ?fields=
     """
-    users = User.objects.all()
-    serializer = UserSerializer(users, many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    service = UserListService()
+    fields = service.parse_fields(request.query_params.get('fields', ''))
+    if fields is None:
+        return Response({
+            'error': f"fields may only contain: {', '.join(service.FIELDS)}"
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    export_format = request.query_params.get('export')
+    if export_format is not None:
+        if export_format not in service.EXPORT_FORMATS:
+            return Response({
+                'error': f"export must be one of: {', '.join(service.EXPORT_FORMATS)}"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if isinstance(request._request, ASGIRequest):
+            content = service.aexport(fields, export_format)
+        else:
+            content = service.export(fields, export_format)
+        response = StreamingHttpResponse(content, content_type=service.content_type(export_format))
+        response['Content-Disposition'] = f'attachment; filename="users.{export_format}"'
+        return response
+    
+    paginator = UserCursorPagination()
+    page = paginator.paginate_queryset(service.get_queryset(fields), request)
+    return paginator.get_paginated_response(service.select(page, fields))
@@ -25,6 +25,45 @@ const Dashboard = () => {
     }
   }, [user]);
 
+  // Apply incident changes pushed by the server instead of re-fetching the list
+  useEffect(() => {
+    if (!user?.id) {
+      return undefined;
+    }
+    let statsTimer = null;
+    const refreshStats = () => {
+      clearTimeout(statsTimer);
+      statsTimer = setTimeout(async () => {
+        const statsResult = await incidentsAPI.getIncidentStats();
+        if (statsResult.success) {
+          setStats(statsResult.data);
+        }
+      }, 500);
+    };
+
+    const unsubscribe = incidentsAPI.subscribeToIncidentEvents((type, data) => {
+      if (type === 'reset') {
+        fetchDashboardData();
+        return;
+      }
+      setIncidents((current) => {
+        if (type === 'created') {
+          return current.some((incident) => incident.id === data.id) ? current : [data, ...current];
+        }
+        if (type === 'deleted') {
+          return current.filter((incident) => incident.id !== data.id);
+        }
+        return current.map((incident) => (incident.id === data.id ? { ...incident, ...data } : incident));
+      });
+      refreshStats();
+    });
+
+    return () => {
+      clearTimeout(statsTimer);
+      unsubscribe();
+    };
+  }, [user]);
+
   const fetchDashboardData = async () => {
     try {
       setLoading(true);
@@ -278,6 +278,24 @@ export const incidentsAPI = {
       };
     }
   },
+
+  // Subscribe to the current user's incident change events (server-sent events).
+  // onEvent receives (type, data); type 'reset' means events were missed.
+  // Returns a function that closes the subscription.
+  subscribeToIncidentEvents: (onEvent) => {
+    const token = localStorage.getItem('authToken');
+    if (!token || typeof EventSource === 'undefined') {
+      return () => {};
+    }
+    const url = new URL('incidents/events/', new URL(api.defaults.baseURL, window.location.origin));
+    // EventSource cannot send an Authorization header
+    url.searchParams.set('token', token);
+    const source = new EventSource(url);
+    ['created', 'updated', 'closed', 'deleted', 'reset'].forEach((type) => {
+      source.addEventListener(type, (event) => onEvent(type, JSON.parse(event.data)));
+    });
+    return () => source.close();
+  },
 };
 
 // Utility functions